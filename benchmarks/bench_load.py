@@ -0,0 +1,249 @@
+"""
+Offline load test of the real cogs.
+
+Boots bot_main (every cog in EXTENSIONS) in a temporary working directory against
+the fake gateway and REST layer in fake_discord.py, logs in, connects, and runs
+scripted scenarios:
+
+  votes      --voters members click the vote button of one !ssv message within --spread seconds
+  tickets    --clicks members click "General Support" on the ticket panel at the same moment
+  raid       a moderator bans, then kicks, --targets raiders (!massban/!masskick, split into
+             commands that fit Discord's 2000-character message limit)
+  reconnect  --reconnects back-to-back READY + GUILD_CREATE cycles, each firing on_ready
+
+For each scenario it reports throughput, interaction acknowledgement latency (from
+INTERACTION_CREATE to the callback reaching the fake), handler p99 from perf.py,
+REST calls, simulated 429s (as counted by the fake and by perf.py), acks later than
+Discord's 3-second deadline and what is still queued in the outbound queue.
+
+Usage: python benchmarks/bench_load.py [--scenario all] [--voters 200] [--clicks 50]
+                                       [--targets 300] [--reconnects 20] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "botcodeupdate")
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_discord  # noqa: E402
+import perf  # noqa: E402
+from fake_discord import (  # noqa: E402
+    GENERAL_CHANNEL_ID, MODERATOR_ROLE_ID, OWNER_ID, SUPPORT_CHANNEL_ID, FakeDiscord, FakeGateway
+)
+
+SCENARIOS = ("votes", "tickets", "raid", "reconnect")
+# Longest command a member can send
+MAX_MESSAGE_LENGTH = 2000
+MODERATOR_ID = 1342600000000000100
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def user_ids(start, count):
+    return [start + i for i in range(count)]
+
+
+async def wait_for_calls(name, count, timeout=120.0):
+    """Waits until perf.py has recorded `count` calls of handler `name`."""
+    deadline = time.monotonic() + timeout
+    while perf.get_perf().stats(name).calls < count:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{name}: {perf.get_perf().stats(name).calls}/{count} calls after {timeout:.0f}s")
+        await asyncio.sleep(0.01)
+
+
+async def run_command(bot, gateway, author_id, content, role_ids=()):
+    """Sends a prefix command and waits for it to finish (or fail)."""
+    done = asyncio.get_running_loop().create_future()
+
+    async def finished(ctx, *args):
+        if ctx.message.id == message_id and not done.done():
+            done.set_result(args[0] if args else None)
+
+    bot.add_listener(finished, "on_command_completion")
+    bot.add_listener(finished, "on_command_error")
+    try:
+        message_id = gateway.message(author_id, content, role_ids)
+        error = await asyncio.wait_for(done, 120)
+    finally:
+        bot.remove_listener(finished, "on_command_completion")
+        bot.remove_listener(finished, "on_command_error")
+    if error is not None:
+        raise RuntimeError(f"{content[:40]!r} failed: {error}")
+
+
+def find_message(fake, custom_id):
+    """ID of the newest stored message carrying a component with `custom_id`."""
+    for message_id, message in reversed(list(fake.messages.items())):
+        for row in message["components"]:
+            if any(component.get("custom_id") == custom_id for component in row.get("components", [])):
+                return message_id
+    raise LookupError(f"No message with a {custom_id!r} component")
+
+
+async def scenario_votes(bot, gateway, fake, args):
+    sys.modules["sessions"].VOTE_THRESHOLD = args.threshold or args.voters
+    await run_command(bot, gateway, OWNER_ID, "!ssv")
+    vote_message = find_message(fake, "sessions:vote")
+    await fake.idle()
+
+    started = time.perf_counter()
+    delays = sorted(fake.rng.uniform(0, args.spread) for _ in range(args.voters))
+
+    async def vote(user_id, delay):
+        await asyncio.sleep(delay)
+        gateway.click(user_id, "sessions:vote", vote_message, GENERAL_CHANNEL_ID)
+
+    await asyncio.gather(*(vote(user_id, delay) for user_id, delay in zip(user_ids(1350000000000000000, args.voters), delays)))
+    await wait_for_calls("SessionVoteView.vote_button", args.voters)
+    handled = time.perf_counter() - started
+    await fake.idle()
+    return args.voters, handled, time.perf_counter() - started, []
+
+
+async def scenario_tickets(bot, gateway, fake, args):
+    panel = find_message(fake, "tickets:general")
+    started = time.perf_counter()
+    for user_id in user_ids(1351000000000000000, args.clicks):
+        gateway.click(user_id, "tickets:general", panel, SUPPORT_CHANNEL_ID)
+    await wait_for_calls("TicketButtons.general_button", args.clicks)
+    handled = time.perf_counter() - started
+    await fake.idle()
+    return args.clicks, handled, time.perf_counter() - started, [f"{len(fake.channels)} ticket channel(s) created"]
+
+
+async def scenario_raid(bot, gateway, fake, args):
+    started = time.perf_counter()
+    commands_sent = 0
+    for command, first_id in (("!massban", 1352000000000000000), ("!masskick", 1353000000000000000)):
+        batches, batch = [], []
+        for user_id in user_ids(first_id, args.targets):
+            if len(" ".join(map(str, batch + [user_id]))) + len(command) + len(" Raid") + 2 > MAX_MESSAGE_LENGTH:
+                batches.append(batch)
+                batch = []
+            batch.append(user_id)
+        batches.append(batch)
+        # Several moderators working the raid at once
+        await asyncio.gather(*(
+            run_command(bot, gateway, MODERATOR_ID + i, f"{command} {' '.join(map(str, batch))} Raid", [MODERATOR_ROLE_ID])
+            for i, batch in enumerate(batches)
+        ))
+        commands_sent += len(batches)
+    handled = time.perf_counter() - started
+    await fake.idle()
+    return commands_sent, handled, time.perf_counter() - started, []
+
+
+async def scenario_reconnect(bot, gateway, fake, args):
+    started = time.perf_counter()
+    ready_times = []
+    for _ in range(args.reconnects):
+        connect_started = time.perf_counter()
+        await gateway.connect()
+        ready_times.append(time.perf_counter() - connect_started)
+    handled = time.perf_counter() - started
+    await fake.idle()
+    notes = [
+        f"on_ready after p50 {percentile(ready_times, 50) * 1000:.0f}ms, "
+        f"p99 {percentile(ready_times, 99) * 1000:.0f}ms "
+        f"(includes discord.py's {bot._connection.guild_ready_timeout * 1000:.0f}ms guild wait)"
+    ]
+    return args.reconnects, handled, time.perf_counter() - started, notes
+
+
+def report(name, events, handled, total, notes, fake, perf_snapshot, outbound_metrics):
+    acks = fake.acks
+    print(f"{name}:")
+    print(f"  {events} event(s) handled in {handled:.2f}s ({events / handled:.1f}/s); settled after {total:.2f}s")
+    for note in notes:
+        print(f"  {note}")
+    if acks:
+        print(
+            f"  interaction ack p50 {percentile(acks, 50) * 1000:.0f}ms, p99 {percentile(acks, 99) * 1000:.0f}ms, "
+            f"max {max(acks) * 1000:.0f}ms, {fake.late_acks} later than 3s"
+        )
+    for handler, stats in sorted(perf_snapshot["handlers"].items(), key=lambda item: item[1]["calls"], reverse=True)[:3]:
+        if handler != perf.BACKGROUND:
+            print(f"  {handler}: p99 {stats['p99_ms']:.0f}ms over {stats['calls']} call(s), {stats['errors']} error(s)")
+    print(f"  REST calls {fake.requests} (perf.py: {perf_snapshot['rest_calls']}), 429s {fake.rate_limited} (perf.py: {perf_snapshot['rate_limited']})")
+    top_routes = sorted(fake.routes.items(), key=lambda item: item[1], reverse=True)[:5]
+    if top_routes:
+        print("  busiest routes: " + ", ".join(f"{route} x{count}" for route, count in top_routes))
+    backlog = sum(outbound_metrics["depth"].values())
+    if backlog:
+        print(f"  outbound queue still holds {backlog} message(s)")
+
+
+async def run(args, fake):
+    import bot_main
+    import outbound
+
+    bot = bot_main.bot
+    await bot_main.load_commands()
+    await bot.login("fake-token")
+    gateway = FakeGateway(bot, fake)
+    await gateway.connect()
+    await fake.idle()
+
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    runners = {
+        "votes": scenario_votes,
+        "tickets": scenario_tickets,
+        "raid": scenario_raid,
+        "reconnect": scenario_reconnect,
+    }
+    for name in scenarios:
+        fake.reset_counters()
+        perf.get_perf().handlers.clear()
+        events, handled, total, notes = await runners[name](bot, gateway, fake, args)
+        report(name, events, handled, total, notes, fake, perf.get_perf().snapshot(), outbound.get_outbound().metrics())
+
+    await bot.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=("all",) + SCENARIOS, default="all")
+    parser.add_argument("--voters", type=int, default=200)
+    parser.add_argument("--threshold", type=int, default=0, help="Votes needed to start the session (default: --voters)")
+    parser.add_argument("--spread", type=float, default=2.0, help="Seconds over which the votes arrive")
+    parser.add_argument("--clicks", type=int, default=50)
+    parser.add_argument("--targets", type=int, default=300)
+    parser.add_argument("--reconnects", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean simulated REST round trip in seconds")
+    parser.add_argument("--verbose", action="store_true", help="Keep the bot's console log output")
+    args = parser.parse_args(argv)
+
+    fake = FakeDiscord(latency=args.latency)
+    # Before bot_main is imported, so perf.py wraps the fakes
+    fake_discord.install(fake)
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    cwd = os.getcwd()
+    os.chdir(workdir)  # The cogs keep their databases and bot.log in the working directory
+    try:
+        import bot_main
+        if not args.verbose:
+            bot_main.log_listener.handlers = tuple(
+                handler for handler in bot_main.log_listener.handlers if type(handler) is not logging.StreamHandler
+            )
+        asyncio.run(run(args, fake))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Log search benchmark.
+
+Fills a logs table (real moderation.py schema: rollup and FTS5 triggers
+included) with --rows generated reasons, then times what !logsearch does for
+one page: the matching rows plus the total match count. Two implementations:
+
+  before  reason LIKE '%word%' for every word (a scan of logs; no ranking)
+  after   logs_fts MATCH via moderation.search_page (the !logsearch query):
+          ranked by bm25 up to SEARCH_RANK_LIMIT matches, newest first beyond
+
+Queries cover a common word, a rare alt-account name, two-word searches and
+a prefix. Also reports the per-row insert cost and the database size.
+
+Usage: python benchmarks/bench_logsearch.py [--rows 1000000] [--repeats 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "botcodeupdate"))
+
+from moderation import LOGS_PAGE_SIZE, SEARCH_RANK_LIMIT, create_schema, fts_query, search_page  # noqa: E402
+
+WORDS = (
+    "spam spamming raid raider alt account slur harassment toxic advertising nsfw link dm "
+    "mass ping evading ban mute warned again repeated disrespect staff session trolling fake "
+    "report threat doxx impersonation scam nitro giveaway begging caps flood emoji bypass filter"
+).split()
+# Rare names, each mentioned in roughly one reason per 20k rows
+ALTS = [f"shadowalt{i}" for i in range(50)]
+QUERIES = ["spam", "shadowalt7", "shadowalt7 raid", "raid alt", "impers*"]
+# Logs are stored per guild; everything here belongs to one
+GUILD_ID = 1342600000000000000
+INSERT = "INSERT INTO logs (guild_id, user_id, action, reason, moderator_id) VALUES (?, ?, ?, ?, ?)"
+
+
+def reasons(count, rng):
+    for i in range(count):
+        words = rng.choices(WORDS, k=rng.randint(3, 12))
+        if i % 400 == 0:
+            words.insert(rng.randrange(len(words)), rng.choice(ALTS))
+        yield (GUILD_ID, str(rng.randrange(10**17, 10**18)), rng.choice(["Warn", "Mute", "Kick", "Ban"]),
+               " ".join(words), "1342611104249024512")
+
+
+def like_search(conn, query):
+    words = [word.rstrip("*") for word in query.split()]
+    where = " AND ".join("reason LIKE ?" for _ in words)
+    params = [f"%{word}%" for word in words]
+    rows = conn.execute(
+        f"SELECT log_id, action, reason, timestamp, moderator_id, user_id FROM logs WHERE {where} "
+        f"ORDER BY log_id DESC LIMIT ?", (*params, LOGS_PAGE_SIZE)
+    ).fetchall()
+    total = conn.execute(f"SELECT COUNT(*) FROM logs WHERE {where}", params).fetchone()[0]
+    return rows, total
+
+
+def fts_search(conn, query):
+    return search_page(conn, GUILD_ID, fts_query(query))
+
+
+def timed(search, conn, query, repeats):
+    samples = []
+    total = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        _, total = search(conn, query)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "moderation.db")
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        create_schema(conn)
+        started = time.perf_counter()
+        conn.execute("BEGIN")
+        conn.executemany(INSERT, reasons(args.rows, rng))
+        conn.execute("COMMIT")
+        insert_us = (time.perf_counter() - started) / args.rows * 1e6
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_mb = os.path.getsize(path) / 1e6
+
+        print(f"{args.rows} rows, {insert_us:.1f} us/row to insert (all triggers), {size_mb:.0f} MB on disk")
+        print(f"median of {args.repeats} runs, first page plus total count")
+        print(f"{'query':<18}{'matches':>9}{'order':>8}{'before ms':>12}{'after ms':>11}")
+        for query in QUERIES:
+            like_ms, like_total = timed(like_search, conn, query, args.repeats)
+            fts_ms, fts_total = timed(fts_search, conn, query, args.repeats)
+            order = "rank" if fts_total <= SEARCH_RANK_LIMIT else "newest"
+            print(f"{query:<18}{fts_total:>9}{order:>8}{like_ms:>12.1f}{fts_ms:>11.1f}")
+            # LIKE matches substrings, so its count can only be larger than the token match count
+            assert like_total >= fts_total
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Moderation datastore benchmark.
+
+Replays a raid burst of moderation actions against two implementations of
+Moderation.log_action:
+
+  before  synchronous sqlite3 on the event loop, commit() after every row
+          (rollback journal, synchronous=FULL: one fsync-bound commit per row)
+  after   datastore.Datastore (writer thread, WAL, group commit)
+
+Each store runs twice: paced (500 actions spread over 10 seconds by default,
+like a raid arriving through the gateway) and as an unpaced burst, whose
+commands/sec is the throughput. A heartbeat task measures how late the event
+loop wakes up, which is the time every gateway event and interaction would
+have been stalled.
+
+The databases live in --dir, which must be on a real disk: on tmpfs an fsync
+costs nothing. --fsync-ms adds a fixed delay to every commit of both stores,
+on top of the real one, to model a slower (e.g. network-attached) disk.
+
+Usage: python benchmarks/bench_moderation_store.py [--actions 500] [--window 10] [--dir .] [--fsync-ms 4]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "botcodeupdate"))
+
+from datastore import Datastore  # noqa: E402
+
+SCHEMA = '''CREATE TABLE IF NOT EXISTS logs (
+    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT,
+    action TEXT,
+    reason TEXT,
+    moderator_id TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)'''
+INSERT = "INSERT INTO logs (user_id, action, reason, moderator_id) VALUES (?, ?, ?, ?)"
+HEARTBEAT = 0.005
+
+
+class BlockingStore:
+    """The pre-Datastore behaviour: sqlite3 on the loop with a commit per row."""
+
+    def __init__(self, path, commit_delay):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA synchronous=FULL")
+        self.commit_delay = commit_delay
+        self.cursor = self.db.cursor()
+        self.cursor.execute(SCHEMA)
+        self.db.commit()
+
+    async def log_action(self, *params):
+        self.cursor.execute(INSERT, params)
+        self.db.commit()
+        if self.commit_delay:
+            time.sleep(self.commit_delay)  # The extra fsync time, spent on the loop like the real one
+
+    async def close(self):
+        self.db.close()
+
+
+class SlowDiskDatastore(Datastore):
+    """Datastore whose every commit takes `commit_delay` seconds longer, on the writer thread."""
+
+    def __init__(self, path, commit_delay):
+        self.commit_delay = commit_delay
+        super().__init__(path)
+
+    def _run_batch(self, conn, batch):
+        super()._run_batch(conn, batch)
+        if self.commit_delay:
+            time.sleep(self.commit_delay)
+
+
+class AsyncStore:
+    def __init__(self, path, commit_delay):
+        self.db = SlowDiskDatastore(path, commit_delay)
+        self.db.submit(lambda conn: conn.execute(SCHEMA)).result()
+
+    async def log_action(self, *params):
+        await self.db.insert(INSERT, params)
+
+    async def close(self):
+        await self.db.close()
+
+
+async def heartbeat(stalls, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT)
+        lag = time.perf_counter() - start - HEARTBEAT
+        stalls.append(max(lag, 0.0))
+
+
+async def run_burst(store, actions, window):
+    stalls = []
+    latencies = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stalls, stop))
+
+    async def command(i):
+        start = time.perf_counter()
+        await store.log_action(str(1000 + i % 50), "WARN", f"raid message #{i}", "42")
+        await asyncio.sleep(0)  # Stand-in for ctx.send
+        latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    tasks = []
+    for i in range(actions):
+        due = started + window * i / actions
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(command(i)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    await store.close()
+
+    latencies.sort()
+    return {
+        "commands/sec": actions / elapsed,
+        "p50 latency ms": statistics.median(latencies) * 1000,
+        "p99 latency ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max stall ms": max(stalls, default=0.0) * 1000,
+        "total stall ms": sum(stalls) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--actions", type=int, default=500)
+    parser.add_argument("--window", type=float, default=10.0, help="Seconds the paced run is spread over")
+    parser.add_argument("--dir", default=".", help="Directory for the databases (must not be tmpfs)")
+    parser.add_argument("--fsync-ms", type=float, default=4.0, help="Extra delay added to every commit (0 = disk only)")
+    args = parser.parse_args()
+
+    runs = ((f"paced: {args.actions} actions over {args.window:g}s", args.window),
+            (f"unpaced: {args.actions} actions at once", 0.0))
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for title, window in runs:
+            results = {}
+            for name, factory in (("before", BlockingStore), ("after", AsyncStore)):
+                store = factory(os.path.join(tmp, f"{name}-{window:g}.db"), args.fsync_ms / 1000)
+                results[name] = asyncio.run(run_burst(store, args.actions, window))
+
+            print(title)
+            print(f"{'metric':<18}{'before':>12}{'after':>12}")
+            for metric in results["before"]:
+                print(f"{metric:<18}{results['before'][metric]:>12.1f}{results['after'][metric]:>12.1f}")
+            print()
+
+
+if __name__ == "__main__":
+    main()
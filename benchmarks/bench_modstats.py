@@ -0,0 +1,109 @@
+"""
+Moderation stats benchmark.
+
+Fills a logs table (with the real moderation.py schema, triggers included) to
+each size in --sizes and times the "actions per moderator and action over the
+past N days" query two ways:
+
+  before  GROUP BY over the logs table (a scan that grows with the table)
+  after   SUM over the modstats_daily rollup (grows with the window only)
+
+Rows are spread over the last year across 25 moderators and 6 actions. Also
+reports the per-row insert cost of keeping the rollup up to date.
+
+Usage: python benchmarks/bench_modstats.py [--sizes 10000,100000,1000000] [--days 30]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "botcodeupdate"))
+
+from moderation import create_schema  # noqa: E402
+
+ACTIONS = ["Warn", "Mute", "Kick", "Ban", "Softban", "Unmute"]
+MODERATORS = [str(1342611104249024512 + i) for i in range(25)]
+# Logs are stored per guild; everything here belongs to one
+GUILD_ID = 1342600000000000000
+INSERT = "INSERT INTO logs (guild_id, user_id, action, reason, moderator_id, timestamp) VALUES (?, ?, ?, ?, ?, ?)"
+SCAN = (
+    "SELECT moderator_id, action, COUNT(*) FROM logs WHERE timestamp >= date('now', ?) "
+    "GROUP BY moderator_id, action"
+)
+ROLLUP = (
+    "SELECT moderator_id, action, SUM(count) FROM modstats_daily WHERE guild_id = ? AND day >= date('now', ?) "
+    "GROUP BY moderator_id, action"
+)
+
+
+def rows(count, rng):
+    now = datetime.now(timezone.utc)
+    for _ in range(count):
+        stamp = now - timedelta(seconds=rng.uniform(0, 365 * 86400))
+        yield (
+            GUILD_ID,
+            str(rng.randrange(10**17, 10**18)),
+            rng.choice(ACTIONS),
+            "Raid participation",
+            rng.choice(MODERATORS),
+            stamp.strftime("%Y-%m-%d %H:%M:%S"),
+        )
+
+
+def fill(conn, count, rng):
+    """Appends rows until logs holds `count` rows; returns the insert time per row in microseconds."""
+    have = conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+    if count <= have:
+        return 0.0
+    started = time.perf_counter()
+    conn.execute("BEGIN")
+    conn.executemany(INSERT, rows(count - have, rng))
+    conn.execute("COMMIT")
+    return (time.perf_counter() - started) / (count - have) * 1e6
+
+
+def timed(conn, sql, params, repeats):
+    samples = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), sorted(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated logs table sizes")
+    parser.add_argument("--days", type=int, default=30, help="Stats window in days")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    since = f"-{args.days - 1} days"
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "moderation.db"), isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        create_schema(conn)
+
+        print(f"{args.days}-day window, median of {args.repeats} runs")
+        print(f"{'rows':>10}{'insert us/row':>15}{'before ms':>12}{'after ms':>12}{'rollup rows':>13}{'match':>7}")
+        for size in sizes:
+            insert_cost = fill(conn, size, rng)
+            scan_ms, scan_result = timed(conn, SCAN, (since,), args.repeats)
+            rollup_ms, rollup_result = timed(conn, ROLLUP, (GUILD_ID, since), args.repeats)
+            rollup_rows = conn.execute("SELECT COUNT(*) FROM modstats_daily").fetchone()[0]
+            match = "yes" if scan_result == rollup_result else "no"
+            print(f"{size:>10}{insert_cost:>15.1f}{scan_ms:>12.2f}{rollup_ms:>12.2f}{rollup_rows:>13}{match:>7}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Updater benchmark.
+
+Serves a fake release folder (60 files by default) from a local HTTP server that
+adds a fixed per-request latency, then measures:
+
+  legacy     serial download of every file (what download_github_folder does)
+  manifest   updater.update_folder with 1 changed file and with 50 changed files
+
+Usage: python benchmarks/bench_updater.py [--files 60] [--latency 0.05]
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "botcodeupdate"))
+
+import updater  # noqa: E402
+
+
+class SlowHandler(http.server.SimpleHTTPRequestHandler):
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def write_release(folder, count, generation):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(folder, f"module_{i:03}.py"), "w") as f:
+            f.write(f"# generation {generation.get(i, 0)}\n" + "x = 1\n" * 2000)
+
+
+def legacy_download(base_url, remote_dir, dest):
+    for name in sorted(os.listdir(remote_dir)):
+        if name == updater.MANIFEST_NAME:
+            continue
+        r = requests.get(f"{base_url}/{name}")
+        r.raise_for_status()
+        with open(os.path.join(dest, name), "wb") as f:
+            f.write(r.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every HTTP request")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    remote = os.path.join(tmp, "remote")
+    SlowHandler.latency = args.latency
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(SlowHandler, directory=remote))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        print(f"{args.files} files, {args.latency * 1000:.0f}ms per request")
+        for changed in (1, 50):
+            local = os.path.join(tmp, f"local_{changed}")
+            write_release(local, args.files, {})
+            write_release(remote, args.files, {i: 1 for i in range(changed)})
+            with open(os.path.join(remote, updater.MANIFEST_NAME), "w") as f:
+                json.dump(updater.build_manifest(remote, "bench"), f)
+
+            legacy_dest = os.path.join(tmp, f"legacy_{changed}")
+            os.makedirs(legacy_dest)
+            started = time.perf_counter()
+            legacy_download(base_url, remote, legacy_dest)
+            legacy = time.perf_counter() - started
+
+            result = updater.update_folder(base_url, local)
+            assert len(result["changed"]) == changed
+            assert not updater.changed_files(updater.build_manifest(remote, "bench"), local)
+            print(f"{changed:>3} changed: legacy {legacy:6.2f}s   manifest {result['elapsed']:6.2f}s")
+            shutil.rmtree(remote)
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
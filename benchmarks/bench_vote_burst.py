@@ -0,0 +1,127 @@
+"""
+Session vote burst benchmark.
+
+Simulates N voters clicking the !ssv button within a few seconds against a fake
+HTTP layer that enforces Discord's per-message edit limit (5 edits per 5 seconds
+by default) and adds request latency. Compares:
+
+  before  every click awaits message.edit() before the vote is acknowledged
+  after   the click is acked immediately; label edits go through EditCoalescer
+
+Reports edits sent, 429s, failed interactions (not acked within 3 seconds),
+ack latency and when the final count became visible.
+
+Usage: python benchmarks/bench_vote_burst.py [--voters 40] [--spread 3] [--interval 2]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "botcodeupdate"))
+
+from edit_coalescer import EditCoalescer  # noqa: E402
+
+INTERACTION_DEADLINE = 3.0
+
+
+class RateLimited(Exception):
+    pass
+
+
+class FakeMessageAPI:
+    """Per-message edit bucket plus a fixed round-trip latency."""
+
+    def __init__(self, latency, limit=5, per=5.0):
+        self.latency = latency
+        self.limit = limit
+        self.per = per
+        self.edit_times = []
+        self.edit_calls = 0
+        self.rate_limited = 0
+        self.label = None
+        self.label_set_at = None
+
+    async def edit(self, label):
+        self.edit_calls += 1
+        await asyncio.sleep(self.latency)
+        now = time.perf_counter()
+        self.edit_times = [t for t in self.edit_times if now - t < self.per]
+        if len(self.edit_times) >= self.limit:
+            self.rate_limited += 1
+            raise RateLimited()
+        self.edit_times.append(now)
+        self.label = label
+        self.label_set_at = now
+
+    async def ack(self):
+        await asyncio.sleep(self.latency)
+
+
+async def run(mode, voters, spread, interval, latency):
+    api = FakeMessageAPI(latency)
+    coalescer = EditCoalescer(interval)
+    votes = set()
+    acks = []
+    failed = 0
+    started = time.perf_counter()
+
+    async def click(user_id, at):
+        nonlocal failed
+        await asyncio.sleep(at)
+        clicked = time.perf_counter()
+        votes.add(user_id)
+        try:
+            if mode == "before":
+                await api.edit(f"{len(votes)}/{voters}")
+                await api.ack()
+            else:
+                await api.ack()
+                coalescer.request("vote", lambda: api.edit(f"{len(votes)}/{voters}"))
+        except RateLimited:
+            failed += 1
+            return
+        elapsed = time.perf_counter() - clicked
+        if elapsed > INTERACTION_DEADLINE:
+            failed += 1
+        acks.append(elapsed)
+
+    rng = random.Random(1)
+    await asyncio.gather(*(click(i, rng.uniform(0, spread)) for i in range(voters)))
+    # Wait for the trailing coalesced edit
+    while coalescer._tasks:
+        await asyncio.sleep(0.05)
+
+    final_ok = api.label == f"{voters}/{voters}"
+    return {
+        "edits sent": api.edit_calls,
+        "429s": api.rate_limited,
+        "failed interactions": failed,
+        "p50 ack ms": statistics.median(acks) * 1000 if acks else float("nan"),
+        "final count shown": "yes" if final_ok else "no",
+        "final visible at s": (api.label_set_at - started) if final_ok else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--voters", type=int, default=40)
+    parser.add_argument("--spread", type=float, default=3.0, help="Seconds over which the clicks arrive")
+    parser.add_argument("--interval", type=float, default=2.0, help="Coalescing interval in seconds")
+    parser.add_argument("--latency", type=float, default=0.08, help="Fake HTTP round trip in seconds")
+    args = parser.parse_args()
+
+    results = {mode: asyncio.run(run(mode, args.voters, args.spread, args.interval, args.latency)) for mode in ("before", "after")}
+    print(f"{args.voters} voters over {args.spread:g}s, coalescing interval {args.interval:g}s")
+    print(f"{'metric':<22}{'before':>10}{'after':>10}")
+    for metric in results["before"]:
+        row = [results[mode][metric] for mode in ("before", "after")]
+        cells = "".join(f"{v:>10.1f}" if isinstance(v, float) else f"{v:>10}" for v in row)
+        print(f"{metric:<22}{cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""
+In-process stand-ins for the Discord REST API and gateway, used by bench_load.py.
+
+FakeDiscord answers every REST request the cogs make (bot HTTP client and
+interaction webhooks) with a plausible payload after a simulated round trip, and
+enforces per-route and global rate limits. A request over a limit gets a simulated
+429: the same warning discord.py logs is emitted on its logger (so perf.py counts
+it against the handler), then the request sleeps for retry_after and is retried.
+
+FakeGateway feeds gateway events (READY, GUILD_CREATE, MESSAGE_CREATE,
+INTERACTION_CREATE, CHANNEL_CREATE/DELETE) straight into the bot's ConnectionState
+parsers, exactly as the websocket would after decoding them.
+
+install() patches discord.py at class level. It must run before bot_main is
+imported: perf.install() wraps whatever request functions exist at that point.
+
+Limits are fixed windows per route and major parameter. discord.py learns the real
+buckets from response headers and waits pre-emptively; the fake sends no headers,
+so its 429 counts are an upper bound of what a live bot would see.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from datetime import datetime, timezone
+
+from discord import AutoShardedClient
+from discord.http import HTTPClient, Route
+from discord.webhook.async_ import AsyncWebhookAdapter
+
+log = logging.getLogger(__name__)
+http_log = logging.getLogger("discord.http")
+webhook_log = logging.getLogger("discord.webhook.async_")
+
+DISCORD_EPOCH = 1420070400000
+
+# The fake guild, using the IDs hardcoded in the cogs
+GUILD_ID = 1342600000000000001
+BOT_ID = 1342600000000000002
+OWNER_ID = 1237471534541439068
+GENERAL_CHANNEL_ID = 1342600000000000003
+TICKET_CATEGORY_ID = 1343649889220952064
+TICKET_LOG_CHANNEL_ID = 1343648011854545009
+SUPPORT_CHANNEL_ID = 1342668753183440927
+MODERATOR_ROLE_ID = 1342611104249024512
+SESSIONS_ROLE_ID = 1342612650571599922
+ROLES = {
+    "Moderator": MODERATOR_ROLE_ID,
+    "Sessions": SESSIONS_ROLE_ID,
+    "General Support": 1342611034116198420,
+    "Reports A": 1342610501305372794,
+    "Reports B": 1342610409525608479,
+}
+
+# (method, path) -> (requests, window seconds). Discord does not publish its limits;
+# these are the values its rate-limit headers report for these routes.
+ROUTE_LIMITS = {
+    ("POST", "/channels/{channel_id}/messages"): (5, 5.0),
+    ("PATCH", "/channels/{channel_id}/messages/{message_id}"): (5, 5.0),
+    ("DELETE", "/channels/{channel_id}/messages/{message_id}"): (5, 1.0),
+    ("POST", "/guilds/{guild_id}/channels"): (5, 5.0),
+    ("DELETE", "/channels/{channel_id}"): (5, 5.0),
+    ("DELETE", "/guilds/{guild_id}/members/{user_id}"): (5, 1.0),
+    ("PUT", "/guilds/{guild_id}/bans/{user_id}"): (5, 1.0),
+    ("POST", "/users/@me/channels"): (5, 5.0),
+}
+DEFAULT_LIMIT = (50, 1.0)
+# Bot-wide limit; interaction callbacks and webhook follow-ups are exempt
+GLOBAL_LIMIT = (50, 1.0)
+# Interactions not acknowledged within this many seconds fail on the user's side
+INTERACTION_DEADLINE = 3.0
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def user_payload(user_id, name=None, bot=False):
+    return {
+        "id": str(user_id),
+        "username": name or f"user{user_id % 100000}",
+        "global_name": None,
+        "discriminator": "0",
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def member_payload(user_id, role_ids=(), name=None, bot=False):
+    return {
+        "user": user_payload(user_id, name, bot),
+        "roles": [str(role_id) for role_id in role_ids],
+        "joined_at": now_iso(),
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def channel_payload(channel_id, name, channel_type=0, parent_id=None, topic=None, position=0):
+    return {
+        "id": str(channel_id),
+        "guild_id": str(GUILD_ID),
+        "type": channel_type,
+        "name": name,
+        "position": position,
+        "parent_id": str(parent_id) if parent_id else None,
+        "topic": topic,
+        "nsfw": False,
+        "permission_overwrites": [],
+    }
+
+
+def guild_payload(members=()):
+    roles = [{"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0, "color": 0}]
+    roles += [
+        {"id": str(role_id), "name": name, "permissions": "0", "position": position, "color": 0}
+        for position, (name, role_id) in enumerate(ROLES.items(), 1)
+    ]
+    channels = [
+        channel_payload(GENERAL_CHANNEL_ID, "general", position=0),
+        channel_payload(SUPPORT_CHANNEL_ID, "support", position=1),
+        channel_payload(TICKET_LOG_CHANNEL_ID, "ticket-logs", position=2),
+        channel_payload(TICKET_CATEGORY_ID, "Tickets", channel_type=4, position=3),
+    ]
+    return {
+        "id": str(GUILD_ID),
+        "name": "Load Test",
+        "owner_id": str(OWNER_ID),
+        "roles": roles,
+        "channels": channels,
+        "threads": [],
+        "members": [member_payload(BOT_ID, name="bot", bot=True), *members],
+        "member_count": len(members) + 1,
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "unavailable": False,
+        "large": False,
+    }
+
+
+class FakeDiscord:
+    """REST stand-in: routes, fixed-window rate limits, simulated latency and 429s."""
+
+    def __init__(self, latency=0.05, seed=0):
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.gateway = None
+        self._ids = itertools.count()
+        self._windows = {}  # bucket key -> [window end, requests left]
+        self.messages = {}  # message_id -> payload
+        self.channels = {}  # channel_id -> payload, for channels created through the API
+        self.interactions = {}  # interaction_id -> time it was dispatched
+        self.in_flight = 0
+        self.last_activity = time.monotonic()
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.requests = 0
+        self.rate_limited = 0
+        self.routes = {}  # "METHOD path" -> requests
+        self.acks = []  # Seconds from INTERACTION_CREATE to the callback reaching Discord
+        self.late_acks = 0
+
+    def snowflake(self):
+        return ((int(time.time() * 1000) - DISCORD_EPOCH) << 22) | (next(self._ids) & 0x3FFFFF)
+
+    # --------------------------
+    # Rate limits
+    # --------------------------
+    def _take(self, key, limit):
+        """Takes one request from a window; returns the seconds to wait if it is exhausted."""
+        count, per = limit
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is None or now >= window[0]:
+            window = self._windows[key] = [now + per, count]
+        if window[1] <= 0:
+            return window[0] - now
+        window[1] -= 1
+        return None
+
+    def _check_limits(self, route):
+        exempt = route.path.startswith(("/interactions/", "/webhooks/"))
+        if not exempt:
+            retry_after = self._take("global", GLOBAL_LIMIT)
+            if retry_after is not None:
+                return retry_after, True
+        limit = ROUTE_LIMITS.get((route.method, route.path), DEFAULT_LIMIT)
+        return self._take(f"{route.key}:{route.major_parameters}", limit), False
+
+    # --------------------------
+    # Requests
+    # --------------------------
+    async def request(self, route, payload, multipart, logger):
+        if payload is None and multipart:
+            payload = json.loads(multipart[0]["value"])
+        self.requests += 1
+        self.routes[route.key] = self.routes.get(route.key, 0) + 1
+        self.in_flight += 1
+        try:
+            while True:
+                await asyncio.sleep(self.latency * self.rng.uniform(0.5, 1.5))
+                retry_after, is_global = self._check_limits(route)
+                if retry_after is None:
+                    break
+                self.rate_limited += 1
+                logger.warning(
+                    "We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.",
+                    route.method, route.url, retry_after
+                )
+                if is_global:
+                    logger.warning("Global rate limit has been hit. Retrying in %.2f seconds.", retry_after)
+                await asyncio.sleep(retry_after)
+            return self.respond(route, payload or {})
+        finally:
+            self.in_flight -= 1
+            self.last_activity = time.monotonic()
+
+    def respond(self, route, payload):
+        params = dict(
+            (segment[1:-1], value)
+            for segment, value in zip(route.path.split("/"), route.url[len(Route.BASE):].split("/"))
+            if segment.startswith("{")
+        )
+        handler = self.ROUTES.get((route.method, route.path))
+        if handler is None:
+            log.debug(f"Unhandled route {route.key}; answering 204")
+            return None
+        return handler(self, payload, **params)
+
+    async def idle(self, quiet=0.3, timeout=60.0):
+        """Waits until no request is in flight and none has finished for `quiet` seconds."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.in_flight == 0 and time.monotonic() - self.last_activity >= quiet:
+                return True
+            await asyncio.sleep(quiet / 5)
+        return False
+
+    # --------------------------
+    # Route handlers
+    # --------------------------
+    def get_me(self, payload):
+        return user_payload(BOT_ID, "bot", bot=True)
+
+    def get_application(self, payload):
+        return {
+            "id": str(BOT_ID),
+            "name": "bot",
+            "description": "",
+            "icon": None,
+            "bot_public": False,
+            "bot_require_code_grant": False,
+            "owner": user_payload(OWNER_ID, "owner"),
+            "verify_key": "0" * 64,
+            "flags": 0,
+        }
+
+    def message(self, channel_id, payload, message_id=None, author=None):
+        message_id = message_id or self.snowflake()
+        stored = self.messages.get(int(message_id), {})
+        message = {
+            "id": str(message_id),
+            "channel_id": str(channel_id),
+            "guild_id": str(GUILD_ID),
+            "author": author or stored.get("author") or user_payload(BOT_ID, "bot", bot=True),
+            "content": payload.get("content", stored.get("content", "")) or "",
+            "timestamp": stored.get("timestamp") or now_iso(),
+            "edited_timestamp": now_iso() if stored else None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": payload.get("embeds", stored.get("embeds", [])) or [],
+            "components": payload.get("components", stored.get("components", [])) or [],
+            "pinned": False,
+            "type": 0,
+        }
+        self.messages[int(message_id)] = message
+        return message
+
+    def create_message(self, payload, channel_id):
+        return self.message(channel_id, payload)
+
+    def edit_message(self, payload, channel_id, message_id):
+        return self.message(channel_id, payload, message_id)
+
+    def delete_message(self, payload, channel_id, message_id):
+        self.messages.pop(int(message_id), None)
+
+    def message_history(self, payload, channel_id):
+        return []
+
+    def create_channel(self, payload, guild_id):
+        channel = channel_payload(
+            self.snowflake(), payload.get("name", "channel"), payload.get("type", 0),
+            payload.get("parent_id"), payload.get("topic")
+        )
+        self.channels[int(channel["id"])] = channel
+        if self.gateway:
+            self.gateway.emit("CHANNEL_CREATE", channel)
+        return channel
+
+    def delete_channel(self, payload, channel_id):
+        channel = self.channels.pop(int(channel_id), None) or channel_payload(channel_id, "deleted")
+        if self.gateway:
+            self.gateway.emit("CHANNEL_DELETE", channel)
+        return channel
+
+    def get_channel(self, payload, channel_id):
+        return self.channels.get(int(channel_id)) or channel_payload(channel_id, "channel")
+
+    def bulk_ban(self, payload, guild_id):
+        return {"banned_users": payload.get("user_ids", []), "failed_users": []}
+
+    def get_member(self, payload, guild_id, user_id):
+        return member_payload(int(user_id))
+
+    def edit_member(self, payload, guild_id, user_id):
+        return member_payload(int(user_id))
+
+    def create_dm(self, payload):
+        recipient = int(payload["recipient_id"])
+        return {"id": str(self.snowflake()), "type": 1, "recipients": [user_payload(recipient)]}
+
+    def interaction_callback(self, payload, webhook_id, webhook_token):
+        sent = self.interactions.pop(int(webhook_id), None)
+        if sent is not None:
+            waited = time.perf_counter() - sent
+            self.acks.append(waited)
+            if waited > INTERACTION_DEADLINE:
+                self.late_acks += 1
+        return {
+            "interaction": {"id": webhook_id, "type": 3},
+            "resource": {"type": payload.get("type", 4)},
+        }
+
+    def followup(self, payload, webhook_id, webhook_token):
+        return self.message(GENERAL_CHANNEL_ID, payload.get("data", payload))
+
+    def edit_original(self, payload, webhook_id, webhook_token):
+        return self.message(GENERAL_CHANNEL_ID, payload)
+
+    ROUTES = {
+        ("GET", "/users/@me"): get_me,
+        ("GET", "/oauth2/applications/@me"): get_application,
+        ("POST", "/channels/{channel_id}/messages"): create_message,
+        ("PATCH", "/channels/{channel_id}/messages/{message_id}"): edit_message,
+        ("DELETE", "/channels/{channel_id}/messages/{message_id}"): delete_message,
+        ("GET", "/channels/{channel_id}/messages"): message_history,
+        ("GET", "/channels/{channel_id}"): get_channel,
+        ("DELETE", "/channels/{channel_id}"): delete_channel,
+        ("POST", "/guilds/{guild_id}/channels"): create_channel,
+        ("POST", "/guilds/{guild_id}/bulk-ban"): bulk_ban,
+        ("GET", "/guilds/{guild_id}/members/{user_id}"): get_member,
+        ("PATCH", "/guilds/{guild_id}/members/{user_id}"): edit_member,
+        ("POST", "/users/@me/channels"): create_dm,
+        ("POST", "/interactions/{webhook_id}/{webhook_token}/callback"): interaction_callback,
+        ("POST", "/webhooks/{webhook_id}/{webhook_token}"): followup,
+        ("PATCH", "/webhooks/{webhook_id}/{webhook_token}/messages/@original"): edit_original,
+    }
+
+
+class FakeGateway:
+    """Feeds gateway events into a bot's connection state."""
+
+    def __init__(self, bot, fake, members=()):
+        self.bot = bot
+        self.fake = fake
+        self.members = list(members)
+        fake.gateway = self
+        # discord.py waits this long after the last GUILD_CREATE before dispatching on_ready
+        bot._connection.guild_ready_timeout = 0.01
+        if isinstance(bot, AutoShardedClient):
+            # What launch_shards would set up: a single shard, 0
+            bot.shard_count = bot._connection.shard_count = 1
+            bot._connection.shard_ids = [0]
+
+    def emit(self, event, data):
+        self.bot._connection.parsers[event](data)
+
+    async def connect(self):
+        """One (re)connect: READY with the guild unavailable, then its GUILD_CREATE. Returns once on_ready ran."""
+        ready = asyncio.ensure_future(self.bot.wait_for("ready"))
+        self.emit("READY", {
+            "v": 10,
+            "user": user_payload(BOT_ID, "bot", bot=True),
+            "guilds": [{"id": str(GUILD_ID), "unavailable": True}],
+            "session_id": f"session{self.fake.snowflake()}",
+            "resume_gateway_url": "wss://gateway.invalid",
+            "application": {"id": str(BOT_ID), "flags": 0},
+            "shard": [0, 1],
+        })
+        self.emit("GUILD_CREATE", guild_payload(self.members))
+        await ready
+
+    def message(self, author_id, content, role_ids=(), channel_id=GENERAL_CHANNEL_ID):
+        """Dispatches a MESSAGE_CREATE from a guild member; returns the message ID."""
+        message_id = self.fake.snowflake()
+        data = self.fake.message(channel_id, {"content": content}, message_id, author=user_payload(author_id))
+        self.emit("MESSAGE_CREATE", {**data, "member": {
+            key: value for key, value in member_payload(author_id, role_ids).items() if key != "user"
+        }})
+        return message_id
+
+    def click(self, user_id, custom_id, message_id, channel_id, role_ids=()):
+        """Dispatches a button INTERACTION_CREATE on a stored message; returns the interaction ID."""
+        interaction_id = self.fake.snowflake()
+        message = self.fake.messages.get(message_id) or self.fake.message(channel_id, {}, message_id)
+        self.fake.interactions[interaction_id] = time.perf_counter()
+        self.emit("INTERACTION_CREATE", {
+            "id": str(interaction_id),
+            "application_id": str(BOT_ID),
+            "type": 3,
+            "token": f"token{interaction_id}",
+            "version": 1,
+            "guild_id": str(GUILD_ID),
+            "channel_id": str(channel_id),
+            "channel": {"id": str(channel_id), "type": 0},
+            "member": member_payload(user_id, role_ids),
+            "message": message,
+            "data": {"custom_id": custom_id, "component_type": 2},
+            "app_permissions": "0",
+            "attachment_size_limit": 8 * 1024 * 1024,
+            "locale": "en-US",
+        })
+        return interaction_id
+
+
+def install(fake):
+    """Routes discord.py's bot HTTP client and webhook adapter to `fake`."""
+
+    async def http_request(http, route, *, files=None, form=None, **kwargs):
+        return await fake.request(route, kwargs.get("json"), form, http_log)
+
+    async def webhook_request(adapter, route, session, *, payload=None, multipart=None, **kwargs):
+        return await fake.request(route, payload, multipart, webhook_log)
+
+    HTTPClient.request = http_request
+    AsyncWebhookAdapter.request = webhook_request
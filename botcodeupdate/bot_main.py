@@ -2,17 +2,41 @@ import discord
 from discord.ext import commands
 import os
 import logging
+import logging.handlers
+import atexit
+import gzip
+import queue
 import asyncio
 import importlib
+import math
+import json
+import ast
+import sys
 import threading
 import time
 import requests
 import shutil
+import updater
+import outbound
+import perf
+import watchdog
+from bot_process import EXIT_CRASH, EXIT_FATAL, EXIT_OK
+from guild_config import get_config
+from scheduler import get_scheduler
 
 # --------------------------
 # Global Bot Status
 # --------------------------
 bot_current_status = "Offline"  # Shared variable for status ("Offline", "Starting", "Online")
+# Connection to supervisor.py when the bot runs as its child process (see run_supervised)
+supervisor_link = None
+
+def set_status(status):
+    """Updates bot_current_status and, when running under supervisor.py, reports it there."""
+    global bot_current_status
+    bot_current_status = status
+    if supervisor_link:
+        supervisor_link.send({"event": "status", "status": status})
 
 # --------------------------
 # Constants for Updater
@@ -22,16 +46,30 @@ REPO_VERSION_URL = "https://raw.githubusercontent.com/Gauntbadjesse/Holly-Wood-M
 REPO_OWNER = "Gauntbadjesse"
 REPO_NAME = "Holly-Wood-MGMT"
 REPO_FOLDER = "botcodeupdate"
+# Raw base URL of the release folder; it publishes the updater manifest (manifest.json)
+REPO_RAW_FOLDER_URL = f"https://raw.githubusercontent.com/{REPO_OWNER}/{REPO_NAME}/main/{REPO_FOLDER}"
 
 # --------------------------
 # Logging Setup
 # --------------------------
-logging.basicConfig(
-    level=logging.DEBUG,  # Log all levels (DEBUG, INFO, etc.)
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename='bot.log',
-    filemode='w'  # Overwrite log file
-)
+# Everything (bot_main, every cog, discord.py) logs through one QueueHandler; a QueueListener
+# thread does the file and console writes so disk I/O never runs on the event loop.
+LOG_FILE = "bot.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Rotate bot.log at 5 MB...
+LOG_BACKUP_COUNT = 5  # ...and keep 5 gzip-compressed old files (bot.log.1.gz, ...)
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+# Per-module log levels; cogs log to logging.getLogger(__name__)
+LOG_LEVELS = {
+    "bot": "DEBUG",
+    "discord": "INFO",
+    "sessions": "INFO",
+    "moderation": "INFO",
+    "tickets": "INFO",
+    "listener": "INFO",
+    "embed_command": "INFO",
+    "diagnostics": "INFO",
+    "watchdog": "INFO",
+}
 
 # Terminal colors for log output
 class Color:
@@ -43,56 +81,245 @@ class Color:
     FAIL = '\033[91m'
     ENDC = '\033[0m'
 
+class ColorFormatter(logging.Formatter):
+    """Console format: colored [LEVEL] tag followed by the message."""
+    COLORS = {
+        "DEBUG": Color.OKBLUE,
+        "INFO": Color.OKGREEN,
+        "WARNING": Color.WARNING,
+        "ERROR": Color.FAIL,
+        "CRITICAL": Color.HEADER,
+    }
+
+    def format(self, record):
+        color = self.COLORS.get(record.levelname, "")
+        message = f"{color}[{record.levelname}]{Color.ENDC} {record.getMessage()}"
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        return message
+
+class ConsoleFilter(logging.Filter):
+    """The console shows everything from bot_main and only warnings and errors from elsewhere."""
+
+    def filter(self, record):
+        return record.name == "bot" or record.levelno >= logging.WARNING
+
+def gzip_rotator(source, dest):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+def setup_logging():
+    """Routes all logging through a queue to a rotating, compressed bot.log and the colored console."""
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+    file_handler.namer = lambda name: f"{name}.gz"
+    file_handler.rotator = gzip_rotator
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(ColorFormatter())
+    console_handler.addFilter(ConsoleFilter())
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.DEBUG)
+    for name, level in LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+log_listener = setup_logging()
+log = logging.getLogger("bot")
+
 def color_log(level, message):
-    if level == "DEBUG":
-        print(f"{Color.OKBLUE}[DEBUG]{Color.ENDC} {message}")
-    elif level == "INFO":
-        print(f"{Color.OKGREEN}[INFO]{Color.ENDC} {message}")
-    elif level == "WARNING":
-        print(f"{Color.WARNING}[WARNING]{Color.ENDC} {message}")
-    elif level == "ERROR":
-        print(f"{Color.FAIL}[ERROR]{Color.ENDC} {message}")
-    elif level == "CRITICAL":
-        print(f"{Color.HEADER}[CRITICAL]{Color.ENDC} {message}")
+    """Logs a bot_main message; it is shown in color on the console and written to bot.log."""
+    log.log(logging.getLevelName(level), message)
 
 # --------------------------
 # Load the Bot Token
 # --------------------------
-try:
-    with open("token.txt", "r") as file:
-        TOKEN = file.read().strip()
-        color_log("INFO", "Bot token successfully loaded.")
-except FileNotFoundError:
-    color_log("ERROR", "'token.txt' not found. Please create the file and add your bot token.")
-    exit()
+def load_token():
+    """Reads token.txt at start-up; returns None if it is missing (read here so importing bot_main needs no token)."""
+    try:
+        with open("token.txt", "r") as file:
+            token = file.read().strip()
+            color_log("INFO", "Bot token successfully loaded.")
+            return token
+    except FileNotFoundError:
+        color_log("ERROR", "'token.txt' not found. Please create the file and add your bot token.")
+        return None
 
 # --------------------------
 # Initialize the Bot Instance
 # --------------------------
 intents = discord.Intents.default()
 intents.message_content = True  # Required for reading message content
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Every shard runs in this process. None lets Discord recommend the count (about one shard per
+# 1000 guilds); with a single shard the bot behaves exactly like a plain commands.Bot.
+SHARD_COUNT = None
+bot = commands.AutoShardedBot(command_prefix="!", intents=intents, shard_count=SHARD_COUNT)
+# Per-command/component latency, REST-call and 429 counters (see !perf)
+perf.get_perf().install(bot)
+
+# --------------------------
+# Extension Manifest
+# --------------------------
+# Cogs loaded at startup. Every other .py in this folder is a shared helper module.
+# The cogs do not depend on each other, so their setups run concurrently.
+EXTENSIONS = ["diagnostics", "embed_command", "listener", "moderation", "ping", "sessions", "settings", "tickets"]
+# Written on every start so startup regressions can be tracked over time
+STARTUP_REPORT_FILE = "startup_report.json"
+startup_report = {}
 
 # --------------------------
 # Dynamically Load Commands (Cogs)
 # --------------------------
+# Module name -> SHA-256 of the source that is currently loaded, for every module in this folder.
+# Used to work out which cogs an update actually touched.
+module_hashes = {}
+
+def module_path(module_name):
+    return os.path.join(os.path.dirname(__file__), f"{module_name}.py")
+
+def is_stateful(path):
+    """
+    A helper that rebinds module globals (a `global` statement, as the get_x() singletons use)
+    keeps live state; reloading it would start a second copy next to the one the cogs still hold.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    return any(isinstance(node, ast.Global) for node in ast.walk(tree))
+
+def is_extension(path):
+    """A cog module is one with a top-level setup() function; everything else is a shared helper."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    return any(
+        isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "setup"
+        for node in tree.body
+    )
+
+async def load_extension_timed(module_name, report):
+    """Loads (or, if its file changed, reloads) one cog and records its import and setup times."""
+    path = module_path(module_name)
+    try:
+        if module_name in bot.extensions:
+            # Restart inside the same process: only reload cogs whose file changed.
+            if module_hashes.get(module_name) != updater.sha256_file(path):
+                started = time.perf_counter()
+                await bot.reload_extension(module_name)
+                report["setup_ms"][module_name] = round((time.perf_counter() - started) * 1000, 1)
+                color_log("INFO", f"Reloaded: {module_name}")
+        else:
+            # Import the module (and the helpers it pulls in) in a worker thread so compiling and
+            # running module code does not block the loop; load_extension then reuses the cached imports.
+            started = time.perf_counter()
+            await asyncio.to_thread(importlib.import_module, module_name)
+            imported = time.perf_counter()
+            await bot.load_extension(module_name)
+            report["import_ms"][module_name] = round((imported - started) * 1000, 1)
+            report["setup_ms"][module_name] = round((time.perf_counter() - imported) * 1000, 1)
+            color_log("INFO", f"Loaded: {module_name}")
+        module_hashes[module_name] = updater.sha256_file(path)
+    except Exception:
+        import traceback
+        detailed_error = traceback.format_exc()
+        report["failed"].append(module_name)
+        color_log("ERROR", f"Failed to load: {module_name}\nDetails:\n{detailed_error}")
+
 async def load_commands():
+    started = time.perf_counter()
+    # Per-guild settings are read once up front; every cog resolves its role and channel IDs through them
+    await get_config().load()
     current_directory = os.path.dirname(__file__)  # This is the botcode folder.
-    for file in os.listdir(current_directory):
-        if file.endswith(".py") and file != os.path.basename(__file__):
-            module_name = file[:-3]  # Remove .py extension.
+    module_hashes.setdefault(os.path.basename(__file__)[:-3], updater.sha256_file(__file__))
+    for file in sorted(os.listdir(current_directory)):
+        module_name = file[:-3]
+        if file.endswith(".py") and file != os.path.basename(__file__) and module_name not in EXTENSIONS:
+            path = module_path(module_name)
+            module_hashes[module_name] = updater.sha256_file(path)
+            if is_extension(path):
+                color_log("WARNING", f"Skipped: {module_name} (has a setup function but is not listed in EXTENSIONS)")
+
+    report = {"import_ms": {}, "setup_ms": {}, "failed": []}
+    await asyncio.gather(*(load_extension_timed(name, report) for name in EXTENSIONS))
+    report["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    startup_report.update(report)
+    slowest = max(report["setup_ms"].items(), key=lambda item: item[1], default=None)
+    color_log(
+        "INFO",
+        f"Loaded {len(EXTENSIONS) - len(report['failed'])}/{len(EXTENSIONS)} cog(s) in {report['load_ms']:.0f}ms"
+        + (f" (slowest setup: {slowest[0]} {slowest[1]:.0f}ms)" if slowest else "")
+    )
+
+def write_startup_report():
+    with open(STARTUP_REPORT_FILE, "w") as f:
+        json.dump(startup_report, f, indent=2)
+
+def changed_modules():
+    """Modules in this folder whose file no longer matches the hash of the loaded code."""
+    current_directory = os.path.dirname(__file__)
+    changed = []
+    for file in sorted(os.listdir(current_directory)):
+        if file.endswith(".py"):
+            module_name = file[:-3]
+            if module_hashes.get(module_name) != updater.sha256_file(module_path(module_name)):
+                changed.append(module_name)
+    return changed
+
+async def hot_reload():
+    """
+    Applies changed files inside the running bot without reconnecting to the gateway.
+    Changed helper modules are reloaded first (and then every cog, since any of them may import
+    the helper); otherwise only the changed cogs are reloaded. A cog whose setup() fails keeps
+    running its previous version (reload_extension rolls back).
+    Returns (reloaded, failed, restart_required); a restart is required if bot_main.py or a
+    stateful helper (scheduler, outbound queue, perf, watchdog, settings cache, ...) changed.
+    """
+    changed = changed_modules()
+    if os.path.basename(__file__)[:-3] in changed:
+        return [], [], True
+
+    helpers = [name for name in changed if name not in EXTENSIONS]
+    stateful = [name for name in helpers if name in sys.modules and is_stateful(module_path(name))]
+    if stateful:
+        color_log("INFO", f"Stateful helper(s) changed: {', '.join(stateful)}. A restart is required.")
+        return [], [], True
+    for name in helpers:
+        if name in sys.modules:
             try:
-                module = importlib.import_module(module_name)
-                if hasattr(module, "setup"):
-                    await module.setup(bot)
-                    color_log("INFO", f"Loaded: {module_name}")
-                else:
-                    color_log("WARNING", f"Skipped: {module_name} (No setup function found)")
+                importlib.reload(sys.modules[name])
             except Exception as e:
-                import traceback
-                detailed_error = traceback.format_exc()
-                logging.error(f"Failed to load {module_name}: {e}")
-                color_log("ERROR", f"Failed to load: {module_name}\nDetails:\n{detailed_error}")
+                color_log("ERROR", f"Failed to reload helper module {name}: {e}")
+                return [], [name], True
+        module_hashes[name] = updater.sha256_file(module_path(name))
+
+    targets = set(changed) & set(EXTENSIONS)
+    if helpers:
+        targets |= set(bot.extensions)
+
+    reloaded, failed = [], []
+    for name in sorted(targets):
+        try:
+            if name in bot.extensions:
+                await bot.reload_extension(name)
+            else:
+                await bot.load_extension(name)
+            module_hashes[name] = updater.sha256_file(module_path(name))
+            reloaded.append(name)
+            color_log("INFO", f"Reloaded: {name}")
+        except Exception as e:
+            failed.append(name)
+            color_log("ERROR", f"Failed to reload {name}, previous version kept: {e}")
+    return reloaded, failed, False
 
 # --------------------------
 # Helper: Download GitHub Folder
@@ -122,9 +349,13 @@ def download_github_folder(repo_owner, repo_name, folder_path, dest_dir, branch=
 # --------------------------
 async def check_for_updates():
     """
-    Checks for a new version on GitHub. If found, it downloads the updated folder (named "botcodeupdate")
-    into a temporary folder, backs up the current "botcode", renames the new folder to "botcode",
-    restores token.txt if it was preserved, and updates version.txt in the root.
+    Checks for a new version on GitHub. If found, it fetches the release manifest and downloads only the
+    changed files (see updater.py), verifying their hashes before swapping them in, then updates version.txt
+    in the root. Releases without a manifest fall back to downloading the whole folder (named "botcodeupdate")
+    into a temporary folder, backing up the current "botcode", renaming the new folder to "botcode" and
+    restoring token.txt if it was preserved.
+    Returns (status message, incremental) where incremental is True when files were updated in place
+    and can be hot-reloaded.
     """
     def run_update():
         try:
@@ -138,13 +369,22 @@ async def check_for_updates():
             root_dir = os.path.dirname(current_botcode_dir)
             local_version_path = os.path.join(root_dir, "version.txt")
             if not os.path.exists(local_version_path):
-                return "Local version file not found in the root directory."
+                return "Local version file not found in the root directory.", False
             with open(local_version_path, "r") as f:
                 local_version = f.read().strip()
 
             if repo_version == local_version:
-                return "Bot is already up-to-date."
+                return "Bot is already up-to-date.", False
+
+            # Preferred path: download only the files whose hashes changed, verify and swap them in place.
+            result = updater.update_folder(REPO_RAW_FOLDER_URL, current_botcode_dir)
+            if result is not None:
+                with open(local_version_path, "w") as f:
+                    f.write(repo_version)
+                color_log("INFO", f"Updated {len(result['changed'])} file(s) in {result['elapsed']:.2f}s: {', '.join(result['changed'])}")
+                return f"Bot has been updated successfully ({len(result['changed'])} file(s) changed).", True
 
+            # Fallback for releases without a manifest: download the whole folder.
             # Prepare a temporary folder for the update.
             temp_folder = os.path.join(root_dir, "botcode_temp")
             if os.path.exists(temp_folder):
@@ -184,9 +424,9 @@ async def check_for_updates():
             with open(local_version_path, "w") as f:
                 f.write(repo_version)
 
-            return "Bot has been updated successfully."
+            return "Bot has been updated successfully.", False
         except Exception as e:
-            return f"Update failed: {e}"
+            return f"Update failed: {e}", False
 
     result = await asyncio.to_thread(run_update)
     return result
@@ -196,46 +436,112 @@ async def check_for_updates():
 # --------------------------
 @bot.event
 async def on_ready():
-    global bot_current_status
-    bot_current_status = "Online"
+    set_status("Online")
     color_log("INFO", f"Bot is online! Username: {bot.user}")
-    logging.info(f"Bot is online. Username: {bot.user}")
+    # Scheduled actions (including those that came due while offline) need the connection and caches
+    get_scheduler().release()
+    # on_ready fires again on every reconnect; only the first one after a start is time-to-ready
+    if "started_at" in startup_report and "time_to_ready_ms" not in startup_report:
+        startup_report["time_to_ready_ms"] = round((time.perf_counter() - startup_report.pop("_clock")) * 1000, 1)
+        startup_report["connect_ms"] = round(startup_report["time_to_ready_ms"] - startup_report.get("load_ms", 0), 1)
+        color_log(
+            "INFO",
+            f"Ready {startup_report['time_to_ready_ms']:.0f}ms after start "
+            f"(cogs {startup_report.get('load_ms', 0):.0f}ms, gateway {startup_report['connect_ms']:.0f}ms)."
+        )
+        try:
+            await asyncio.to_thread(write_startup_report)
+        except OSError as e:
+            color_log("WARNING", f"Could not write {STARTUP_REPORT_FILE}: {e}")
+
+@bot.event
+async def on_shard_ready(shard_id):
+    color_log("INFO", f"Shard {shard_id + 1}/{bot.shard_count} is ready ({sum(1 for guild in bot.guilds if guild.shard_id == shard_id)} guild(s)).")
 
 @bot.event
 async def on_command_error(ctx, error):
-    logging.error(f"Command Error: {error}")
     color_log("ERROR", f"An error occurred in command '{ctx.command}': {error}")
     await ctx.send(f"{Color.WARNING}An error occurred: {error}{Color.ENDC}")
 
 @bot.command(name="update")
 async def update_command(ctx):
-    # Restrict the command to a specific user ID.
-    allowed_user_id = 1237471534541439068
-    if ctx.author.id != allowed_user_id:
+    # Restrict the command to the bot owner (the bot-wide "owner" setting).
+    if not get_config().is_owner(ctx.author):
         await ctx.send("You do not have permission to run this command.")
         return
 
     await ctx.send("Checking for updates…")
-    update_status = await check_for_updates()
+    update_status, incremental = await check_for_updates()
     await ctx.send(update_status)
-    if "updated successfully" in update_status.lower():
+    if "updated successfully" not in update_status.lower():
+        return
+
+    restart_required = not incremental
+    if incremental:
+        reloaded, failed, restart_required = await hot_reload()
+        if not restart_required:
+            summary = f"Reloaded: {', '.join(reloaded) or 'nothing'}"
+            if failed:
+                summary += f"\nFailed (previous version kept): {', '.join(failed)}"
+            await ctx.send(summary)
+    if restart_required:
         await ctx.send("Restarting bot now…")
-        gui_restart_bot()
+        if supervisor_link:
+            # A new process: the supervisor stops this one and starts its warm spare
+            supervisor_link.send({"event": "restart"})
+        else:
+            # gui_restart_bot blocks until the loop has stopped, so it must not run on the loop itself
+            threading.Thread(target=gui_restart_bot, daemon=True).start()
+
+@bot.command(name="outbound")
+async def outbound_command(ctx):
+    """Shows the outbound message queue depth, counters and wait times."""
+    if not get_config().is_owner(ctx.author):
+        await ctx.send("You do not have permission to run this command.")
+        return
+
+    metrics = outbound.get_outbound().metrics()
+    embed = discord.Embed(title="Outbound Queue", color=discord.Color.blue())
+    embed.add_field(
+        name="Depth",
+        value="\n".join(f"{name}: {count}" for name, count in metrics["depth"].items()),
+        inline=True
+    )
+    embed.add_field(
+        name="Totals",
+        value="\n".join(f"{key}: {metrics[key]}" for key in ("enqueued", "sent", "failed", "retries", "dropped")),
+        inline=True
+    )
+    for name, wait in metrics["wait_ms"].items():
+        embed.add_field(
+            name=f"Wait ({name})",
+            value=f"p50 {wait['p50']:.0f}ms\np95 {wait['p95']:.0f}ms\nmax {wait['max']:.0f}ms",
+            inline=True
+        )
+    await ctx.send(embed=embed)
 
 # --------------------------
 # Main Async Function to Start the Bot
 # --------------------------
 async def main():
+    """Runs the bot until it is closed; returns False if it could not start at all (token problems)."""
+    token = load_token()
+    if not token:
+        return False
+    startup_report.clear()
+    startup_report["started_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    startup_report["_clock"] = time.perf_counter()
+    # Started first so stalls during cog loading are caught too
+    watchdog.get_watchdog().start()
     await load_commands()
     try:
         color_log("INFO", "Starting bot…")
-        await bot.start(TOKEN)
+        await bot.start(token)
     except discord.errors.LoginFailure:
         color_log("CRITICAL", "Error: Login failure! Please check your bot token.")
-        logging.critical("Login failure! Please check your bot token.")
+        return False
     except Exception as e:
         color_log("CRITICAL", f"Unexpected error occurred: {e}")
-        logging.critical(f"Unexpected error: {e}")
 
 # --------------------------
 # Global Event Loop Variable for GUI Control
@@ -246,21 +552,22 @@ bot_loop = None
 # Functions for GUI Control (Start, Stop, Restart)
 # --------------------------
 def run_bot():
-    """Run the bot in its own event loop on a separate thread."""
-    global bot_loop, bot_current_status
-    bot_current_status = "Starting"
+    """Run the bot in its own event loop (a GUI thread, or the main thread of a supervised process)."""
+    global bot_loop
+    set_status("Starting")
     bot_loop = asyncio.new_event_loop()
     asyncio.set_event_loop(bot_loop)
     try:
-        bot_loop.run_until_complete(main())
+        return bot_loop.run_until_complete(main())
     except Exception as e:
         color_log("ERROR", f"Bot encountered an error: {e}")
     finally:
         bot_loop.close()
+        set_status("Offline")
 
 def gui_start_bot():
     """Start the Discord bot from the GUI (if not already running)."""
-    global bot_loop, bot_current_status
+    global bot_loop
     if not bot_loop or not bot_loop.is_running():
         t = threading.Thread(target=run_bot, daemon=True)
         t.start()
@@ -270,12 +577,12 @@ def gui_start_bot():
 
 def gui_stop_bot():
     """Stop the bot gracefully from the GUI."""
-    global bot_loop, bot_current_status
+    global bot_loop
     if bot_loop and bot_loop.is_running():
         future = asyncio.run_coroutine_threadsafe(bot.close(), bot_loop)
         try:
             future.result()  # Wait for completion.
-            bot_current_status = "Offline"
+            set_status("Offline")
             color_log("INFO", "Bot has been stopped from GUI.")
         except Exception as e:
             color_log("ERROR", f"Error stopping bot: {e}")
@@ -288,6 +595,60 @@ def gui_restart_bot():
     time.sleep(2)
     gui_start_bot()
 
+# --------------------------
+# Supervised Mode (see supervisor.py)
+# --------------------------
+async def collect_metrics():
+    """Status and performance counters for the supervisor's metrics command."""
+    snapshot = perf.get_perf().snapshot()
+    latency = bot.latency
+    return {
+        "status": bot_current_status,
+        "guilds": len(bot.guilds),
+        "shards": bot.shard_count,
+        "latency_ms": round(latency * 1000, 1) if math.isfinite(latency) else None,
+        "rest_calls": snapshot["rest_calls"],
+        "rate_limited": snapshot["rate_limited"],
+        "handlers": snapshot["handlers"],
+        "loop_lag": watchdog.get_watchdog().snapshot(),
+        "outbound": outbound.get_outbound().metrics(),
+        "startup": {key: value for key, value in startup_report.items() if not key.startswith("_")},
+    }
+
+def run_supervised(link):
+    """
+    Runs the bot on this process's main thread for supervisor.py and returns the exit code.
+    The supervisor sends "stop" and "metrics" commands over `link`; status changes and
+    !update restarts are reported back over it.
+    """
+    global supervisor_link
+    supervisor_link = link
+    stop_requested = threading.Event()
+
+    def handle(message):
+        command = message.get("cmd")
+        loop = bot_loop
+        if command == "stop":
+            stop_requested.set()
+            # Scheduling also works on a loop that is created but not yet running
+            if loop is not None and not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(bot.close(), loop)
+        elif command == "metrics":
+            data = {"status": bot_current_status}
+            if loop is not None and loop.is_running():
+                try:
+                    data = asyncio.run_coroutine_threadsafe(collect_metrics(), loop).result(5)
+                except Exception as e:
+                    data["error"] = str(e)
+            link.send({"reply": message.get("id"), "data": data})
+
+    link.serve(handle)
+    if stop_requested.is_set():
+        return EXIT_OK
+    if run_bot() is False:
+        return EXIT_FATAL
+    return EXIT_OK if stop_requested.is_set() else EXIT_CRASH
+
 # --------------------------
 # If Run Directly, Start the Bot (For Testing)
 # --------------------------
@@ -0,0 +1,85 @@
+"""
+Entry point of the bot process started by supervisor.py.
+
+The process connects back to the supervisor, imports the heavy third-party
+packages and then waits. The supervisor keeps one such process warm as a spare,
+so a restart only pays for importing the bot's own modules and logging in, not
+for a new interpreter and the discord.py import. bot_main is imported only once
+the "run" command arrives, so a spare never holds stale bot code or opens bot.log.
+
+This module must stay light: bot_main imports it for the exit codes and the link.
+"""
+import importlib
+import os
+import sys
+import threading
+from multiprocessing.connection import Client
+
+# Exit codes understood by the supervisor
+EXIT_OK = 0  # Stopped on request
+EXIT_CRASH = 1  # Anything unexpected; restarted with backoff
+EXIT_FATAL = 3  # Restarting cannot help (missing token, login failure); left stopped
+
+# Imported while the process waits as a spare
+PRELOAD_MODULES = ("aiohttp", "discord", "discord.ext.commands", "requests")
+# Set by the supervisor for every child it starts
+PORT_ENV = "BOT_SUPERVISOR_PORT"
+KEY_ENV = "BOT_SUPERVISOR_KEY"
+
+
+class SupervisorLink:
+    """The child's end of its connection to the supervisor."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            try:
+                self.conn.send(message)
+            except (OSError, EOFError):
+                pass  # The supervisor is gone; the reader thread stops the bot
+
+    def recv(self):
+        return self.conn.recv()
+
+    def serve(self, handler):
+        """
+        Passes every further supervisor message to handler on a daemon thread. If the
+        supervisor goes away the handler gets a stop command: an unsupervised bot would
+        be started a second time by the next supervisor.
+        """
+        def run():
+            while True:
+                try:
+                    message = self.conn.recv()
+                except (OSError, EOFError):
+                    handler({"cmd": "stop"})
+                    return
+                handler(message)
+
+        threading.Thread(target=run, name="supervisor-link", daemon=True).start()
+
+
+def main():
+    key = bytes.fromhex(os.environ[KEY_ENV])
+    link = SupervisorLink(Client(("127.0.0.1", int(os.environ[PORT_ENV])), authkey=key))
+    link.send({"hello": "child", "pid": os.getpid()})
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    link.send({"event": "preloaded"})
+
+    try:
+        message = link.recv()
+    except (OSError, EOFError):
+        return EXIT_OK
+    if message.get("cmd") != "run":
+        return EXIT_OK
+
+    import bot_main
+    return bot_main.run_supervised(link)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
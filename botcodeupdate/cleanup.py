@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+log = logging.getLogger(__name__)
+
+# Discord only bulk-deletes messages younger than 14 days, at most 100 per call
+BULK_DELETE_MAX_AGE = timedelta(days=14)
+BULK_DELETE_CHUNK = 100
+# Pause between single deletes of older messages (they have a much stricter rate limit)
+SINGLE_DELETE_INTERVAL = 1.0
+
+
+async def purge_messages(channel, predicate, limit=100):
+    """
+    Delete the messages among the last `limit` in a channel that match predicate(message).
+
+    Messages inside the 14-day window are removed with bulk deletes of up to 100 IDs;
+    older ones fall back to throttled single deletes. Bulk deletes need Manage Messages
+    (even for the bot's own messages); without it every match is deleted one at a time,
+    which the bot may always do for messages it sent itself.
+    Returns a dict with the number of messages deleted, REST calls made and seconds taken.
+    """
+    started = time.perf_counter()
+    stats = {"deleted": 0, "calls": 0, "elapsed": 0.0}
+
+    # Keep the bulk window a little short of 14 days so slow scans don't cross the edge
+    cutoff = datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE + timedelta(minutes=1)
+    recent, old = [], []
+    scanned = 0
+    async for message in channel.history(limit=limit):
+        scanned += 1
+        if predicate(message):
+            (recent if message.created_at > cutoff else old).append(message)
+    stats["calls"] += max(1, -(-scanned // 100))  # One history request per 100 messages
+
+    can_bulk = channel.permissions_for(channel.guild.me).manage_messages
+    for i in range(0, len(recent), BULK_DELETE_CHUNK):
+        chunk = recent[i:i + BULK_DELETE_CHUNK]
+        if len(chunk) == 1 or not can_bulk:
+            # Bulk delete needs at least two messages (and Manage Messages)
+            old.extend(chunk)
+            continue
+        try:
+            await channel.delete_messages(chunk)
+        except discord.Forbidden:
+            log.warning(f"Missing Manage Messages in {channel.name}; deleting one message at a time.")
+            can_bulk = False
+            old.extend(chunk)
+            continue
+        finally:
+            stats["calls"] += 1
+        stats["deleted"] += len(chunk)
+
+    for i, message in enumerate(old):
+        if i:
+            await asyncio.sleep(SINGLE_DELETE_INTERVAL)
+        try:
+            await message.delete()
+            stats["deleted"] += 1
+        except Exception as e:
+            log.error(f"Could not delete message {message.id} in {channel.name}: {e}")
+        stats["calls"] += 1
+
+    stats["elapsed"] = time.perf_counter() - started
+    log.info(
+        f"Purged {stats['deleted']} message(s) in {channel.name} "
+        f"with {stats['calls']} call(s) in {stats['elapsed']:.2f}s."
+    )
+    return stats
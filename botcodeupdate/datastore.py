@@ -0,0 +1,155 @@
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import sqlite3
+import threading
+
+log = logging.getLogger(__name__)
+
+# Sentinel used to tell the writer thread to shut down
+_STOP = object()
+
+
+class Datastore:
+    """
+    Asynchronous front-end for a single SQLite database.
+
+    One writer thread owns the connection, so no SQLite call ever runs on the
+    event loop. Jobs that pile up while the thread is busy are executed in a
+    single transaction and committed together (group commit), which turns a
+    burst of N inserts into one fsync instead of N.
+    """
+
+    def __init__(self, path, max_batch=256):
+        self.path = path
+        self.max_batch = max_batch
+        self._jobs = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"datastore-{path}", daemon=True)
+        self._thread.start()
+
+    # --------------------------
+    # Writer thread
+    # --------------------------
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.isolation_level = None  # Transactions are managed explicitly below
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            stopping = False
+            while not stopping:
+                job = self._jobs.get()
+                if job is _STOP:
+                    break
+                batch = [job]
+                # Drain whatever else is already waiting so it shares the commit
+                while len(batch) < self.max_batch:
+                    try:
+                        job = self._jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is _STOP:
+                        stopping = True
+                        break
+                    batch.append(job)
+                self._run_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def _run_batch(self, conn, batch):
+        """Runs a batch of jobs inside one transaction and resolves their futures."""
+        committed = []
+        conn.execute("BEGIN")
+        for fn, future, write in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            if not write:
+                try:
+                    future.set_result(fn(conn))
+                except Exception as e:
+                    future.set_exception(e)
+                continue
+            # Each write gets its own savepoint so one bad statement does not
+            # roll back the other jobs sharing this commit.
+            conn.execute("SAVEPOINT job")
+            try:
+                result = fn(conn)
+            except Exception as e:
+                conn.execute("ROLLBACK TO job")
+                conn.execute("RELEASE job")
+                future.set_exception(e)
+                continue
+            conn.execute("RELEASE job")
+            committed.append((future, result))
+        try:
+            conn.execute("COMMIT")
+        except Exception as e:
+            log.error(f"Datastore commit failed for {self.path}: {e}")
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            for future, _ in committed:
+                future.set_exception(e)
+            return
+        for future, result in committed:
+            future.set_result(result)
+
+    # --------------------------
+    # Public API
+    # --------------------------
+    def submit(self, fn, write=True):
+        """
+        Queues fn(connection) on the writer thread and returns a concurrent future.
+        Safe to call from any thread, including before an event loop is running.
+        """
+        if self._closed:
+            raise RuntimeError(f"Datastore {self.path} is closed.")
+        future = concurrent.futures.Future()
+        self._jobs.put((fn, future, write))
+        return future
+
+    async def run(self, fn):
+        """Runs fn(connection) as part of a write transaction and returns its result."""
+        return await asyncio.wrap_future(self.submit(fn, write=True))
+
+    async def read(self, fn):
+        """Runs fn(connection) for a read-only query and returns its result."""
+        return await asyncio.wrap_future(self.submit(fn, write=False))
+
+    async def execute(self, sql, params=()):
+        """Executes a write statement and returns the number of affected rows."""
+        return await self.run(lambda conn: conn.execute(sql, params).rowcount)
+
+    async def insert(self, sql, params=()):
+        """Executes an INSERT and returns the new row ID."""
+        return await self.run(lambda conn: conn.execute(sql, params).lastrowid)
+
+    async def executemany(self, sql, seq_of_params):
+        """Executes a write statement for every parameter set in one transaction."""
+        seq_of_params = list(seq_of_params)
+        return await self.run(lambda conn: conn.executemany(sql, seq_of_params).rowcount)
+
+    async def fetchall(self, sql, params=()):
+        return await self.read(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql, params=()):
+        return await self.read(lambda conn: conn.execute(sql, params).fetchone())
+
+    def close_nowait(self):
+        """Stops accepting jobs; the writer thread exits after finishing the queue."""
+        if not self._closed:
+            self._closed = True
+            self._jobs.put(_STOP)
+
+    async def close(self):
+        """Flushes all queued jobs and waits for the writer thread to exit."""
+        self.close_nowait()
+        await asyncio.to_thread(self._thread.join)
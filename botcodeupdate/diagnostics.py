@@ -0,0 +1,90 @@
+import discord
+from discord.ext import commands
+import asyncio
+import json
+import logging
+import perf
+import watchdog
+from guild_config import get_config
+
+log = logging.getLogger(__name__)
+
+# Local metrics file, rewritten every METRICS_DUMP_INTERVAL seconds
+METRICS_FILE = "perf_metrics.json"
+METRICS_DUMP_INTERVAL = 300
+# Handlers listed by !perf, slowest p95 first
+PERF_REPORT_ROWS = 15
+
+class Diagnostics(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.metrics = perf.get_perf()
+        self.watchdog = watchdog.get_watchdog()
+        self.config = get_config()
+        self.dump_task = None
+
+    async def cog_load(self):
+        await self.config.load()
+        self.dump_task = asyncio.create_task(self.dump_periodically())
+
+    async def cog_unload(self):
+        if self.dump_task:
+            self.dump_task.cancel()
+        await self.dump_metrics()
+
+    def snapshot(self):
+        return {**self.metrics.snapshot(), "loop_lag": self.watchdog.snapshot()}
+
+    def write_metrics(self, snapshot):
+        with open(METRICS_FILE, "w") as f:
+            json.dump(snapshot, f, indent=2)
+
+    async def dump_metrics(self):
+        try:
+            await asyncio.to_thread(self.write_metrics, self.snapshot())
+        except OSError as e:
+            log.warning(f"Could not write {METRICS_FILE}: {e}")
+
+    async def dump_periodically(self):
+        while True:
+            await asyncio.sleep(METRICS_DUMP_INTERVAL)
+            await self.dump_metrics()
+
+    @commands.command()
+    async def perf(self, ctx):
+        """
+        Show latency percentiles, REST calls, 429s and errors per command and component,
+        plus event-loop lag. Usage: !perf
+        """
+        if not self.config.is_owner(ctx.author):
+            return await ctx.send("You do not have permission to run this command.")
+        await ctx.send(embed=self.create_perf_embed(self.snapshot()))
+
+    def create_perf_embed(self, snapshot):
+        handlers = sorted(snapshot["handlers"].items(), key=lambda item: item[1]["p95_ms"], reverse=True)
+        rows = [f"{'handler':<26}{'calls':>6}{'p50':>7}{'p95':>7}{'p99':>7}{'rest':>6}{'429':>5}{'err':>5}"]
+        for name, stats in handlers[:PERF_REPORT_ROWS]:
+            rows.append(
+                f"{name[-26:]:<26}{stats['calls']:>6}{stats['p50_ms']:>7.0f}{stats['p95_ms']:>7.0f}"
+                f"{stats['p99_ms']:>7.0f}{stats['rest_per_call']:>6.1f}{stats['rate_limited']:>5}{stats['errors']:>5}"
+            )
+        embed = discord.Embed(
+            title="Handler Performance",
+            description="```\n" + "\n".join(rows) + "\n```",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="REST calls", value=str(snapshot["rest_calls"]), inline=True)
+        embed.add_field(name="429 responses", value=str(snapshot["rate_limited"]), inline=True)
+        lag = snapshot["loop_lag"]
+        embed.add_field(name="Max loop lag", value=f"{lag['max_lag_ms']:.0f}ms", inline=True)
+        histogram = "\n".join(f"{bucket:>9} {count}" for bucket, count in lag["histogram"].items() if count)
+        embed.add_field(name="Loop lag histogram", value=f"```\n{histogram or 'no samples yet'}\n```", inline=True)
+        if lag["stalls"]:
+            recent = "\n".join(f"{stall['lag_ms']:.0f}ms in {stall['where']}"[:200] for stall in lag["stalls"][-5:])
+            embed.add_field(name="Recent stalls", value=recent[:1024], inline=False)
+        embed.set_footer(text="Latencies in ms; rest = REST calls per invocation")
+        return embed
+
+# Asynchronous setup function for dynamic cog loading
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Diagnostics(bot))
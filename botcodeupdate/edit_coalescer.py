@@ -0,0 +1,63 @@
+import asyncio
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+class EditCoalescer:
+    """
+    Collapses bursts of edits to the same message into at most one edit per interval.
+
+    Callers hand over an async `edit` callable that renders the *current* state when it
+    runs; while an edit is pending or cooling down, newer requests simply replace it.
+    The last request is always applied, so the final state is never lost.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._pending = {}  # key -> latest edit callable
+        self._last_edit = {}  # key -> monotonic time of the last applied edit
+        self._tasks = {}  # key -> flusher task
+        self.edits = 0  # Edits actually sent
+        self.requests = 0  # Edits requested
+
+    def request(self, key, edit):
+        self.requests += 1
+        self._pending[key] = edit
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._flusher(key))
+
+    async def _flusher(self, key):
+        try:
+            while True:
+                wait = self._last_edit.get(key, 0.0) + self.interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                edit = self._pending.pop(key, None)
+                if edit is None:
+                    return
+                self._last_edit[key] = time.monotonic()
+                self.edits += 1
+                try:
+                    await edit()
+                except Exception as e:
+                    log.error(f"Coalesced edit for {key} failed: {e}")
+        finally:
+            self._tasks.pop(key, None)
+
+    async def flush(self, key):
+        """Applies the pending edit for key right away (e.g. to show a final count)."""
+        edit = self._pending.pop(key, None)
+        if edit is not None:
+            self._last_edit[key] = time.monotonic()
+            self.edits += 1
+            await edit()
+
+    def discard(self, key):
+        """Drops any pending edit for key and forgets it (e.g. the message is being deleted)."""
+        self._pending.pop(key, None)
+        self._last_edit.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task:
+            task.cancel()
@@ -1,6 +1,10 @@
 from discord.ext import commands
 from discord import Embed, ButtonStyle, Interaction, SelectOption, ui
 import logging
+import perf
+from guild_config import get_config
+
+log = logging.getLogger(__name__)
 
 class EmbedCommand(commands.Cog):
     def __init__(self, bot):
@@ -113,13 +117,13 @@ class EmbedCommand(commands.Cog):
                                 )
                                 await interaction.response.send_message(embed=chp_embed, ephemeral=True)
                         except Exception as e:
-                            logging.error(f"Error in dropdown callback: {e}")
+                            log.error(f"Error in dropdown callback: {e}")
                             await interaction.response.send_message(
                                 f"⚠️ An error occurred while processing your selection: `{e}`", ephemeral=True
                             )
 
                     # Assign the callback to the dropdown
-                    dropdown.callback = dropdown_callback
+                    dropdown.callback = perf.track(dropdown_callback)
 
                     # Create a view for the dropdown
                     dropdown_view = ui.View()
@@ -129,7 +133,7 @@ class EmbedCommand(commands.Cog):
                     await interaction.channel.send(embed=departments_embed, view=dropdown_view)
 
                 except Exception as e:
-                    logging.error(f"Error in Departments button callback: {e}")
+                    log.error(f"Error in Departments button callback: {e}")
                     await interaction.response.send_message(
                         f"⚠️ An error occurred while processing your request for the Departments embed: `{e}`",
                         ephemeral=True
@@ -141,8 +145,8 @@ class EmbedCommand(commands.Cog):
                     # Delete the original message
                     await interaction.message.delete()
 
-                    # Role ID for Sessions role
-                    role_id = 1342612650571599922
+                    # This guild's Sessions role
+                    role_id = get_config().get(interaction.guild.id, "sessions_role")
 
                     # Create the Sessions embed
                     sessions_embed = Embed(
@@ -182,13 +186,13 @@ class EmbedCommand(commands.Cog):
                                 )
 
                         except Exception as e:
-                            logging.error(f"Error in toggle role callback: {e}")
+                            log.error(f"Error in toggle role callback: {e}")
                             await interaction.response.send_message(
                                 f"⚠️ An error occurred while toggling your role: `{e}`", ephemeral=True
                             )
 
                     # Assign the toggle button callback
-                    toggle_button.callback = toggle_role_callback
+                    toggle_button.callback = perf.track(toggle_role_callback)
 
                     # Create a view and add the toggle button
                     toggle_view = ui.View()
@@ -198,14 +202,14 @@ class EmbedCommand(commands.Cog):
                     await interaction.channel.send(embed=sessions_embed, view=toggle_view)
 
                 except Exception as e:
-                    logging.error(f"Error in Sessions button callback: {e}")
+                    log.error(f"Error in Sessions button callback: {e}")
                     await interaction.response.send_message(
                         f"⚠️ An error occurred while processing your request for the Sessions embed: `{e}`", ephemeral=True
                     )
 
             # Assign callbacks to the buttons
-            button_departments.callback = send_departments
-            button_sessions.callback = send_sessions
+            button_departments.callback = perf.track(send_departments)
+            button_sessions.callback = perf.track(send_sessions)
 
             # Create a view for the buttons
             view = ui.View()
@@ -216,7 +220,7 @@ class EmbedCommand(commands.Cog):
             await ctx.send(embed=embed, view=view)
 
         except Exception as e:
-            logging.error(f"Error in !embed command: {e}")
+            log.error(f"Error in !embed command: {e}")
             await ctx.send(f"⚠️ An error occurred while processing your request: `{e}`")
 
 # Async setup function for cog registration
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import re
+
+from datastore import Datastore
+
+log = logging.getLogger(__name__)
+
+# Every setting: key -> (kind, default). The defaults are the IDs of the server the bot was
+# written for, so a single-guild deployment keeps working without any configuration.
+SETTINGS = {
+    "moderator_role": ("role", 1342611104249024512),  # Moderation commands
+    "pardon_roles": ("roles", [1342610409525608479, 1342610501305372794]),  # !pardon
+    "sessions_role": ("role", 1342612650571599922),  # Pinged by !ssv, toggled by the Sessions buttons
+    "ticket_category": ("channel", 1343649889220952064),  # Ticket channels are created here
+    "ticket_log_channel": ("channel", 1343648011854545009),
+    "ticket_support_channel": ("channel", 1342668753183440927),  # Holds the ticket panel
+    "ticket_general_role": ("role", 1342611034116198420),  # Sees general tickets
+    "ticket_report_roles": ("roles", [1342610501305372794, 1342610409525608479]),  # See report/community tickets
+    "owner": ("user", 1237471534541439068),  # !update, !outbound, !perf; bot-wide only
+}
+# Settings that belong to the whole deployment rather than to one guild
+BOT_WIDE = {"owner"}
+# Guild ID under which bot-wide values (and fallbacks for every guild) are stored
+GLOBAL = 0
+SNOWFLAKE_PATTERN = re.compile(r"\d{15,20}")
+
+
+def has_any_role(member, role_ids):
+    """True if the member has the role, or one of the roles, in role_ids."""
+    if isinstance(role_ids, int):
+        role_ids = (role_ids,)
+    return any(role.id in role_ids for role in getattr(member, "roles", ()))
+
+
+def mention(kind, value):
+    ids = value if isinstance(value, list) else [value]
+    prefix = {"role": "@&", "roles": "@&", "channel": "#", "user": "@"}[kind]
+    return ", ".join(f"<{prefix}{snowflake}>" for snowflake in ids) or "none"
+
+
+class GuildConfig:
+    """
+    Per-guild settings (role, channel and category IDs) with an in-memory cache.
+
+    Every override is read once at startup; lookups are plain dict hits that fall
+    back from the guild's own value to the bot-wide value (GLOBAL) to the default.
+    Changes made through set()/reset() are written to guild_config.db and replace
+    the cached entry in the same step; reload() drops the cache and re-reads the
+    database after it was edited by hand.
+    """
+
+    def __init__(self, path="guild_config.db"):
+        self.db = Datastore(path)
+        self.schema = self.db.submit(self._create_table)
+        self._values = {}  # guild_id -> {key: value}, overrides only
+        self._loaded = False
+        self._loading = None
+
+    @staticmethod
+    def _create_table(conn):
+        conn.execute(
+            '''CREATE TABLE IF NOT EXISTS guild_settings (
+                guild_id INTEGER,
+                key TEXT,
+                value TEXT,
+                PRIMARY KEY (guild_id, key)
+            )'''
+        )
+
+    async def load(self):
+        """
+        Fills the cache (once per process). Cogs call it from cog_load, which may run
+        concurrently; they all share one read.
+        """
+        if self._loaded:
+            return
+        loop = asyncio.get_running_loop()
+        if self._loading is None or self._loading.done() or self._loading.get_loop() is not loop:
+            self._loading = loop.create_task(self._load())
+        await asyncio.shield(self._loading)
+
+    async def _load(self):
+        # A failed CREATE TABLE surfaces here (and fails the caller's load) instead of being dropped
+        await asyncio.wrap_future(self.schema)
+        rows = await self.db.fetchall("SELECT guild_id, key, value FROM guild_settings")
+        values = {}
+        for guild_id, key, value in rows:
+            if key in SETTINGS:
+                values.setdefault(guild_id, {})[key] = json.loads(value)
+        self._values = values
+        self._loaded = True
+        log.info(f"Loaded {len(rows)} setting override(s) for {len(values)} guild(s).")
+
+    async def reload(self):
+        self._loaded = False
+        self._loading = None
+        await self.load()
+
+    def get(self, guild_id, key):
+        """The value of `key` for a guild (guild override, then bot-wide override, then default)."""
+        if key not in BOT_WIDE:
+            value = self._values.get(guild_id, {}).get(key)
+            if value is not None:
+                return value
+        value = self._values.get(GLOBAL, {}).get(key)
+        return value if value is not None else SETTINGS[key][1]
+
+    def source(self, guild_id, key):
+        """Where the effective value comes from: "server", "bot-wide" or "default"."""
+        if key not in BOT_WIDE and key in self._values.get(guild_id, {}):
+            return "server"
+        return "bot-wide" if key in self._values.get(GLOBAL, {}) else "default"
+
+    def has_role(self, member, key):
+        """True if the member has the role(s) configured under `key` in the member's guild."""
+        guild = getattr(member, "guild", None)
+        return guild is not None and has_any_role(member, self.get(guild.id, key))
+
+    def is_owner(self, user):
+        return user.id == self.get(GLOBAL, "owner")
+
+    @staticmethod
+    def parse_value(key, text):
+        """Turns mentions and/or raw IDs into the value stored for `key`; raises ValueError."""
+        if key not in SETTINGS:
+            raise ValueError(f"Unknown setting `{key}`. Settings: {', '.join(SETTINGS)}")
+        ids = [int(snowflake) for snowflake in SNOWFLAKE_PATTERN.findall(text)]
+        if SETTINGS[key][0] == "roles":
+            return list(dict.fromkeys(ids))
+        if len(ids) != 1:
+            raise ValueError(f"`{key}` takes exactly one {SETTINGS[key][0]} (mention or ID).")
+        return ids[0]
+
+    async def set(self, guild_id, key, value):
+        scope = GLOBAL if key in BOT_WIDE else guild_id
+        await self.db.execute(
+            "INSERT OR REPLACE INTO guild_settings (guild_id, key, value) VALUES (?, ?, ?)",
+            (scope, key, json.dumps(value))
+        )
+        self._values.setdefault(scope, {})[key] = value
+
+    async def reset(self, guild_id, key):
+        scope = GLOBAL if key in BOT_WIDE else guild_id
+        await self.db.execute("DELETE FROM guild_settings WHERE guild_id = ? AND key = ?", (scope, key))
+        self._values.get(scope, {}).pop(key, None)
+
+
+# One cache shared by every cog
+_config = None
+
+
+def get_config():
+    global _config
+    if _config is None:
+        _config = GuildConfig()
+    return _config
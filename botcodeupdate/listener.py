@@ -1,145 +1,203 @@
 import discord
 from discord.ext import commands
 import logging
+import asyncio
+import time
+import perf
+from cleanup import purge_messages
+from guild_config import get_config
+from message_registry import get_registry
+
+log = logging.getLogger(__name__)
+
+# Channel name -> registry purpose for the embeds this cog maintains
+MANAGED_EMBEDS = {
+    "sessions": "sessions_embed",
+    "departments": "departments_embed",
+}
+# Number of channels reconciled at the same time on startup
+RECONCILE_CONCURRENCY = 4
 
-# Logging setup
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("listener.log"),
-        logging.StreamHandler()
-    ]
-)
 
 class Listener(commands.Cog):
     def __init__(self, client):
         self.client = client
+        self.registry = get_registry()
+        self.config = get_config()
+        self.loaded_at = time.perf_counter()
+        self.embeds_reconciled = False  # on_ready fires again on every gateway reconnect
+
+    async def cog_load(self):
+        """Registers the persistent views so the stored embeds keep working after a restart."""
+        await self.registry.ready()
+        await self.config.load()
+        self.client.add_view(SessionsRoleView())
+        self.client.add_view(DepartmentsView())
 
     @commands.Cog.listener()
     async def on_ready(self):
         """
-        When the bot starts, perform the following actions:
-        1. Delete and resend embeds created by the bot (sessions and departments).
+        When the bot starts, reconcile the registered Sessions and Departments embeds.
         """
-        logging.info("Listener cog is loaded. Scanning for embeds...")
+        if self.embeds_reconciled:
+            return
+        self.embeds_reconciled = True
+        log.info(f"Listener ready {time.perf_counter() - self.loaded_at:.2f}s after load. Reconciling embeds...")
         await self.resend_embeds()
 
     async def resend_embeds(self):
         """
-        Resend the session and departments embeds by scanning all text channels
-        and deleting previous bot embeds.
+        Make sure every "sessions"/"departments" channel has exactly one up-to-date embed.
+        Only the messages recorded in the registry are touched; channels are handled by a
+        small pool of workers instead of one after another.
         """
+        started = time.perf_counter()
+        stats = {"rest_calls": 0}
+        registered = {
+            (guild_id, channel_id, purpose): message_id
+            for guild_id, channel_id, purpose, message_id in await self.registry.all()
+            if purpose in MANAGED_EMBEDS.values()
+        }
+
+        queue = asyncio.Queue()
         for guild in self.client.guilds:
             for channel in guild.text_channels:
-                if not channel.permissions_for(guild.me).manage_messages:
-                    logging.warning(f"Missing permissions to manage messages in {channel.name}. Skipping...")
+                purpose = MANAGED_EMBEDS.get(channel.name.lower())
+                if purpose is None:
                     continue
+                # Posting needs Send Messages; the first-run cleanup reads the history (purge_messages
+                # falls back to single deletes of the bot's own messages without Manage Messages)
+                permissions = channel.permissions_for(guild.me)
+                if not (permissions.send_messages and permissions.read_message_history):
+                    log.warning(f"Missing permissions to send messages or read history in {channel.name}. Skipping...")
+                    continue
+                key = (guild.id, channel.id, purpose)
+                queue.put_nowait((channel, purpose, registered.pop(key, None)))
 
-                try:
-                    # Delete bot's embeds in the channel
-                    async for message in channel.history(limit=100):
-                        if message.author == self.client.user and message.embeds:
-                            if "Session" in message.embeds[0].title or "Departments" in message.embeds[0].title:
-                                logging.info(f"Deleting embed in channel: {channel.name}")
-                                await message.delete()
-
-                    # Resend specific embeds
-                    if channel.name.lower() == "sessions":
-                        await self.send_sessions_embed(channel)
-                    elif channel.name.lower() == "departments":
-                        await self.send_departments_embed(channel)
-
-                except Exception as e:
-                    logging.error(f"Error processing channel {channel.name}: {e}")
-
-    async def send_sessions_embed(self, channel):
-        """
-        Resend the sessions embed in the specified channel.
-        """
-        try:
-            embed = discord.Embed(
-                title="Sessions",
-                description=(
-                    "Sessions are held whenever 3 or more staff members are available to moderate for 30 minutes or more. "
-                    "Once the staff vote has accord we will send a vote here for the community to vote whether or not we have a session. "
-                    "In order to have a session we need at least 14 votes. If you would like to be notified when we host a session, "
-                    "click the button below to get the **Sessions** role."
-                ),
-                color=0x00FF00
-            )
-            toggle_button = discord.ui.Button(label="Toggle Sessions Role", style=discord.ButtonStyle.primary)
+        # Whatever is left points at channels that were deleted or renamed
+        for guild_id, channel_id, purpose in registered:
+            await self.registry.delete(guild_id, channel_id, purpose)
 
-            async def toggle_role_callback(interaction: discord.Interaction):
-                user = interaction.user
-                role = interaction.guild.get_role(1342612650571599922)  # Replace with Sessions role ID
-                if not role:
-                    await interaction.response.send_message("⚠️ The Sessions role was not found.", ephemeral=True)
+        async def worker():
+            while True:
+                try:
+                    channel, purpose, message_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
                     return
-
-                if role in user.roles:
-                    await user.remove_roles(role)
-                    await interaction.response.send_message(
-                        "✅ You have been removed from the **Sessions** role.", ephemeral=True
-                    )
-                else:
-                    await user.add_roles(role)
-                    await interaction.response.send_message(
-                        "✅ You have been added to the **Sessions** role.", ephemeral=True
+                try:
+                    await self.reconcile_embed(channel, purpose, message_id, stats)
+                except Exception as e:
+                    log.error(f"Error processing channel {channel.name}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(RECONCILE_CONCURRENCY)))
+        log.info(
+            f"Embed reconcile finished in {time.perf_counter() - started:.2f}s "
+            f"with {stats['rest_calls']} REST call(s)."
+        )
+
+    async def reconcile_embed(self, channel, purpose, message_id, stats):
+        """Edit the registered embed in place, or post (and register) a new one."""
+        embed, view = self.build_embed(purpose)
+        if message_id:
+            try:
+                stats["rest_calls"] += 1
+                await channel.get_partial_message(message_id).edit(embed=embed, view=view)
+                return
+            except discord.NotFound:
+                log.info(f"Registered {purpose} in {channel.name} was deleted. Resending...")
+        else:
+            # Nothing registered yet: remove embeds posted by older versions once. A failed
+            # cleanup leaves a duplicate behind, which is better than no embed at all.
+            try:
+                purged = await purge_messages(
+                    channel,
+                    lambda message: (
+                        message.author == self.client.user
+                        and message.embeds
+                        and message.embeds[0].title == embed.title
                     )
-
-            toggle_button.callback = toggle_role_callback
-            view = discord.ui.View()
-            view.add_item(toggle_button)
-
-            await channel.send(embed=embed, view=view)
-            logging.info(f"Resent sessions embed in {channel.name}")
-        except Exception as e:
-            logging.error(f"Error resending sessions embed in {channel.name}: {e}")
-
-    async def send_departments_embed(self, channel):
-        """
-        Resend the departments embed in the specified channel.
-        """
-        try:
-            embed = discord.Embed(
-                title="Departments",
-                description="Select a department from the dropdown below to learn more:",
-                color=0x00FFFF
+                )
+                stats["rest_calls"] += purged["calls"]
+            except discord.HTTPException as e:
+                log.warning(f"Could not clear old {purpose} embeds in {channel.name}: {e}")
+
+        stats["rest_calls"] += 1
+        message = await channel.send(embed=embed, view=view)
+        await self.registry.set(channel.guild.id, channel.id, purpose, message.id)
+        log.info(f"Resent {purpose} in {channel.name}")
+
+    def build_embed(self, purpose):
+        if purpose == "sessions_embed":
+            return self.sessions_embed(), SessionsRoleView()
+        return self.departments_embed(), DepartmentsView()
+
+    def sessions_embed(self):
+        return discord.Embed(
+            title="Sessions",
+            description=(
+                "Sessions are held whenever 3 or more staff members are available to moderate for 30 minutes or more. "
+                "Once the staff vote has accord we will send a vote here for the community to vote whether or not we have a session. "
+                "In order to have a session we need at least 14 votes. If you would like to be notified when we host a session, "
+                "click the button below to get the **Sessions** role."
+            ),
+            color=0x00FF00
+        )
+
+    def departments_embed(self):
+        embed = discord.Embed(
+            title="Departments",
+            description="Select a department from the dropdown below to learn more:",
+            color=0x00FFFF
+        )
+        embed.add_field(name="LAPD", value="Los Angeles Police Department", inline=False)
+        embed.add_field(name="LASD", value="Los Angeles Sheriff's Department", inline=False)
+        embed.add_field(name="LAFD", value="Los Angeles Fire Department", inline=False)
+        embed.add_field(name="LASP", value="Los Angeles State Patrol", inline=False)
+        return embed
+
+# Persistent "Toggle Sessions Role" button
+class SessionsRoleView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label="Toggle Sessions Role", style=discord.ButtonStyle.primary, custom_id="listener:sessions_role")
+    @perf.track
+    async def toggle_role(self, interaction: discord.Interaction, button: discord.ui.Button):
+        user = interaction.user
+        role = interaction.guild.get_role(get_config().get(interaction.guild.id, "sessions_role"))
+        if not role:
+            await interaction.response.send_message("⚠️ The Sessions role was not found.", ephemeral=True)
+            return
+
+        if role in user.roles:
+            await user.remove_roles(role)
+            await interaction.response.send_message(
+                "✅ You have been removed from the **Sessions** role.", ephemeral=True
             )
-            embed.add_field(name="LAPD", value="Los Angeles Police Department", inline=False)
-            embed.add_field(name="LASD", value="Los Angeles Sheriff's Department", inline=False)
-            embed.add_field(name="LAFD", value="Los Angeles Fire Department", inline=False)
-            embed.add_field(name="LASP", value="Los Angeles State Patrol", inline=False)
-
-            dropdown = discord.ui.Select(
-                placeholder="Choose a department",
-                options=[
-                    discord.SelectOption(label="LAPD", description="Learn more about LAPD"),
-                    discord.SelectOption(label="LASD", description="Learn more about LASD"),
-                    discord.SelectOption(label="LAFD", description="Learn more about LAFD"),
-                    discord.SelectOption(label="LASP", description="Learn more about LASP"),
-                ]
+        else:
+            await user.add_roles(role)
+            await interaction.response.send_message(
+                "✅ You have been added to the **Sessions** role.", ephemeral=True
             )
 
-            async def dropdown_callback(interaction: discord.Interaction):
-                if dropdown.values[0] == "LAPD":
-                    await interaction.response.send_message("Learn more about LAPD!", ephemeral=True)
-                elif dropdown.values[0] == "LASD":
-                    await interaction.response.send_message("Learn more about LASD!", ephemeral=True)
-                elif dropdown.values[0] == "LAFD":
-                    await interaction.response.send_message("Learn more about LAFD!", ephemeral=True)
-                elif dropdown.values[0] == "LASP":
-                    await interaction.response.send_message("Learn more about LASP!", ephemeral=True)
-
-            dropdown.callback = dropdown_callback
-            view = discord.ui.View()
-            view.add_item(dropdown)
-
-            await channel.send(embed=embed, view=view)
-            logging.info(f"Resent departments embed in {channel.name}")
-        except Exception as e:
-            logging.error(f"Error resending departments embed in {channel.name}: {e}")
+# Persistent departments dropdown
+class DepartmentsView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.select(
+        placeholder="Choose a department",
+        custom_id="listener:departments",
+        options=[
+            discord.SelectOption(label="LAPD", description="Learn more about LAPD"),
+            discord.SelectOption(label="LASD", description="Learn more about LASD"),
+            discord.SelectOption(label="LAFD", description="Learn more about LAFD"),
+            discord.SelectOption(label="LASP", description="Learn more about LASP"),
+        ]
+    )
+    @perf.track
+    async def choose_department(self, interaction: discord.Interaction, select: discord.ui.Select):
+        await interaction.response.send_message(f"Learn more about {select.values[0]}!", ephemeral=True)
 
 # Setup function for dynamic cog loading
 async def setup(client):
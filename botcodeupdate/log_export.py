@@ -0,0 +1,171 @@
+"""
+Streaming export of moderation.db for appeals and audits.
+
+Rows are read with a cursor in batches of FETCH_SIZE and written straight into
+gzip-compressed CSV or JSONL parts, so memory use does not depend on how many
+logs there are. Output is split into parts that each fit under a size limit
+(one Discord attachment); every part is a complete file with its own header.
+
+Used by !exportlogs, and from the command line:
+
+    python log_export.py moderation.db --guild 123456789012345678 --since 30d --format jsonl
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+log = logging.getLogger(__name__)
+
+COLUMNS = ("log_id", "guild_id", "user_id", "action", "reason", "moderator_id", "timestamp", "expired_at")
+FORMATS = ("csv", "jsonl")
+FETCH_SIZE = 1000
+# Discord's default attachment limit is 10 MiB; leave room for gzip's internal buffer
+DEFAULT_PART_BYTES = 8 * 1024 * 1024
+# Compressed output lags the input by up to this much, so parts are closed early by this margin
+GZIP_SLACK = 256 * 1024
+
+
+def parse_since(text, now=None):
+    """
+    Parses a start point: a relative age like 30d, 12h, 45m or 90s (counted back from now),
+    or an ISO date/time like 2026-01-31 (UTC). Returns a 'YYYY-MM-DD HH:MM:SS' UTC string
+    comparable with logs.timestamp.
+    """
+    now = now or datetime.now(timezone.utc)
+    match = re.fullmatch(r"(\d+)([smhdw])", text.strip().lower())
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[unit]
+        start = now - timedelta(seconds=amount * seconds)
+    else:
+        try:
+            start = datetime.fromisoformat(text.strip())
+        except ValueError:
+            raise ValueError("Invalid start. Use an age like 30d or 12h, or a date like 2026-01-31.")
+        if start.tzinfo is not None:
+            start = start.astimezone(timezone.utc)
+    return start.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def iter_rows(conn, user_id=None, since=None, guild_id=None):
+    """Yields log rows in log_id order, FETCH_SIZE at a time from a single cursor."""
+    where, params = [], []
+    if guild_id is not None:
+        where.append("guild_id = ?")
+        params.append(guild_id)
+    if user_id is not None:
+        where.append("user_id = ?")
+        params.append(str(user_id))
+    if since is not None:
+        where.append("timestamp >= ?")
+        params.append(since)
+    sql = f"SELECT {', '.join(COLUMNS)} FROM logs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    cursor = conn.execute(sql + " ORDER BY log_id", params)
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+class _PartWriter:
+    """Writes rows into numbered .gz parts, starting a new part before one outgrows max_bytes."""
+
+    def __init__(self, out_dir, stem, fmt, max_bytes):
+        self.out_dir = out_dir
+        self.stem = stem
+        self.fmt = fmt
+        self.limit = max(max_bytes - GZIP_SLACK, max_bytes // 2)
+        self.paths = []
+        self._raw = None
+        self._text = None
+        self._csv = None
+
+    def _open(self):
+        path = os.path.join(self.out_dir, f"{self.stem}-part{len(self.paths) + 1:03d}.{self.fmt}.gz")
+        self.paths.append(path)
+        self._raw = open(path, "wb")
+        gz = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self._text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+        if self.fmt == "csv":
+            self._csv = csv.writer(self._text)
+            self._csv.writerow(COLUMNS)
+
+    def write(self, row):
+        if self._raw is None or self._raw.tell() >= self.limit:
+            self.close()
+            self._open()
+        if self.fmt == "csv":
+            self._csv.writerow(row)
+        else:
+            self._text.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self._text is not None:
+            self._text.close()  # Closes the gzip stream, which writes its trailer
+            self._raw.close()
+            self._text = self._raw = self._csv = None
+
+
+def export_logs(db_path, out_dir, user_id=None, since=None, fmt="csv", max_bytes=DEFAULT_PART_BYTES, guild_id=None):
+    """
+    Exports logs matching guild_id/user_id/since into gzip parts in out_dir. Blocking; run it in a
+    thread from async code. Reads through its own read-only connection, so the bot's
+    writer thread is never held up, and a single SELECT sees one consistent snapshot.
+    Returns {"paths", "rows", "bytes", "elapsed"}.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format must be one of: {', '.join(FORMATS)}.")
+    started = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    stem = f"moderation-logs-{user_id or 'all'}-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}"
+    writer = _PartWriter(out_dir, stem, fmt, max_bytes)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    rows = 0
+    try:
+        for row in iter_rows(conn, user_id, since, guild_id):
+            writer.write(row)
+            rows += 1
+    finally:
+        writer.close()
+        conn.close()
+    size = sum(os.path.getsize(path) for path in writer.paths)
+    elapsed = time.perf_counter() - started
+    log.info(f"Exported {rows} log(s) into {len(writer.paths)} part(s), {size / 1e6:.1f} MB, in {elapsed:.2f}s.")
+    return {"paths": writer.paths, "rows": rows, "bytes": size, "elapsed": elapsed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export moderation logs to gzip-compressed CSV or JSONL")
+    parser.add_argument("database", help="Path to moderation.db")
+    parser.add_argument("--guild", type=int, help="Only export logs of this server ID")
+    parser.add_argument("--user", help="Only export logs for this user ID")
+    parser.add_argument("--since", help="Age like 30d or 12h, or a date like 2026-01-31")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--out", default="exports", help="Output folder")
+    parser.add_argument("--part-mb", type=float, default=DEFAULT_PART_BYTES / 1024 / 1024, help="Maximum size per part")
+    args = parser.parse_args(argv)
+
+    since = parse_since(args.since) if args.since else None
+    result = export_logs(
+        args.database, args.out, args.user, since, args.format, int(args.part_mb * 1024 * 1024), args.guild
+    )
+    print(f"Exported {result['rows']} log(s) in {result['elapsed']:.2f}s:")
+    for path in result["paths"]:
+        print(f"  {path} ({os.path.getsize(path) / 1e6:.2f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
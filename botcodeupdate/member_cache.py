@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+# Guild members per gateway chunk request (Discord's maximum for user_ids queries)
+QUERY_CHUNK = 100
+# Concurrent REST fetches when the gateway query is unavailable
+FETCH_CONCURRENCY = 5
+
+
+class MemberCache:
+    """
+    TTL cache of resolved guild members, shared by every cog.
+
+    resolve() serves IDs from discord.py's own member cache or this cache first, then
+    resolves the misses with gateway chunk queries (100 IDs per request, no REST
+    calls), falling back to a bounded number of concurrent fetch_member calls.
+    """
+
+    def __init__(self, ttl=600, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # (guild_id, user_id) -> (expires_at, member)
+
+    def get(self, guild_id, user_id):
+        entry = self._entries.get((guild_id, user_id))
+        if entry is None:
+            return None
+        expires_at, member = entry
+        if expires_at < time.monotonic():
+            del self._entries[(guild_id, user_id)]
+            return None
+        return member
+
+    def put(self, member):
+        key = (member.guild.id, member.id)
+        self._entries[key] = (time.monotonic() + self.ttl, member)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, guild_id, user_id):
+        self._entries.pop((guild_id, user_id), None)
+
+    async def resolve(self, guild, user_ids):
+        """Returns {user_id: Member} for the IDs that are members of guild."""
+        found = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            member = guild.get_member(user_id) or self.get(guild.id, user_id)
+            if member:
+                found[user_id] = member
+            else:
+                missing.append(user_id)
+        if not missing:
+            return found
+
+        try:
+            for i in range(0, len(missing), QUERY_CHUNK):
+                chunk = missing[i:i + QUERY_CHUNK]
+                for member in await guild.query_members(user_ids=chunk, limit=len(chunk), cache=False):
+                    found[member.id] = member
+                    self.put(member)
+            return found
+        except Exception as e:
+            log.warning(f"Member chunk query failed in {guild.id}, falling back to REST: {e}")
+
+        semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+        async def fetch(user_id):
+            async with semaphore:
+                try:
+                    member = await guild.fetch_member(user_id)
+                except Exception as e:
+                    log.debug(f"Could not fetch member {user_id}: {e}")
+                    return
+                found[user_id] = member
+                self.put(member)
+
+        await asyncio.gather(*(fetch(user_id) for user_id in missing if user_id not in found))
+        return found
+
+
+_member_cache = None
+
+
+def get_member_cache():
+    global _member_cache
+    if _member_cache is None:
+        _member_cache = MemberCache()
+    return _member_cache
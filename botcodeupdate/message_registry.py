@@ -0,0 +1,70 @@
+import asyncio
+
+from datastore import Datastore
+
+
+class MessageRegistry:
+    """
+    Persisted map of (guild, channel, purpose) -> message ID for the long-lived
+    messages the bot owns (ticket panel, role embeds, ...). Lets startup edit or
+    verify exactly those messages instead of scanning channel history.
+    """
+
+    def __init__(self, path="bot_state.db"):
+        self.db = Datastore(path)
+        self.schema = self.db.submit(self._create_table)  # Awaited through ready()
+
+    @staticmethod
+    def _create_table(conn):
+        conn.execute(
+            '''CREATE TABLE IF NOT EXISTS registered_messages (
+                guild_id INTEGER,
+                channel_id INTEGER,
+                purpose TEXT,
+                message_id INTEGER,
+                PRIMARY KEY (guild_id, channel_id, purpose)
+            )'''
+        )
+
+    async def ready(self):
+        """Waits for the table to exist; raises if creating or migrating it failed."""
+        await asyncio.wrap_future(self.schema)
+
+    async def get(self, guild_id, channel_id, purpose):
+        row = await self.db.fetchone(
+            "SELECT message_id FROM registered_messages WHERE guild_id = ? AND channel_id = ? AND purpose = ?",
+            (guild_id, channel_id, purpose)
+        )
+        return row[0] if row else None
+
+    async def set(self, guild_id, channel_id, purpose, message_id):
+        await self.db.execute(
+            "INSERT OR REPLACE INTO registered_messages (guild_id, channel_id, purpose, message_id) VALUES (?, ?, ?, ?)",
+            (guild_id, channel_id, purpose, message_id)
+        )
+
+    async def delete(self, guild_id, channel_id, purpose):
+        await self.db.execute(
+            "DELETE FROM registered_messages WHERE guild_id = ? AND channel_id = ? AND purpose = ?",
+            (guild_id, channel_id, purpose)
+        )
+
+    async def all(self, purpose=None):
+        """Returns (guild_id, channel_id, purpose, message_id) rows, optionally for one purpose."""
+        if purpose is None:
+            return await self.db.fetchall("SELECT guild_id, channel_id, purpose, message_id FROM registered_messages")
+        return await self.db.fetchall(
+            "SELECT guild_id, channel_id, purpose, message_id FROM registered_messages WHERE purpose = ?",
+            (purpose,)
+        )
+
+
+# One registry (and one writer thread) shared by every cog
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = MessageRegistry()
+    return _registry
@@ -1,69 +1,306 @@
 import discord
 from discord.ext import commands
-import sqlite3
 import logging
+import asyncio
+import os
 import re
+import shutil
+import tempfile
+import time
 from datetime import timedelta
+from typing import Optional
+import log_export
+import outbound
+import perf
+from datastore import Datastore
+from guild_config import SETTINGS, get_config
+from member_cache import get_member_cache
+from scheduler import get_scheduler
 
-# Logging setup
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("moderation.log"),
-        logging.StreamHandler()
-    ]
-)
+# Number of log entries shown per !logs page
+LOGS_PAGE_SIZE = 5
+# Log entries per !pardon page (Discord's maximum number of select options)
+PARDON_PAGE_SIZE = 25
+# Concurrent kick requests during !masskick (discord.py waits out any 429s per route)
+MASS_ACTION_CONCURRENCY = 5
+# Concurrent DMs during !masswarn; every DM channel is its own route, so only the global limit applies
+MASS_DM_CONCURRENCY = 10
+# Users per bulk ban request (Discord's maximum)
+BULK_BAN_CHUNK = 200
+# Mentions (<@id> / <@!id>) or raw user IDs
+TARGET_PATTERN = re.compile(r"<@!?(\d{15,20})>|(\d{15,20})")
+# !modstats windows in days (counted back from today, UTC)
+MODSTATS_WINDOWS = {"day": 1, "week": 7, "month": 30}
+# !logsearch ranks by bm25 up to this many matches; broader searches list the newest first,
+# since scoring every match of a very common word costs hundreds of milliseconds
+SEARCH_RANK_LIMIT = 5000
+# Attachments per message (Discord's maximum)
+FILES_PER_MESSAGE = 10
+# Longest timeout Discord accepts; longer mutes are renewed by the scheduler before they lapse
+MAX_TIMEOUT = timedelta(days=28)
+TIMEOUT_RENEW_MARGIN = timedelta(hours=1)
+# A leading duration in a !warn reason (e.g. "!warn @user 30d spamming") makes the warn expire
+DURATION_PATTERN = re.compile(r"\d+[smhd]")
+
+log = logging.getLogger(__name__)
+
+
+def create_schema(conn):
+    """Creates the moderation tables, indexes and triggers (idempotent)."""
+    conn.execute(
+        '''CREATE TABLE IF NOT EXISTS logs (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            action TEXT,
+            reason TEXT,
+            moderator_id TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expired_at TIMESTAMP,
+            guild_id INTEGER
+        )'''
+    )
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(logs)")}
+    # Expired warns keep their row (history, exports, !modstats) and are hidden from !logs and !pardon
+    if "expired_at" not in columns:
+        conn.execute("ALTER TABLE logs ADD COLUMN expired_at TIMESTAMP")
+    # Every query is scoped to one guild. Rows written before this column existed stay NULL,
+    # visible to no guild, until assign_legacy_logs() gives them to the original server.
+    if "guild_id" not in columns:
+        conn.execute("ALTER TABLE logs ADD COLUMN guild_id INTEGER")
+    # Serves the per-user, newest-first lookups used by !logs and !pardon
+    conn.execute("DROP INDEX IF EXISTS idx_logs_user_time")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_guild_user_time ON logs (guild_id, user_id, timestamp)")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    # Daily counts per guild, moderator and action behind !modstats. The triggers keep them in
+    # step with every logged action and pardon, so stats never scan the logs table.
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'modstats_by_guild'").fetchone() is None:
+        # The rollup predates per-guild logs: drop it and rebuild it keyed by guild below
+        conn.execute("DROP TRIGGER IF EXISTS logs_modstats_insert")
+        conn.execute("DROP TRIGGER IF EXISTS logs_modstats_delete")
+        conn.execute("DROP TABLE IF EXISTS modstats_daily")
+        conn.execute("DELETE FROM meta WHERE key = 'modstats_backfilled'")
+        conn.execute("INSERT INTO meta (key, value) VALUES ('modstats_by_guild', datetime('now'))")
+    conn.execute(
+        '''CREATE TABLE IF NOT EXISTS modstats_daily (
+            guild_id INTEGER,
+            day TEXT,
+            moderator_id TEXT,
+            action TEXT,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, day, moderator_id, action)
+        ) WITHOUT ROWID'''
+    )
+    # Legacy rows (guild_id NULL) are counted under guild 0 until they are assigned
+    conn.execute(
+        '''CREATE TRIGGER IF NOT EXISTS logs_modstats_insert AFTER INSERT ON logs BEGIN
+            INSERT INTO modstats_daily (guild_id, day, moderator_id, action, count)
+            VALUES (COALESCE(NEW.guild_id, 0), date(NEW.timestamp), NEW.moderator_id, NEW.action, 1)
+            ON CONFLICT (guild_id, day, moderator_id, action) DO UPDATE SET count = count + 1;
+        END'''
+    )
+    conn.execute(
+        '''CREATE TRIGGER IF NOT EXISTS logs_modstats_delete AFTER DELETE ON logs BEGIN
+            UPDATE modstats_daily SET count = count - 1
+            WHERE guild_id = COALESCE(OLD.guild_id, 0) AND day = date(OLD.timestamp)
+              AND moderator_id = OLD.moderator_id AND action = OLD.action;
+            DELETE FROM modstats_daily
+            WHERE guild_id = COALESCE(OLD.guild_id, 0) AND day = date(OLD.timestamp)
+              AND moderator_id = OLD.moderator_id AND action = OLD.action AND count <= 0;
+        END'''
+    )
+    # One-time backfill for logs written before the rollup existed; runs in the same
+    # transaction as the triggers, so no row is counted twice or missed
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'modstats_backfilled'").fetchone() is None:
+        rebuild_modstats(conn)
+        conn.execute("INSERT INTO meta (key, value) VALUES ('modstats_backfilled', datetime('now'))")
+
+    # Full-text index over reasons for !logsearch. It is external-content (the text lives
+    # only in logs) and is kept in sync by triggers, including pardons.
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(reason, content='logs', content_rowid='log_id')"
+    )
+    conn.execute(
+        '''CREATE TRIGGER IF NOT EXISTS logs_fts_insert AFTER INSERT ON logs BEGIN
+            INSERT INTO logs_fts (rowid, reason) VALUES (NEW.log_id, NEW.reason);
+        END'''
+    )
+    conn.execute(
+        '''CREATE TRIGGER IF NOT EXISTS logs_fts_delete AFTER DELETE ON logs BEGIN
+            INSERT INTO logs_fts (logs_fts, rowid, reason) VALUES ('delete', OLD.log_id, OLD.reason);
+        END'''
+    )
+    conn.execute(
+        '''CREATE TRIGGER IF NOT EXISTS logs_fts_update AFTER UPDATE OF reason ON logs BEGIN
+            INSERT INTO logs_fts (logs_fts, rowid, reason) VALUES ('delete', OLD.log_id, OLD.reason);
+            INSERT INTO logs_fts (rowid, reason) VALUES (NEW.log_id, NEW.reason);
+        END'''
+    )
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'fts_built'").fetchone() is None:
+        conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO meta (key, value) VALUES ('fts_built', datetime('now'))")
+
+
+def rebuild_modstats(conn):
+    """Recounts the whole !modstats rollup from logs."""
+    conn.execute("DELETE FROM modstats_daily")
+    conn.execute(
+        '''INSERT INTO modstats_daily (guild_id, day, moderator_id, action, count)
+        SELECT COALESCE(guild_id, 0), date(timestamp), moderator_id, action, COUNT(*) FROM logs
+        GROUP BY COALESCE(guild_id, 0), date(timestamp), moderator_id, action'''
+    )
+
+
+def assign_legacy_logs(conn, guild_id):
+    """
+    Gives the logs written before logs were per guild (guild_id NULL) to guild_id and
+    recounts the rollup. Returns the number of rows assigned.
+    """
+    assigned = conn.execute("UPDATE logs SET guild_id = ? WHERE guild_id IS NULL", (guild_id,)).rowcount
+    if assigned:
+        rebuild_modstats(conn)
+    return assigned
+
+
+def fts_query(text):
+    """
+    Turns free text into an FTS5 query: every word must match, as a literal token
+    (operators and punctuation are not interpreted). A trailing * keeps prefix matching.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def search_page(conn, guild_id, match, page_index=0):
+    """
+    Fetch one page of a guild's full-text matches plus the total number of matches. Matches are
+    ranked by bm25, or listed newest first when there are more than SEARCH_RANK_LIMIT.
+    Each row is (log_id, action, reason snippet, timestamp, moderator_id, user_id); expired
+    warns are included, with " (expired)" after the action.
+    """
+    # The unary + keeps SQLite from driving the join from the guild index (a scan of every
+    # log in the guild, each probed against the FTS match) instead of from the match
+    total = conn.execute(
+        "SELECT COUNT(*) FROM logs_fts JOIN logs ON logs.log_id = logs_fts.rowid WHERE logs_fts MATCH ? AND +logs.guild_id = ?",
+        (match, guild_id)
+    ).fetchone()[0]
+    order = "rank" if total <= SEARCH_RANK_LIMIT else "logs_fts.rowid DESC"
+    rows = conn.execute(
+        f'''SELECT logs.log_id,
+                  logs.action || CASE WHEN logs.expired_at IS NULL THEN '' ELSE ' (expired)' END,
+                  snippet(logs_fts, 0, '**', '**', '...', 16),
+                  logs.timestamp, logs.moderator_id, logs.user_id
+           FROM logs_fts JOIN logs ON logs.log_id = logs_fts.rowid
+           WHERE logs_fts MATCH ? AND +logs.guild_id = ? ORDER BY {order} LIMIT ? OFFSET ?''',
+        (match, guild_id, LOGS_PAGE_SIZE, page_index * LOGS_PAGE_SIZE)
+    ).fetchall()
+    return rows, total
 
 class Moderation(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # Connect to moderation.db (it will be created if it doesn't exist)
-        self.db = sqlite3.connect("moderation.db")
-        self.cursor = self.db.cursor()
-        self.create_table()
+        # moderation.db is served by a writer thread so SQLite never blocks the event loop
+        self.db = Datastore("moderation.db")
+        self.schema = self.create_table()  # Awaited in cog_load
+        # DMs and confirmations are sent in the background so commands return immediately
+        self.outbound = outbound.get_outbound()
+        # Tempbans, long mutes and warn expiry survive restarts as persisted scheduled actions
+        self.scheduler = get_scheduler()
+        # Moderator and pardon roles are per-guild settings
+        self.config = get_config()
+        # Member lookups by ID (mass actions, scheduled mute renewals) share one TTL cache
+        self.members = get_member_cache()
+        self.legacy_checked = False  # on_ready fires again on every gateway reconnect
+
+    async def cog_load(self):
+        # A failed CREATE TABLE or migration must fail the extension load, not every later query
+        await asyncio.wrap_future(self.schema)
+        await self.config.load()
+        self.outbound.start()
+        self.scheduler.register("moderation.unban", self.expire_tempban)
+        self.scheduler.register("moderation.renew_mute", self.renew_mute)
+        self.scheduler.register("moderation.expire_warn", self.expire_warn)
+        # Actions that came due while the bot was offline run as soon as the bot is ready
+        await self.scheduler.start()
+
+    async def cog_unload(self):
+        # Flush any queued log rows before the cog goes away
+        await self.db.close()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """
+        Logs written before they were stored per guild belong to the server the bot was
+        written for: the guild that has the default moderator role (or the only guild).
+        """
+        if self.legacy_checked:
+            return
+        self.legacy_checked = True
+        if await self.db.fetchone("SELECT 1 FROM logs WHERE guild_id IS NULL LIMIT 1") is None:
+            return
+        default_role = SETTINGS["moderator_role"][1]
+        homes = [guild for guild in self.bot.guilds if guild.get_role(default_role)]
+        if not homes and len(self.bot.guilds) == 1:
+            homes = self.bot.guilds
+        if len(homes) != 1:
+            return log.warning("Could not tell which server the logs from before per-server logs belong to; they stay hidden.")
+        assigned = await self.db.run(lambda conn: assign_legacy_logs(conn, homes[0].id))
+        log.info(f"Assigned {assigned} log(s) from before per-server logs to {homes[0].name}.")
 
     def create_table(self):
-        # Create table if it doesn't exist
-        self.cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS logs (
-                log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                action TEXT,
-                reason TEXT,
-                moderator_id TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )'''
-        )
-        self.db.commit()
+        # Create tables if they don't exist (queued ahead of every other query)
+        return self.db.submit(create_schema)
 
-    def log_action(self, user_id, action, reason, moderator_id):
-        # Insert a new log entry into the database
-        self.cursor.execute(
-            "INSERT INTO logs (user_id, action, reason, moderator_id) VALUES (?, ?, ?, ?)",
-            (str(user_id), action, reason, str(moderator_id))
+    async def log_action(self, guild_id, user_id, action, reason, moderator_id):
+        # Insert a new log entry; concurrent calls share a single commit
+        return await self.db.insert(
+            "INSERT INTO logs (guild_id, user_id, action, reason, moderator_id) VALUES (?, ?, ?, ?, ?)",
+            (guild_id, str(user_id), action, reason, str(moderator_id))
         )
-        self.db.commit()
 
-    async def dm_user(self, user: discord.Member, message: str):
-        # Attempt to DM the user; log an error if it fails
-        try:
-            await user.send(message)
-        except Exception as e:
-            logging.error(f"Could not DM user {user.id}: {e}")
+    def dm_user(self, user: discord.Member, message: str, then=None):
+        """
+        Queue a DM to the user; closed DMs are logged by the outbound queue.
+        `then` runs as its own task once the DM was sent or given up (used to ban only after the DM went out);
+        a queued DM with a follow-up is never evicted. Returns False if the queue was full and
+        the DM was dropped, in which case the caller runs the follow-up itself.
+        """
+        return self.outbound.send_message(outbound.BACKGROUND, user, message, then=then)
+
+    def confirm(self, ctx, message: str):
+        # Moderator confirmations go out ahead of DMs and audit posts
+        self.outbound.send_message(outbound.CONFIRMATION, ctx.channel, message)
 
     @commands.command()
     async def warn(self, ctx, member: discord.Member, *, reason: str):
         """
-        Warn a user. Usage: !warn @user <reason>
+        Warn a user. Usage: !warn @user [time] <reason>
+        With a time (e.g. 30d) the warn expires: it leaves !logs and !pardon, but stays in
+        !logsearch, !exportlogs and !modstats.
         """
-        # Only allowed for moderators with role ID 1342611104249024512
-        if not any(role.id == 1342611104249024512 for role in ctx.author.roles):
+        # Only allowed for members with the guild's moderator role
+        if not self.config.has_role(ctx.author, "moderator_role"):
             return await ctx.send("You don't have permission to use this command.", delete_after=10)
         try:
-            self.log_action(member.id, "WARN", reason, ctx.author.id)
-            await self.dm_user(member, f"You have been warned for: {reason}")
-            await ctx.send(f"{member.mention} has been warned for: {reason}")
+            expires, _, rest = reason.partition(" ")
+            if rest.strip() and DURATION_PATTERN.fullmatch(expires):
+                reason = rest.strip()
+            else:
+                expires = None
+            log_id = await self.log_action(ctx.guild.id, member.id, "WARN", reason, ctx.author.id)
+            if expires:
+                await self.scheduler.schedule(
+                    "moderation.expire_warn",
+                    self.parse_time(expires).total_seconds(),
+                    {"user_id": member.id, "log_id": log_id}
+                )
+            self.dm_user(member, f"You have been warned for: {reason}" + (f" (expires in {expires})" if expires else ""))
+            self.confirm(ctx, f"{member.mention} has been warned for: {reason}" + (f" (expires in {expires})" if expires else ""))
         except Exception as e:
             await ctx.send(f"Error: {e}")
 
@@ -71,16 +308,23 @@ class Moderation(commands.Cog):
     async def mute(self, ctx, member: discord.Member, time: str, *, reason: str):
         """
         Mute a user using Discord's timeout feature. Usage: !mute @user <time> <reason>
-        Time should be in the format (e.g., 10s, 5m, 2h, 1d)
+        Time should be in the format (e.g., 10s, 5m, 2h, 1d). Mutes longer than 28 days
+        are renewed automatically until they run out.
         """
-        if not any(role.id == 1342611104249024512 for role in ctx.author.roles):
+        if not self.config.has_role(ctx.author, "moderator_role"):
             return await ctx.send("You don't have permission to use this command.", delete_after=10)
         try:
             duration = self.parse_time(time)
-            self.log_action(member.id, "MUTE", reason, ctx.author.id)
-            await member.timeout(duration, reason=reason)
-            await self.dm_user(member, f"You have been muted for {time} for: {reason}")
-            await ctx.send(f"{member.mention} has been muted for {time} for: {reason}")
+            await self.log_action(ctx.guild.id, member.id, "MUTE", reason, ctx.author.id)
+            await member.timeout(min(duration, MAX_TIMEOUT), reason=reason)
+            self.members.invalidate(ctx.guild.id, member.id)
+            if duration > MAX_TIMEOUT:
+                now = discord.utils.utcnow()
+                await self.schedule_mute_renewal(
+                    ctx.guild.id, member.id, (now + duration).timestamp(), (now + MAX_TIMEOUT).timestamp()
+                )
+            self.dm_user(member, f"You have been muted for {time} for: {reason}")
+            self.confirm(ctx, f"{member.mention} has been muted for {time} for: {reason}")
         except Exception as e:
             await ctx.send(f"Error: {e}")
 
@@ -109,14 +353,23 @@ class Moderation(commands.Cog):
         """
         Softban a user: Ban and immediately unban to clear messages. Usage: !softban @user <reason>
         """
-        if not any(role.id == 1342611104249024512 for role in ctx.author.roles):
+        if not self.config.has_role(ctx.author, "moderator_role"):
             return await ctx.send("You don't have permission to use this command.", delete_after=10)
         try:
-            self.log_action(member.id, "SOFTBAN", reason, ctx.author.id)
-            await self.dm_user(member, f"You have been softbanned for: {reason}")
-            await ctx.send(f"{member.mention} has been softbanned for: {reason}")
-            await member.ban(delete_message_days=1, reason=reason)
-            await ctx.guild.unban(member, reason="Softban: Unbanned after ban")
+            await self.log_action(ctx.guild.id, member.id, "SOFTBAN", reason, ctx.author.id)
+
+            # The member must still share the server to receive the DM, so ban after it was attempted
+            async def softban_member():
+                try:
+                    await member.ban(delete_message_days=1, reason=reason)
+                    await ctx.guild.unban(member, reason="Softban: Unbanned after ban")
+                except Exception as e:
+                    return self.confirm(ctx, f"Error: {e}")
+                # Confirmed only once it happened; the ban waits behind the DM
+                self.confirm(ctx, f"{member.mention} has been softbanned for: {reason}")
+
+            if not self.dm_user(member, f"You have been softbanned for: {reason}", then=softban_member):
+                await softban_member()
         except Exception as e:
             await ctx.send(f"Error: {e}")
 
@@ -125,127 +378,676 @@ class Moderation(commands.Cog):
         """
         Permanently ban a user. Usage: !ban @user <reason>
         """
-        if not any(role.id == 1342611104249024512 for role in ctx.author.roles):
+        if not self.config.has_role(ctx.author, "moderator_role"):
+            return await ctx.send("You don't have permission to use this command.", delete_after=10)
+        try:
+            await self.log_action(ctx.guild.id, member.id, "BAN", reason, ctx.author.id)
+
+            # The member must still share the server to receive the DM, so ban after it was attempted
+            async def ban_member():
+                try:
+                    await member.ban(reason=reason)
+                except Exception as e:
+                    return self.confirm(ctx, f"Error: {e}")
+                self.confirm(ctx, f"{member.mention} has been banned for: {reason}")
+
+            if not self.dm_user(member, f"You have been banned for: {reason}", then=ban_member):
+                await ban_member()
+        except Exception as e:
+            await ctx.send(f"Error: {e}")
+
+    @commands.command()
+    async def tempban(self, ctx, member: discord.Member, time: str, *, reason: str):
+        """
+        Ban a user for a while; they are unbanned automatically, even across restarts.
+        Usage: !tempban @user <time> <reason> (e.g. 7d)
+        """
+        if not self.config.has_role(ctx.author, "moderator_role"):
+            return await ctx.send("You don't have permission to use this command.", delete_after=10)
+        try:
+            duration = self.parse_time(time)
+            await self.log_action(ctx.guild.id, member.id, "TEMPBAN", reason, ctx.author.id)
+
+            async def ban_member():
+                try:
+                    await member.ban(reason=f"{reason} (temporary: {time})")
+                except Exception as e:
+                    return self.confirm(ctx, f"Error: {e}")
+                await self.scheduler.schedule(
+                    "moderation.unban",
+                    duration.total_seconds(),
+                    {"guild_id": ctx.guild.id, "user_id": member.id}
+                )
+                self.confirm(ctx, f"{member.mention} has been banned for {time} for: {reason}")
+
+            if not self.dm_user(member, f"You have been banned for {time} for: {reason}", then=ban_member):
+                await ban_member()
+        except Exception as e:
+            await ctx.send(f"Error: {e}")
+
+    # --------------------------
+    # Scheduled actions
+    # --------------------------
+    async def schedule_mute_renewal(self, guild_id, user_id, until, timeout_until):
+        # Renew shortly before the current 28-day timeout lapses; `until` is when the mute ends
+        await self.scheduler.schedule(
+            "moderation.renew_mute",
+            (MAX_TIMEOUT - TIMEOUT_RENEW_MARGIN).total_seconds(),
+            {"guild_id": guild_id, "user_id": user_id, "until": until, "timeout_until": timeout_until}
+        )
+
+    async def expire_tempban(self, payload):
+        await self.bot.wait_until_ready()
+        guild = self.bot.get_guild(payload["guild_id"])
+        if guild is None or guild.unavailable:
+            # Raising makes the scheduler retry with backoff instead of leaving the user banned
+            raise RuntimeError(f"guild {payload['guild_id']} is unavailable")
+        try:
+            await guild.unban(discord.Object(payload["user_id"]), reason="Temporary ban expired")
+            log.info(f"Temporary ban of {payload['user_id']} expired; user unbanned.")
+        except discord.NotFound:
+            log.info(f"Temporary ban of {payload['user_id']} expired, but the user was already unbanned.")
+
+    async def renew_mute(self, payload):
+        await self.bot.wait_until_ready()
+        remaining = timedelta(seconds=payload["until"] - time.time())
+        guild = self.bot.get_guild(payload["guild_id"])
+        if remaining.total_seconds() <= 0 or guild is None:
+            return
+        # The shared member cache answers from discord.py's cache, its own TTL cache, then one chunk query
+        member = (await self.members.resolve(guild, [payload["user_id"]])).get(payload["user_id"])
+        if member is None:
+            return log.info(f"Could not renew the mute of {payload['user_id']}: no longer in the server.")
+        if not member.is_timed_out() and time.time() < payload["timeout_until"]:
+            # A moderator lifted the timeout early; the mute is over. (A timeout that lapsed
+            # while the bot was offline is past timeout_until and gets re-applied below.)
+            return log.info(f"Mute of {member} was lifted early; not renewing it.")
+        timeout = min(remaining, MAX_TIMEOUT)
+        await member.timeout(timeout, reason="Long mute renewed")
+        self.members.invalidate(guild.id, member.id)  # The cached copy still has the old timeout
+        if remaining > MAX_TIMEOUT:
+            await self.schedule_mute_renewal(guild.id, member.id, payload["until"], time.time() + timeout.total_seconds())
+
+    async def expire_warn(self, payload):
+        expired = await self.db.execute(
+            "UPDATE logs SET expired_at = CURRENT_TIMESTAMP WHERE log_id = ? AND user_id = ? AND expired_at IS NULL",
+            (payload["log_id"], str(payload["user_id"]))
+        )
+        if expired:
+            log.info(f"Warn {payload['log_id']} for {payload['user_id']} expired.")
+
+    @commands.command()
+    async def massban(self, ctx, *, args: str):
+        """
+        Ban many users at once. Usage: !massban @user1 @user2 <id> ... <reason>
+        or !massban --joined <time> <reason> to ban everyone who joined in the last <time> (e.g. 10m).
+        """
+        await self.run_mass_action(ctx, "BAN", args)
+
+    @commands.command()
+    async def masskick(self, ctx, *, args: str):
+        """
+        Kick many users at once. Usage: !masskick @user1 @user2 <id> ... <reason>
+        or !masskick --joined <time> <reason>
+        """
+        await self.run_mass_action(ctx, "KICK", args)
+
+    @commands.command()
+    async def masswarn(self, ctx, *, args: str):
+        """
+        Warn many users at once. Usage: !masswarn @user1 @user2 <id> ... <reason>
+        or !masswarn --joined <time> <reason>
+        """
+        await self.run_mass_action(ctx, "WARN", args)
+
+    def parse_mass_targets(self, guild, args):
+        """
+        Split mass-command arguments into (target IDs, reason).
+        Targets are the leading mentions/IDs, or everyone who joined within `--joined <time>`
+        (the latter needs the members intent so guild.members is populated).
+        """
+        tokens = args.split()
+        if tokens and tokens[0] == "--joined":
+            if len(tokens) < 2:
+                raise ValueError("Usage: --joined <time> <reason>")
+            if not self.bot.intents.members:
+                # Without the intent guild.members holds almost nobody, so the answer would be wrong
+                raise ValueError("--joined needs the server members intent, which this bot does not request. List the targets instead.")
+            cutoff = discord.utils.utcnow() - self.parse_time(tokens[1])
+            targets = [
+                member.id for member in guild.members
+                if member.joined_at and member.joined_at >= cutoff and not member.bot
+            ]
+            return targets, " ".join(tokens[2:])
+
+        targets = []
+        index = 0
+        for index, token in enumerate(tokens):
+            match = TARGET_PATTERN.fullmatch(token)
+            if not match:
+                break
+            targets.append(int(match.group(1) or match.group(2)))
+        else:
+            index = len(tokens)
+        return list(dict.fromkeys(targets)), " ".join(tokens[index:])
+
+    async def run_mass_action(self, ctx, action, args):
+        if not self.config.has_role(ctx.author, "moderator_role"):
             return await ctx.send("You don't have permission to use this command.", delete_after=10)
         try:
-            self.log_action(member.id, "BAN", reason, ctx.author.id)
-            await self.dm_user(member, f"You have been banned for: {reason}")
-            await ctx.send(f"{member.mention} has been banned for: {reason}")
-            await member.ban(reason=reason)
+            started = time.perf_counter()
+            targets, reason = self.parse_mass_targets(ctx.guild, args)
+            # Never act on the moderator or the bot itself
+            targets = [user_id for user_id in targets if user_id not in (ctx.author.id, self.bot.user.id)]
+            if not targets:
+                return await ctx.send("No targets found.")
+            if not reason:
+                return await ctx.send("Please provide a reason.")
+
+            if action == "BAN":
+                succeeded, failed = await self.mass_ban(ctx.guild, targets, reason)
+            elif action == "KICK":
+                succeeded, failed = await self.mass_kick(ctx.guild, targets, reason)
+            else:
+                succeeded, failed = await self.mass_warn(ctx.guild, targets, reason)
+
+            # One transaction for every log row
+            await self.db.executemany(
+                "INSERT INTO logs (guild_id, user_id, action, reason, moderator_id) VALUES (?, ?, ?, ?, ?)",
+                [(ctx.guild.id, str(user_id), action, reason, str(ctx.author.id)) for user_id in succeeded]
+            )
+            await ctx.send(embed=self.create_mass_summary_embed(
+                action, targets, succeeded, failed, reason, time.perf_counter() - started
+            ))
         except Exception as e:
             await ctx.send(f"Error: {e}")
 
+    async def mass_ban(self, guild, targets, reason):
+        """Bans in chunks of 200 per request; returns (succeeded IDs, failed IDs)."""
+        succeeded, failed = [], []
+        for i in range(0, len(targets), BULK_BAN_CHUNK):
+            chunk = targets[i:i + BULK_BAN_CHUNK]
+            try:
+                result = await guild.bulk_ban([discord.Object(id=user_id) for user_id in chunk], reason=reason, delete_message_seconds=0)
+                succeeded.extend(user.id for user in result.banned)
+                failed.extend(user.id for user in result.failed)
+            except Exception as e:
+                log.error(f"Bulk ban of {len(chunk)} user(s) failed: {e}")
+                failed.extend(chunk)
+        return succeeded, failed
+
+    async def mass_kick(self, guild, targets, reason):
+        succeeded, failed = [], []
+        semaphore = asyncio.Semaphore(MASS_ACTION_CONCURRENCY)
+
+        async def kick(user_id):
+            async with semaphore:
+                try:
+                    await guild.kick(discord.Object(id=user_id), reason=reason)
+                    succeeded.append(user_id)
+                except Exception as e:
+                    log.warning(f"Could not kick {user_id}: {e}")
+                    failed.append(user_id)
+
+        await asyncio.gather(*(kick(user_id) for user_id in targets))
+        return succeeded, failed
+
+    async def mass_warn(self, guild, targets, reason):
+        """
+        Warnings are a DM, sent directly (not through the outbound queue, which is bounded and
+        shared with confirmations). A target succeeded only if it is a member and the DM arrived.
+        """
+        members = await self.members.resolve(guild, targets)
+        delivered = set()
+        semaphore = asyncio.Semaphore(MASS_DM_CONCURRENCY)
+
+        async def warn(member):
+            async with semaphore:
+                try:
+                    await member.send(f"You have been warned for: {reason}")
+                    delivered.add(member.id)
+                except Exception as e:
+                    log.info(f"Could not DM the warning to {member.id}: {e}")
+
+        await asyncio.gather(*(warn(member) for member in members.values()))
+        succeeded = [user_id for user_id in targets if user_id in delivered]
+        failed = [user_id for user_id in targets if user_id not in delivered]
+        return succeeded, failed
+
+    def create_mass_summary_embed(self, action, targets, succeeded, failed, reason, elapsed):
+        embed = discord.Embed(
+            title=f"Mass {action.lower()} complete",
+            color=discord.Color.green() if not failed else discord.Color.orange()
+        )
+        embed.add_field(name="Targets", value=str(len(targets)), inline=True)
+        embed.add_field(name="Succeeded", value=str(len(succeeded)), inline=True)
+        embed.add_field(name="Failed", value=str(len(failed)), inline=True)
+        embed.add_field(name="Reason", value=reason[:1024], inline=False)
+        if failed:
+            shown = ", ".join(f"<@{user_id}>" for user_id in failed[:20])
+            if len(failed) > 20:
+                shown += f" and {len(failed) - 20} more"
+            embed.add_field(name="Failed users", value=shown, inline=False)
+        embed.set_footer(text=f"Finished in {elapsed:.1f}s")
+        return embed
+
     @commands.command()
     async def logs(self, ctx, member: discord.Member):
         """
         Display the moderation logs for a user in pages of 5 entries. Usage: !logs @user
         """
-        if not any(role.id == 1342611104249024512 for role in ctx.author.roles):
+        if not self.config.has_role(ctx.author, "moderator_role"):
             return await ctx.send("You don't have permission to use this command.", delete_after=10)
         try:
-            self.cursor.execute(
-                "SELECT log_id, action, reason, timestamp, moderator_id FROM logs WHERE user_id = ? ORDER BY timestamp DESC",
-                (str(member.id),)
-            )
-            logs_data = self.cursor.fetchall()
+            logs_data, total = await self.fetch_logs_page(ctx.guild.id, member.id)
             if not logs_data:
                 return await ctx.send("No logs found for that user.")
-            pages = [logs_data[i:i+5] for i in range(0, len(logs_data), 5)]
-            current_page = 0
-            embed = self.create_logs_embed(member, pages, current_page)
-            view = LogsView(pages, current_page, member, self)
+            view = LogsView(member, self, logs_data, total)
+            embed = self.create_logs_embed(member, logs_data, view.current_page, view.page_count)
             await ctx.send(embed=embed, view=view)
         except Exception as e:
             await ctx.send(f"Error: {e}")
 
-    def create_logs_embed(self, member, pages, page_index):
+    async def fetch_logs_page(self, guild_id, user_id, after=None, before=None, page_size=LOGS_PAGE_SIZE):
+        """
+        Fetch one page of a user's active logs in a guild (newest first, expired warns left out) plus their count.
+        Uses keyset pagination on (timestamp, log_id): pass the key of the last row of the
+        current page as `after` for the next page, or of the first row as `before` for the previous one.
+        """
+        user_id = str(user_id)
+
+        def query(conn):
+            columns = (
+                "SELECT log_id, action, reason, timestamp, moderator_id FROM logs "
+                "WHERE guild_id = ? AND user_id = ? AND expired_at IS NULL"
+            )
+            if after is not None:
+                rows = conn.execute(
+                    f"{columns} AND (timestamp, log_id) < (?, ?) ORDER BY timestamp DESC, log_id DESC LIMIT ?",
+                    (guild_id, user_id, *after, page_size)
+                ).fetchall()
+            elif before is not None:
+                rows = conn.execute(
+                    f"{columns} AND (timestamp, log_id) > (?, ?) ORDER BY timestamp ASC, log_id ASC LIMIT ?",
+                    (guild_id, user_id, *before, page_size)
+                ).fetchall()
+                rows.reverse()
+            else:
+                rows = conn.execute(
+                    f"{columns} ORDER BY timestamp DESC, log_id DESC LIMIT ?",
+                    (guild_id, user_id, page_size)
+                ).fetchall()
+            total = conn.execute(
+                "SELECT COUNT(*) FROM logs WHERE guild_id = ? AND user_id = ? AND expired_at IS NULL", (guild_id, user_id)
+            ).fetchone()[0]
+            return rows, total
+
+        return await self.db.read(query)
+
+    def create_logs_embed(self, member, logs_data, page_index, page_count):
         embed = discord.Embed(
             title=f"Logs for {member}",
             description="Below are the moderation logs:",
             color=discord.Color.blue()
         )
-        for log in pages[page_index]:
+        for log in logs_data:
             log_id, action, reason, timestamp, moderator_id = log
             embed.add_field(
                 name=f"Log ID: {log_id} - {action}",
                 value=f"Reason: {reason}\nModerator: <@{moderator_id}>\nTimestamp: {timestamp}",
                 inline=False
             )
-        embed.set_footer(text=f"Page {page_index+1} of {len(pages)}")
+        embed.set_footer(text=f"Page {page_index+1} of {page_count}")
         return embed
 
     @commands.command()
     async def pardon(self, ctx, member: discord.Member):
         """
-        Pardon a log entry (remove it from the database) for a user.
-        Only allowed for moderators with roles 1342610409525608479 and 1342610501305372794.
+        Pardon log entries (remove them from the database) for a user, 25 per page.
+        Only allowed for members with one of the guild's pardon roles.
         Usage: !pardon @user
         """
-        allowed_roles = {1342610409525608479, 1342610501305372794}
-        if not any(role.id in allowed_roles for role in ctx.author.roles):
+        if not self.config.has_role(ctx.author, "pardon_roles"):
             return await ctx.send("You don't have permission to pardon logs.", delete_after=10)
         try:
-            self.cursor.execute(
-                "SELECT log_id, action, reason, timestamp FROM logs WHERE user_id = ? ORDER BY timestamp DESC",
-                (str(member.id),)
-            )
-            logs_data = self.cursor.fetchall()
+            logs_data, total = await self.fetch_logs_page(ctx.guild.id, member.id, page_size=PARDON_PAGE_SIZE)
             if not logs_data:
                 return await ctx.send("No logs found for that user.")
-            view = PardonView(member, logs_data, self)
-            await ctx.send("Select a log to pardon:", view=view)
+            view = PardonView(member, self, logs_data, total)
+            await ctx.send(view.describe(), view=view)
+        except Exception as e:
+            await ctx.send(f"Error: {e}")
+
+    async def pardon_logs(self, guild_id, user_id, log_ids):
+        """
+        Delete the given logs in one transaction and return how many were removed. Only rows
+        of user_id in guild_id are touched; the logs triggers update modstats and the search index.
+        """
+        placeholders = ", ".join("?" for _ in log_ids)
+        return await self.db.execute(
+            f"DELETE FROM logs WHERE guild_id = ? AND user_id = ? AND log_id IN ({placeholders})",
+            (guild_id, str(user_id), *(int(log_id) for log_id in log_ids))
+        )
+
+    @commands.command()
+    async def modstats(self, ctx, moderator: Optional[discord.Member] = None, window: str = "week"):
+        """
+        Show how many actions each moderator took, per action type, over a window.
+        Usage: !modstats [@moderator] [day|week|month]
+        """
+        if not self.config.has_role(ctx.author, "moderator_role"):
+            return await ctx.send("You don't have permission to use this command.", delete_after=10)
+        window = window.lower()
+        if window not in MODSTATS_WINDOWS:
+            return await ctx.send(f"Window must be one of: {', '.join(MODSTATS_WINDOWS)}.", delete_after=10)
+        try:
+            totals, daily = await self.fetch_modstats(ctx.guild.id, MODSTATS_WINDOWS[window], moderator.id if moderator else None)
+            if not totals:
+                return await ctx.send("No moderation actions in that window.")
+            await ctx.send(embed=self.create_modstats_embed(window, totals, daily, moderator))
+        except Exception as e:
+            await ctx.send(f"Error: {e}")
+
+    async def fetch_modstats(self, guild_id, days, moderator_id=None):
+        """
+        Read a guild's per-moderator, per-action totals for the last `days` days (today included) from
+        the rollup table; the cost depends on the window, not on the size of logs.
+        Returns (totals, daily) where daily is filled only for a single moderator.
+        """
+        since = f"-{days - 1} days"
+
+        def query(conn):
+            where = "WHERE guild_id = ? AND day >= date('now', ?)"
+            params = [guild_id, since]
+            if moderator_id is not None:
+                where += " AND moderator_id = ?"
+                params.append(str(moderator_id))
+            totals = conn.execute(
+                f"SELECT moderator_id, action, SUM(count) FROM modstats_daily {where} GROUP BY moderator_id, action",
+                params
+            ).fetchall()
+            daily = []
+            if moderator_id is not None:
+                daily = conn.execute(
+                    f"SELECT day, SUM(count) FROM modstats_daily {where} GROUP BY day ORDER BY day DESC",
+                    params
+                ).fetchall()
+            return totals, daily
+
+        return await self.db.read(query)
+
+    def create_modstats_embed(self, window, totals, daily, moderator=None):
+        by_moderator = {}
+        for moderator_id, action, count in totals:
+            by_moderator.setdefault(moderator_id, {})[action] = count
+        ranked = sorted(by_moderator.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        embed = discord.Embed(
+            title=f"Moderation stats for {moderator}" if moderator else "Moderation stats",
+            description=f"Actions over the past {window} ({sum(count for _, _, count in totals)} total).",
+            color=discord.Color.blue()
+        )
+        # Embeds hold at most 25 fields; keep one free for the daily breakdown
+        for moderator_id, actions in ranked[:24]:
+            lines = [f"{action}: {count}" for action, count in sorted(actions.items(), key=lambda a: -a[1])]
+            embed.add_field(name=f"{sum(actions.values())} actions", value=f"<@{moderator_id}>\n" + "\n".join(lines), inline=True)
+        if daily:
+            embed.add_field(name="By day", value="\n".join(f"{day}: {count}" for day, count in daily[:31]), inline=False)
+        if len(ranked) > 24:
+            embed.set_footer(text=f"Showing the 24 most active of {len(ranked)} moderators")
+        return embed
+
+    @commands.command()
+    async def logsearch(self, ctx, *, query: str):
+        """
+        Search this server's log reasons for words or names, best matches first. Usage: !logsearch <words>
+        """
+        if not self.config.has_role(ctx.author, "moderator_role"):
+            return await ctx.send("You don't have permission to use this command.", delete_after=10)
+        match = fts_query(query)
+        if not match:
+            return await ctx.send("Give at least one word to search for.", delete_after=10)
+        try:
+            results, total = await self.search_logs(ctx.guild.id, match)
+            if not results:
+                return await ctx.send("No logs match that search.")
+            view = LogSearchView(ctx.guild.id, query, match, self, results, total)
+            embed = self.create_search_embed(query, results, total, view.current_page, view.page_count)
+            await ctx.send(embed=embed, view=view)
+        except Exception as e:
+            await ctx.send(f"Error: {e}")
+
+    async def search_logs(self, guild_id, match, page_index=0):
+        return await self.db.read(lambda conn: search_page(conn, guild_id, match, page_index))
+
+    def create_search_embed(self, query, results, total, page_index, page_count):
+        if total <= SEARCH_RANK_LIMIT:
+            description = f"{total} matching logs, best matches first:"
+        else:
+            description = f"{total} matching logs, newest first (too many to rank; narrow the search):"
+        embed = discord.Embed(
+            title=f"Logs matching \"{query[:200]}\"",
+            description=description,
+            color=discord.Color.blue()
+        )
+        for log in results:
+            log_id, action, reason, timestamp, moderator_id, user_id = log
+            embed.add_field(
+                name=f"Log ID: {log_id} - {action}",
+                value=f"User: <@{user_id}>\nReason: {reason}\nModerator: <@{moderator_id}>\nTimestamp: {timestamp}"[:1024],
+                inline=False
+            )
+        embed.set_footer(text=f"Page {page_index+1} of {page_count}")
+        return embed
+
+    @commands.command()
+    async def exportlogs(self, ctx, target: str = "all", since: str = None, fmt: str = "csv"):
+        """
+        Export this server's moderation logs as gzip-compressed CSV or JSONL attachments.
+        Usage: !exportlogs [@user|ID|all] [30d|2026-01-31] [csv|jsonl]
+        """
+        if not self.config.has_role(ctx.author, "moderator_role"):
+            return await ctx.send("You don't have permission to use this command.", delete_after=10)
+        user_id = None
+        if target.lower() != "all":
+            match = TARGET_PATTERN.fullmatch(target)
+            if not match:
+                return await ctx.send("Target must be a user mention, a user ID or `all`.", delete_after=10)
+            user_id = int(match.group(1) or match.group(2))
+        fmt = fmt.lower()
+        if fmt not in log_export.FORMATS:
+            return await ctx.send(f"Format must be one of: {', '.join(log_export.FORMATS)}.", delete_after=10)
+        try:
+            start = log_export.parse_since(since) if since else None
+        except ValueError as e:
+            return await ctx.send(str(e), delete_after=10)
+
+        out_dir = tempfile.mkdtemp(prefix="log-export-")
+        try:
+            # Parts must fit this guild's upload limit; the export itself runs in a worker thread
+            result = await asyncio.to_thread(
+                log_export.export_logs, self.db.path, out_dir, user_id, start, fmt, ctx.guild.filesize_limit, ctx.guild.id
+            )
+            if not result["rows"]:
+                return await ctx.send("No logs match that export.")
+            summary = (
+                f"Exported {result['rows']} log(s) for {f'<@{user_id}>' if user_id else 'all users'}"
+                f"{f' since {start} UTC' if start else ''} in {len(result['paths'])} file(s)."
+            )
+            paths = result["paths"]
+            for i in range(0, len(paths), FILES_PER_MESSAGE):
+                files = [discord.File(path, filename=os.path.basename(path)) for path in paths[i:i + FILES_PER_MESSAGE]]
+                await ctx.send(summary if i == 0 else None, files=files, allowed_mentions=discord.AllowedMentions.none())
         except Exception as e:
             await ctx.send(f"Error: {e}")
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
 
-# Pagination view for logs (5 logs per page)
+# Pagination view for logs; holds only the page on screen and fetches neighbours on demand
 class LogsView(discord.ui.View):
-    def __init__(self, pages, current_page, member, cog):
+    def __init__(self, member, cog, logs_data, total):
         super().__init__(timeout=60)
-        self.pages = pages
-        self.current_page = current_page
         self.member = member
         self.cog = cog
+        self.logs_data = logs_data
+        self.total = total
+        self.current_page = 0
+
+    @property
+    def page_count(self):
+        return max(1, -(-self.total // LOGS_PAGE_SIZE))
+
+    async def show_page(self, interaction, logs_data, total, page_index):
+        self.logs_data = logs_data
+        self.total = total
+        self.current_page = min(page_index, self.page_count - 1)
+        embed = self.cog.create_logs_embed(self.member, self.logs_data, self.current_page, self.page_count)
+        await interaction.response.edit_message(embed=embed, view=self)
 
     @discord.ui.button(label="Previous", style=discord.ButtonStyle.blurple)
+    @perf.track
     async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
         if self.current_page > 0:
-            self.current_page -= 1
-            embed = self.cog.create_logs_embed(self.member, self.pages, self.current_page)
-            await interaction.response.edit_message(embed=embed, view=self)
+            first = self.logs_data[0]
+            logs_data, total = await self.cog.fetch_logs_page(self.member.guild.id, self.member.id, before=(first[3], first[0]))
+            if logs_data:
+                await self.show_page(interaction, logs_data, total, self.current_page - 1)
 
     @discord.ui.button(label="Next", style=discord.ButtonStyle.blurple)
+    @perf.track
     async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.current_page < len(self.pages) - 1:
-            self.current_page += 1
-            embed = self.cog.create_logs_embed(self.member, self.pages, self.current_page)
-            await interaction.response.edit_message(embed=embed, view=self)
+        if self.current_page < self.page_count - 1:
+            last = self.logs_data[-1]
+            logs_data, total = await self.cog.fetch_logs_page(self.member.guild.id, self.member.id, after=(last[3], last[0]))
+            if logs_data:
+                await self.show_page(interaction, logs_data, total, self.current_page + 1)
+
+# Pagination view for !logsearch results; pages are fetched by rank on demand
+class LogSearchView(discord.ui.View):
+    def __init__(self, guild_id, query, match, cog, results, total):
+        super().__init__(timeout=60)
+        self.guild_id = guild_id
+        self.query = query
+        self.match = match
+        self.cog = cog
+        self.results = results
+        self.total = total
+        self.current_page = 0
+
+    @property
+    def page_count(self):
+        return max(1, -(-self.total // LOGS_PAGE_SIZE))
+
+    async def show_page(self, interaction, page_index):
+        results, total = await self.cog.search_logs(self.guild_id, self.match, page_index)
+        if not results:
+            return await interaction.response.defer()
+        self.results = results
+        self.total = total
+        self.current_page = page_index
+        embed = self.cog.create_search_embed(self.query, self.results, self.total, self.current_page, self.page_count)
+        await interaction.response.edit_message(embed=embed, view=self)
 
-# View for pardoning a log entry using a dropdown selection
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.blurple)
+    @perf.track
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.current_page > 0:
+            await self.show_page(interaction, self.current_page - 1)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.blurple)
+    @perf.track
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.current_page < self.page_count - 1:
+            await self.show_page(interaction, self.current_page + 1)
+
+# View for pardoning log entries: one page of up to 25 logs in a multi-select, fetched on demand
 class PardonView(discord.ui.View):
-    def __init__(self, member, logs_data, cog):
+    def __init__(self, member, cog, logs_data, total):
         super().__init__(timeout=60)
         self.member = member
-        self.logs_data = logs_data
         self.cog = cog
+        self.total = total
+        self.current_page = 0
+        # Keyset anchors: anchors[i] is the key of the last row before page i (None for the first page)
+        self.anchors = [None]
+        self.select = None
+        self.set_page(logs_data)
+
+    @property
+    def page_count(self):
+        return max(1, -(-self.total // PARDON_PAGE_SIZE))
+
+    def describe(self, status=None):
+        text = f"Select logs to pardon for {self.member.mention} (page {self.current_page + 1} of {self.page_count}, {self.total} total):"
+        return f"{status}\n{text}" if status else text
+
+    def set_page(self, logs_data):
+        self.logs_data = logs_data
+        if self.select:
+            self.remove_item(self.select)
+        self.select = LogSelect(logs_data, self.member, self.cog)
+        self.add_item(self.select)
+        self.previous.disabled = self.current_page == 0
+        self.next.disabled = self.current_page >= self.page_count - 1
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if not self.cog.config.has_role(interaction.user, "pardon_roles"):
+            await interaction.response.send_message("You don't have permission to pardon logs.", ephemeral=True)
+            return False
+        return True
+
+    async def load_page(self):
+        """(Re)fetch the current page from its anchor; steps back if pardons emptied it."""
+        while True:
+            logs_data, self.total = await self.cog.fetch_logs_page(
+                self.member.guild.id, self.member.id, after=self.anchors[-1], page_size=PARDON_PAGE_SIZE
+            )
+            if logs_data or self.current_page == 0:
+                return logs_data
+            self.anchors.pop()
+            self.current_page -= 1
+
+    async def refresh(self, interaction, status=None):
+        logs_data = await self.load_page()
+        if not logs_data:
+            self.stop()
+            return await interaction.response.edit_message(content=f"{status}\nNo logs left for {self.member.mention}.", view=None)
+        self.set_page(logs_data)
+        await interaction.response.edit_message(content=self.describe(status), view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.blurple, row=1)
+    @perf.track
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.current_page > 0:
+            self.anchors.pop()
+            self.current_page -= 1
+        await self.refresh(interaction)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.blurple, row=1)
+    @perf.track
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.current_page < self.page_count - 1:
+            last = self.logs_data[-1]
+            self.anchors.append((last[3], last[0]))
+            self.current_page += 1
+        await self.refresh(interaction)
+
+class LogSelect(discord.ui.Select):
+    def __init__(self, logs_data, member, cog):
         options = []
         for log in logs_data:
-            log_id, action, reason, timestamp = log
+            log_id, action, reason, timestamp, moderator_id = log
             label = f"{log_id} | {action}"
-            description = f"{reason[:50]} at {timestamp}"
+            description = f"{(reason or '')[:50]} at {timestamp}"
             options.append(discord.SelectOption(label=label, description=description, value=str(log_id)))
-        self.add_item(LogSelect(options, member, cog))
-
-class LogSelect(discord.ui.Select):
-    def __init__(self, options, member, cog):
-        super().__init__(placeholder="Select a log to pardon", min_values=1, max_values=1, options=options)
+        super().__init__(placeholder="Select logs to pardon", min_values=1, max_values=len(options), options=options, row=0)
         self.member = member
         self.cog = cog
 
+    @perf.track
     async def callback(self, interaction: discord.Interaction):
-        log_id = self.values[0]
-        self.cog.cursor.execute("DELETE FROM logs WHERE log_id = ?", (log_id,))
-        self.cog.db.commit()
-        await interaction.response.send_message(f"Log {log_id} pardoned for {self.member.mention}.", ephemeral=True)
+        pardoned = await self.cog.pardon_logs(self.member.guild.id, self.member.id, self.values)
+        status = f"Pardoned {pardoned} log(s) for {self.member.mention}: {', '.join(self.values)}."
+        await self.view.refresh(interaction, status)
 
 # Asynchronous setup function for dynamic cog loading
 async def setup(bot: commands.Bot):
@@ -0,0 +1,214 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+
+import discord
+
+log = logging.getLogger(__name__)
+
+# Priority classes; lower values are sent first. Interaction responses are not queued:
+# they must reach Discord within the interaction's deadline, so handlers send them inline.
+CONFIRMATION = 0  # Moderator confirmations in the command channel
+BACKGROUND = 1  # DMs to members and audit-log posts
+PRIORITY_NAMES = {CONFIRMATION: "confirmation", BACKGROUND: "background"}
+
+MAX_QUEUE_SIZE = 1000
+WORKERS = 4
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1.0
+# Per-route token bucket: ROUTE_BURST messages at once, then ROUTE_RATE per second
+ROUTE_RATE = 1.0
+ROUTE_BURST = 5
+# Every DM channel is its own route; idle buckets are dropped once there are this many
+MAX_BUCKETS = 5000
+
+
+class RouteBucket:
+    """Token bucket for one route (a channel, or the DM channel with one user)."""
+
+    def __init__(self, rate=ROUTE_RATE, burst=ROUTE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """Takes a token and returns how many seconds the caller must wait before using it."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def idle(self, now):
+        """True once the bucket has refilled completely (dropping it loses nothing)."""
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class OutboundQueue:
+    """
+    Background sender for messages the command path should not wait on.
+
+    Jobs are ordered by priority class, then by arrival. Each route has its own
+    token bucket; a job whose route is out of tokens is set aside until its turn
+    comes, so a worker never sleeps on one busy route while others are waiting.
+    Failed sends are set aside the same way and retried with exponential backoff
+    (closed DMs and missing permissions are not). Follow-up actions run as their
+    own tasks once the send is settled. The queue is bounded: when it is full a new job
+    evicts the newest job of a lower priority that has no follow-up action (a
+    follow-up, such as the ban after a ban DM, is never thrown away), or is dropped.
+    """
+
+    def __init__(self, max_size=MAX_QUEUE_SIZE, workers=WORKERS):
+        self.max_size = max_size
+        self.workers = workers
+        self._heap = []  # (priority, seq, enqueued_at, route, send, then, attempt)
+        self._seq = itertools.count()
+        self._ready = asyncio.Semaphore(0)
+        self._buckets = {}
+        self._reserved = set()  # seqs of jobs that already hold a token of their route
+        self._deferred = 0  # Jobs waiting outside the heap for their reserved token or a retry
+        self._tasks = []
+        self._follow_ups = set()  # Running follow-up tasks (kept referenced until done)
+        self.stats = {"enqueued": 0, "sent": 0, "failed": 0, "retries": 0, "dropped": 0}
+        self.waits = {priority: deque(maxlen=1000) for priority in PRIORITY_NAMES}
+
+    def start(self):
+        """Starts the workers on the running loop (no-op if they are already running there)."""
+        loop = asyncio.get_running_loop()
+        if self._tasks and not self._tasks[0].done() and self._tasks[0].get_loop() is loop:
+            return
+        self._ready = asyncio.Semaphore(len(self._heap))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def enqueue(self, priority, route, send, then=None):
+        """
+        Queues `send` (a zero-argument callable returning an awaitable) on `route`.
+        `then`, if given, is started as a task once the send has succeeded or given up.
+        Returns False if the job was dropped because the queue is full.
+        """
+        if len(self._heap) + self._deferred >= self.max_size and not self._evict_below(priority):
+            self.stats["dropped"] += 1
+            log.warning(f"Outbound queue full; dropped a {PRIORITY_NAMES[priority]} message for {route}.")
+            return False
+        heapq.heappush(self._heap, (priority, next(self._seq), time.monotonic(), route, send, then, 0))
+        self.stats["enqueued"] += 1
+        self._ready.release()
+        return True
+
+    def _evict_below(self, priority):
+        victims = [job for job in self._heap if job[0] > priority and job[5] is None]
+        if not victims:
+            return False
+        victim = max(victims, key=lambda job: (job[0], job[1]))
+        self._heap.remove(victim)
+        heapq.heapify(self._heap)
+        self._reserved.discard(victim[1])
+        self.stats["dropped"] += 1
+        log.warning(f"Outbound queue full; evicted a {PRIORITY_NAMES[victim[0]]} message for {victim[3]}.")
+        return True
+
+    def send_message(self, priority, destination, *args, then=None, **kwargs):
+        """Shortcut for queueing destination.send(*args, **kwargs)."""
+        if isinstance(destination, (discord.User, discord.Member)):
+            route = f"dm:{destination.id}"
+        else:
+            route = f"channel:{destination.id}"
+        return self.enqueue(priority, route, lambda: destination.send(*args, **kwargs), then=then)
+
+    async def _worker(self):
+        while True:
+            await self._ready.acquire()
+            if not self._heap:
+                continue
+            job = heapq.heappop(self._heap)
+            priority, seq, enqueued_at, route, send, then, attempt = job
+            if seq in self._reserved:
+                self._reserved.discard(seq)
+            else:
+                delay = self._bucket(route).reserve()
+                if delay:
+                    # Holds its token; back in the heap once the token is due
+                    self._reserved.add(seq)
+                    self._deferred += 1
+                    asyncio.get_running_loop().call_later(delay, self._requeue, job)
+                    continue
+            if not attempt:
+                self.waits[priority].append(time.monotonic() - enqueued_at)
+            if not await self._deliver(route, send, attempt):
+                # Back in the heap after the backoff; it takes a fresh token then
+                self.stats["retries"] += 1
+                self._deferred += 1
+                retry = (priority, seq, enqueued_at, route, send, then, attempt + 1)
+                asyncio.get_running_loop().call_later(RETRY_BASE_DELAY * 2 ** attempt, self._requeue, retry)
+                continue
+            if then is not None:
+                task = asyncio.create_task(self._follow_up(route, then))
+                self._follow_ups.add(task)
+                task.add_done_callback(self._follow_ups.discard)
+
+    async def _follow_up(self, route, then):
+        try:
+            await then()
+        except Exception as e:
+            log.error(f"Follow-up action after send on {route} failed: {e}")
+
+    def _requeue(self, job):
+        self._deferred -= 1
+        heapq.heappush(self._heap, job)
+        self._ready.release()
+
+    def _bucket(self, route):
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                now = time.monotonic()
+                self._buckets = {key: value for key, value in self._buckets.items() if not value.idle(now)}
+            bucket = self._buckets[route] = RouteBucket()
+        return bucket
+
+    async def _deliver(self, route, send, attempt):
+        """Makes one send attempt; returns True once the job is settled, False to retry it later."""
+        try:
+            await send()
+            self.stats["sent"] += 1
+            return True
+        except (discord.Forbidden, discord.NotFound) as e:
+            # Closed DMs / deleted channels will not start working on a retry
+            log.info(f"Outbound message on {route} not delivered: {e}")
+        except Exception as e:
+            if attempt < MAX_RETRIES:
+                return False
+            log.error(f"Outbound message on {route} failed after {attempt + 1} attempt(s): {e}")
+        self.stats["failed"] += 1
+        return True
+
+    def metrics(self):
+        """Queue depth per priority class, counters, and wait-time percentiles in milliseconds."""
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for job in self._heap:
+            depth[PRIORITY_NAMES[job[0]]] += 1
+        depth["rate_limited"] = self._deferred
+        waits = {}
+        for priority, samples in self.waits.items():
+            ordered = sorted(samples)
+            if ordered:
+                waits[PRIORITY_NAMES[priority]] = {
+                    "p50": ordered[len(ordered) // 2] * 1000,
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                    "max": ordered[-1] * 1000,
+                }
+        return {"depth": depth, "total_depth": len(self._heap) + self._deferred, **self.stats, "wait_ms": waits}
+
+
+_outbound = None
+
+
+def get_outbound():
+    global _outbound
+    if _outbound is None:
+        _outbound = OutboundQueue()
+    return _outbound
@@ -0,0 +1,182 @@
+import contextvars
+import functools
+import logging
+import time
+from collections import deque
+
+from discord.webhook import async_ as webhook_async
+
+log = logging.getLogger(__name__)
+
+# Latency samples kept per handler for the percentiles
+SAMPLES_PER_HANDLER = 1000
+# REST calls made outside any command or component callback (queues, schedulers, on_ready work)
+BACKGROUND = "(background)"
+# Loggers that report 429 responses. discord.py retries those requests inside its HTTP client,
+# so its warnings are the only signal (they need the "discord" logger at WARNING or below).
+RATE_LIMIT_LOGGERS = ("discord.http", "discord.webhook.async_")
+
+# Name of the command or component callback the current task is serving
+_current_handler = contextvars.ContextVar("perf_handler", default=None)
+
+
+def percentile(ordered, q):
+    """q-th percentile (0-100) of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class HandlerStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rest_calls = 0
+        self.rate_limited = 0
+        self.latencies = deque(maxlen=SAMPLES_PER_HANDLER)  # Seconds
+
+    def snapshot(self):
+        ordered = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rest_calls": self.rest_calls,
+            "rest_per_call": self.rest_calls / self.calls if self.calls else 0.0,
+            "rate_limited": self.rate_limited,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+        }
+
+
+class RateLimitCounter(logging.Filter):
+    """Counts discord.py's "being rate limited" warnings against the handler that hit them."""
+
+    def __init__(self, perf):
+        super().__init__()
+        self.perf = perf
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING and "rate limited" in str(record.msg):
+            self.perf.stats(_current_handler.get() or BACKGROUND).rate_limited += 1
+        return True
+
+
+class Perf:
+    """
+    Per-handler latency, error, REST-call and 429 counters.
+
+    Prefix commands are timed through the bot's before/after invoke hooks and component
+    callbacks through the track() decorator. Both set a context variable naming the
+    handler, so every REST request (bot HTTP client and interaction webhooks) and every
+    429 is attributed to the handler whose task made it.
+    """
+
+    def __init__(self):
+        self.handlers = {}
+        self.started = time.time()
+        self._installed_on = None
+        self._rate_limit_filter = RateLimitCounter(self)
+
+    def stats(self, name):
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerStats()
+        return stats
+
+    def record(self, name, elapsed, failed=False):
+        stats = self.stats(name)
+        stats.calls += 1
+        stats.latencies.append(elapsed)
+        if failed:
+            stats.errors += 1
+
+    def count_rest_call(self):
+        self.stats(_current_handler.get() or BACKGROUND).rest_calls += 1
+
+    def install(self, bot):
+        """Hooks the bot's command invocation and HTTP layers (once per bot)."""
+        if self._installed_on is bot:
+            return
+        self._installed_on = bot
+
+        @bot.before_invoke
+        async def perf_before_invoke(ctx):
+            ctx.perf_started = time.perf_counter()
+            ctx.perf_token = _current_handler.set(f"!{ctx.command.qualified_name}")
+
+        @bot.after_invoke
+        async def perf_after_invoke(ctx):
+            started = getattr(ctx, "perf_started", None)
+            if started is not None:
+                self.record(f"!{ctx.command.qualified_name}", time.perf_counter() - started, ctx.command_failed)
+                _current_handler.reset(ctx.perf_token)
+
+        http_request = bot.http.request
+
+        @functools.wraps(http_request)
+        async def request(route, **kwargs):
+            self.count_rest_call()
+            return await http_request(route, **kwargs)
+
+        bot.http.request = request
+
+        # Interaction responses and follow-ups bypass bot.http and go through the webhook adapter
+        adapter_request = webhook_async.AsyncWebhookAdapter.request
+        if not getattr(adapter_request, "perf_wrapped", False):
+            @functools.wraps(adapter_request)
+            async def webhook_request(adapter, *args, **kwargs):
+                get_perf().count_rest_call()
+                return await adapter_request(adapter, *args, **kwargs)
+
+            webhook_request.perf_wrapped = True
+            webhook_async.AsyncWebhookAdapter.request = webhook_request
+
+        for name in RATE_LIMIT_LOGGERS:
+            logging.getLogger(name).addFilter(self._rate_limit_filter)
+
+    def snapshot(self):
+        handlers = {name: stats.snapshot() for name, stats in self.handlers.items()}
+        return {
+            "since": self.started,
+            "written": time.time(),
+            "rest_calls": sum(h["rest_calls"] for h in handlers.values()),
+            "rate_limited": sum(h["rate_limited"] for h in handlers.values()),
+            "handlers": handlers,
+        }
+
+
+def track(callback):
+    """
+    Decorator for component callbacks (and other interaction handlers): times each call,
+    counts errors and attributes the REST calls it makes to its qualified name.
+    """
+    name = callback.__qualname__.replace(".<locals>", "")
+
+    @functools.wraps(callback)
+    async def wrapper(*args, **kwargs):
+        perf = get_perf()
+        token = _current_handler.set(name)
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await callback(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            perf.record(name, time.perf_counter() - started, failed)
+            _current_handler.reset(token)
+
+    return wrapper
+
+
+_perf = None
+
+
+def get_perf():
+    global _perf
+    if _perf is None:
+        _perf = Perf()
+    return _perf
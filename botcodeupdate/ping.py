@@ -9,7 +9,9 @@ class Ping(commands.Cog):
         """
         Responds with the bot's latency in milliseconds.
         """
-        latency = round(self.bot.latency * 1000)  # Convert latency to ms
+        # With several shards, report the one serving this guild rather than the average
+        shard = self.bot.get_shard(ctx.guild.shard_id) if ctx.guild and isinstance(self.bot, commands.AutoShardedBot) else None
+        latency = round((shard.latency if shard else self.bot.latency) * 1000)  # Convert latency to ms
         await ctx.send(f"🏓 Pong! Latency: {latency}ms")
 
 # Proper async setup function for cog registration
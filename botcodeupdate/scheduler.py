@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import json
+import logging
+import time
+from datastore import Datastore
+
+log = logging.getLogger(__name__)
+
+# A failed action is retried after 30s, 60s, 120s, ... (at most an hour apart) and given up
+# after MAX_ATTEMPTS, so an outage delays an unban or a mute renewal instead of losing it
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 3600
+MAX_ATTEMPTS = 50
+
+
+class Scheduler:
+    """
+    Persisted delayed actions served by a single dispatcher task.
+
+    Every action is a row in scheduler.db and an entry in an in-memory heap
+    ordered by due time, so scheduling costs one insert plus O(log n) and the
+    dispatcher only ever sleeps until the earliest deadline. Actions whose
+    deadline passed while the bot was offline run as soon as it is connected
+    again (release()). Handlers are registered per action kind by the cogs that
+    own them; a row is only deleted once its handler returned, and a handler that
+    raises is retried with exponential backoff.
+    """
+
+    def __init__(self, path="scheduler.db"):
+        self.db = Datastore(path)
+        self.schema = self.db.submit(self._create_table)
+        self.handlers = {}
+        self._heap = []  # (due, job_id, kind, payload)
+        self._cancelled = set()
+        self._parked = {}  # kind -> jobs that came due before their handler was registered
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._starting = None
+        self._running = set()
+        self._attempts = {}  # job_id -> failed attempts so far
+        self._released = False
+
+    @staticmethod
+    def _create_table(conn):
+        conn.execute(
+            '''CREATE TABLE IF NOT EXISTS scheduled_actions (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT,
+                due REAL,
+                payload TEXT
+            )'''
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(scheduled_actions)")}
+        if "attempts" not in columns:
+            conn.execute("ALTER TABLE scheduled_actions ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def register(self, kind, handler):
+        """Registers `async handler(payload)` for a kind; replaces any previous handler (cog reloads)."""
+        self.handlers[kind] = handler
+        for job in self._parked.pop(kind, []):
+            heapq.heappush(self._heap, job)
+        self._wakeup.set()
+
+    async def start(self):
+        """
+        Loads pending actions and starts the dispatcher (once per event loop).
+        Cogs start it from cog_load, which may run concurrently; they all share one start.
+        """
+        loop = asyncio.get_running_loop()
+        if self._task and not self._task.done() and self._task.get_loop() is loop:
+            return
+        if self._starting is None or self._starting.done() or self._starting.get_loop() is not loop:
+            self._starting = loop.create_task(self._load())
+        await asyncio.shield(self._starting)
+
+    def release(self):
+        """
+        Lets the dispatcher run due actions. Called once the bot is connected: cogs load (and
+        start the scheduler) before login, when handlers could not reach Discord yet.
+        """
+        self._released = True
+        self._wakeup.set()
+
+    async def _load(self):
+        # A failed CREATE TABLE or migration surfaces here and fails the cog_load that started us
+        await asyncio.wrap_future(self.schema)
+        rows = await self.db.fetchall("SELECT due, job_id, kind, payload, attempts FROM scheduled_actions")
+        loaded = [(due, job_id, kind, json.loads(payload)) for due, job_id, kind, payload, _ in rows]
+        self._attempts = {job_id: attempts for _, job_id, _, _, attempts in rows if attempts}
+        self._released = False
+        # Keep actions scheduled while the rows were being read
+        known = {job[1] for job in loaded}
+        self._heap = loaded + [job for job in self._heap if job[1] not in known and job[1] not in self._cancelled]
+        heapq.heapify(self._heap)
+        self._parked.clear()
+        self._cancelled.clear()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._dispatch())
+        log.info(f"Scheduler started with {len(self._heap)} pending action(s).")
+
+    async def schedule(self, kind, delay, payload):
+        """Schedules an action `delay` seconds from now and returns its job ID."""
+        due = time.time() + delay
+        job_id = await self.db.insert(
+            "INSERT INTO scheduled_actions (kind, due, payload) VALUES (?, ?, ?)",
+            (kind, due, json.dumps(payload))
+        )
+        heapq.heappush(self._heap, (due, job_id, kind, payload))
+        if self._heap[0][1] == job_id:
+            self._wakeup.set()  # New earliest deadline
+        return job_id
+
+    async def cancel(self, job_id):
+        # Heap entries are dropped lazily when they reach the top
+        self._cancelled.add(job_id)
+        await self.db.execute("DELETE FROM scheduled_actions WHERE job_id = ?", (job_id,))
+
+    def pending(self):
+        return len(self._heap) - len(self._cancelled) + sum(len(jobs) for jobs in self._parked.values())
+
+    async def _dispatch(self):
+        while True:
+            now = time.time()
+            while self._released and self._heap and self._heap[0][0] <= now:
+                job = heapq.heappop(self._heap)
+                due, job_id, kind, payload = job
+                if job_id in self._cancelled:
+                    self._cancelled.discard(job_id)
+                    continue
+                if kind not in self.handlers:
+                    self._parked.setdefault(kind, []).append(job)
+                    continue
+                task = asyncio.create_task(self._run(job_id, kind, payload, now - due))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - time.time() if self._heap and self._released else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, job_id, kind, payload, lateness):
+        if lateness > 60:
+            log.info(f"Running overdue {kind} action {job_id} ({lateness:.0f}s late).")
+        try:
+            await self.handlers[kind](payload)
+        except Exception as e:
+            attempts = self._attempts.pop(job_id, 0) + 1
+            if attempts < MAX_ATTEMPTS:
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempts - 1))
+                log.warning(f"Scheduled {kind} action {job_id} failed (attempt {attempts}): {e}. Retrying in {delay}s.")
+                return await self._retry(job_id, kind, payload, attempts, time.time() + delay)
+            log.error(f"Scheduled {kind} action {job_id} failed {attempts} times; giving up: {e}")
+        self._attempts.pop(job_id, None)
+        await self.db.execute("DELETE FROM scheduled_actions WHERE job_id = ?", (job_id,))
+
+    async def _retry(self, job_id, kind, payload, attempts, due):
+        await self.db.execute(
+            "UPDATE scheduled_actions SET due = ?, attempts = ? WHERE job_id = ?", (due, attempts, job_id)
+        )
+        # A job cancelled meanwhile is still in _cancelled and is dropped when it comes due
+        self._attempts[job_id] = attempts
+        heapq.heappush(self._heap, (due, job_id, kind, payload))
+        if self._heap[0][1] == job_id:
+            self._wakeup.set()
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        await self.db.close()
+
+
+# One scheduler (one dispatcher task, one heap) shared by every cog
+_scheduler = None
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
@@ -1,133 +1,208 @@
+import asyncio
 import logging
+import discord
 from discord.ext import commands
 from discord import Embed, Interaction, ButtonStyle, ui
-import asyncio
+import perf
+from datastore import Datastore
+from edit_coalescer import EditCoalescer
+from guild_config import get_config
+from scheduler import get_scheduler
 
-# Setup logging to display and record all levels
-logging.basicConfig(
-    level=logging.DEBUG,  # Log all levels: DEBUG, INFO, WARNING, ERROR, CRITICAL
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler("sessions.log"),  # Output logs to sessions.log file
-        logging.StreamHandler()  # Also print logs to the terminal
-    ]
-)
+log = logging.getLogger(__name__)
+
+# Votes needed before a session starts
+VOTE_THRESHOLD = 1
+# Minimum seconds between two label edits of the same vote message (Discord rate-limits per message)
+VOTE_LABEL_EDIT_INTERVAL = 2.0
+# Seconds before the voter pings are removed from the SSU message
+PING_REMOVAL_DELAY = 300
 
 class Sessions(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.voters = set()  # To track voters
-        self.vote_button = None  # Define the vote button dynamically
+        # Vote state is keyed by the vote message ID, so concurrent !ssv votes never share voters
+        self.db = Datastore("sessions.db")
+        self.schema = self.db.submit(self.create_tables)  # Awaited in cog_load
+        self.votes = {}  # message_id -> set of voter IDs, for every open vote
+        self.scheduler = get_scheduler()
+        self.label_updates = EditCoalescer(VOTE_LABEL_EDIT_INTERVAL)
+        self.config = get_config()
+
+    @staticmethod
+    def create_tables(conn):
+        conn.execute(
+            '''CREATE TABLE IF NOT EXISTS session_votes (
+                message_id INTEGER PRIMARY KEY,
+                guild_id INTEGER,
+                channel_id INTEGER,
+                threshold INTEGER,
+                closed INTEGER DEFAULT 0
+            )'''
+        )
+        conn.execute(
+            '''CREATE TABLE IF NOT EXISTS session_voters (
+                message_id INTEGER,
+                user_id INTEGER,
+                PRIMARY KEY (message_id, user_id)
+            )'''
+        )
+
+    async def cog_load(self):
+        """Restores open votes, re-attaches the vote button and hooks the ping-removal timer."""
+        # A failed CREATE TABLE must fail the extension load, not every later query
+        await asyncio.wrap_future(self.schema)
+        await self.config.load()
+        rows = await self.db.fetchall(
+            "SELECT v.message_id, s.user_id FROM session_votes v "
+            "LEFT JOIN session_voters s ON s.message_id = v.message_id WHERE v.closed = 0"
+        )
+        for message_id, user_id in rows:
+            voters = self.votes.setdefault(message_id, set())
+            if user_id is not None:
+                voters.add(user_id)
+        self.bot.add_view(SessionVoteView(self))
+        self.scheduler.register("sessions.remove_pings", self.remove_pings)
+        await self.scheduler.start()
+        log.info(f"Restored {len(self.votes)} open session vote(s).")
+
+    async def cog_unload(self):
+        await self.db.close()
 
     @commands.command()
     async def ssv(self, ctx):
         """
-        Starts a session vote, resets any previous data, and sends the startup embed when the vote threshold is met.
+        Starts a session vote and sends the startup embed when the vote threshold is met.
         Pings all voters who participated, logs events, and errors.
         """
         try:
-            # Reset voters and button state every time the command is run
-            self.voters = set()  # Clear all previous voter data
-            self.vote_button = ui.Button(label="0/1", style=ButtonStyle.success)  # Reset button label
-            logging.info(f"SSV command invoked by {ctx.author} (ID: {ctx.author.id}) and reset.")
+            log.info(f"SSV command invoked by {ctx.author} (ID: {ctx.author.id}).")
 
             # Delete the !ssv command message
             await ctx.message.delete()
 
             # Role ping and session vote embed
-            role = ctx.guild.get_role(1342612650571599922)  # Replace with actual Role ID
+            role = ctx.guild.get_role(self.config.get(ctx.guild.id, "sessions_role"))
             embed = Embed(
                 title="Session Vote",
                 description="The staff Team has decided to host a session vote. Please vote below if you can attend today's session.",
                 color=0xFFFF00
             )
 
-            async def vote_callback(interaction: Interaction):
-                try:
-                    if interaction.user.id in self.voters:
-                        await interaction.response.send_message("You have already voted!", ephemeral=True)
-                        logging.debug(f"{interaction.user} attempted to vote again. Ignored.")
-                        return
-
-                    # Add the voter and update the button label
-                    self.voters.add(interaction.user.id)
-                    current_votes = len(self.voters)
-                    self.vote_button.label = f"{current_votes}/1"
-                    await interaction.message.edit(view=self.update_view())  # Update the view with the new label
-
-                    # Log the vote
-                    logging.info(f"{interaction.user} (ID: {interaction.user.id}) cast a vote ({current_votes}/1)")
-
-                    if current_votes >= 1:  # Voting threshold reached (1 vote)
-                        # Final session startup embed
-                        ssu_embed = Embed(
-                            title="SSU",
-                            description=(
-                                "Thank you to all who voted to host this session. Please be sure to join or you will face moderation actions.\n\n"
-                                "**Below you can find our server information.**\n\n"
-                                "Server owner: Faithful1909\n"
-                                "Player Count: -/39\n"
-                                "Queue: -\n"
-                                "Staff members actively moderating."
-                            ),
-                            color=0x00FF00
-                        )
-
-                        # Ping voters
-                        pings = []
-                        for user_id in self.voters:
-                            # Attempt to get member from cache
-                            member = interaction.guild.get_member(user_id)
-                            if not member:
-                                # If not found, fetch the member directly
-                                try:
-                                    member = await interaction.guild.fetch_member(user_id)
-                                except Exception as e:
-                                    logging.error(f"Failed to fetch member with ID {user_id}: {e}")
-                            if member:
-                                pings.append(member.mention)
-                            else:
-                                logging.warning(f"Could not find or fetch member with ID {user_id}.")
-                        pings_text = ", ".join(pings) if pings else "No voters to mention."
-                        session_message = await ctx.send(pings_text, embed=ssu_embed)
-
-                        # Log session startup
-                        logging.info(f"Session startup initiated successfully with {len(self.voters)} voter(s).")
-
-                        # Delete the original session vote embed
-                        await interaction.message.delete()
-
-                        # Delete pings after 5 minutes
-                        await asyncio.sleep(300)
-                        await session_message.edit(content=None)  # Remove pings
-                        logging.debug("Voter pings removed after 5 minutes.")
-
-                except Exception as e:
-                    # Log any errors in the interaction
-                    logging.error(f"Error in vote_callback: {e}")
-                    await interaction.response.send_message("An error occurred during voting. Please try again later.", ephemeral=True)
-                    await ctx.send(f"⚠️ An error occurred while processing your vote: `{e}`")
-
-            # Assign the callback to the button
-            self.vote_button.callback = vote_callback
-
             # Create and send view with the button
-            view = self.update_view()
-            await ctx.send(content=role.mention, embed=embed, view=view)
-            logging.info("Session vote embed sent successfully.")
+            message = await ctx.send(content=role.mention, embed=embed, view=SessionVoteView(self, 0))
+            self.votes[message.id] = set()
+            await self.db.execute(
+                "INSERT INTO session_votes (message_id, guild_id, channel_id, threshold) VALUES (?, ?, ?, ?)",
+                (message.id, ctx.guild.id, ctx.channel.id, VOTE_THRESHOLD)
+            )
+            log.info("Session vote embed sent successfully.")
 
         except Exception as e:
             # Log any errors in the command
-            logging.error(f"Error in ssv command: {e}")
+            log.error(f"Error in ssv command: {e}")
             await ctx.send(f"⚠️ An error occurred while starting the session vote: `{e}`")
 
-    def update_view(self):
-        """
-        Updates the view to reflect the current button state.
-        """
-        view = ui.View()
-        view.add_item(self.vote_button)
-        return view
+    async def vote_callback(self, interaction: Interaction):
+        message_id = interaction.message.id
+        try:
+            voters = self.votes.get(message_id)
+            if voters is None:
+                await interaction.response.send_message("This session vote has ended.", ephemeral=True)
+                return
+            if interaction.user.id in voters:
+                await interaction.response.send_message("You have already voted!", ephemeral=True)
+                log.debug(f"{interaction.user} attempted to vote again. Ignored.")
+                return
+
+            # Add the voter; the threshold check happens before any await so only one vote can close it
+            voters.add(interaction.user.id)
+            current_votes = len(voters)
+            threshold_reached = current_votes >= VOTE_THRESHOLD
+            if threshold_reached:
+                del self.votes[message_id]
+
+            # Acknowledge the vote right away; the button label is updated separately
+            await interaction.response.send_message(
+                f"✅ Your vote has been counted ({current_votes}/{VOTE_THRESHOLD}).", ephemeral=True
+            )
+            await self.db.execute(
+                "INSERT OR IGNORE INTO session_voters (message_id, user_id) VALUES (?, ?)",
+                (message_id, interaction.user.id)
+            )
+            if threshold_reached:
+                # The vote message is deleted below, so pending label edits are pointless
+                self.label_updates.discard(message_id)
+            else:
+                self.request_label_update(interaction.channel, message_id)
+
+            # Log the vote
+            log.info(f"{interaction.user} (ID: {interaction.user.id}) cast a vote ({current_votes}/{VOTE_THRESHOLD})")
+
+            if threshold_reached:
+                await self.start_session(interaction, voters)
+
+        except Exception as e:
+            # Log any errors in the interaction
+            log.error(f"Error in vote_callback: {e}")
+            if not interaction.response.is_done():
+                await interaction.response.send_message("An error occurred during voting. Please try again later.", ephemeral=True)
+            await interaction.channel.send(f"⚠️ An error occurred while processing your vote: `{e}`")
+
+    def request_label_update(self, channel, message_id):
+        """Queues a coalesced edit of the vote button; the count is read when the edit is sent."""
+        async def edit():
+            voters = self.votes.get(message_id)
+            if voters is not None:
+                await channel.get_partial_message(message_id).edit(view=SessionVoteView(self, len(voters)))
+
+        self.label_updates.request(message_id, edit)
+
+    async def start_session(self, interaction, voters):
+        """Posts the SSU embed pinging every voter and closes the vote."""
+        # Final session startup embed
+        ssu_embed = Embed(
+            title="SSU",
+            description=(
+                "Thank you to all who voted to host this session. Please be sure to join or you will face moderation actions.\n\n"
+                "**Below you can find our server information.**\n\n"
+                "Server owner: Faithful1909\n"
+                "Player Count: -/39\n"
+                "Queue: -\n"
+                "Staff members actively moderating."
+            ),
+            color=0x00FF00
+        )
+
+        # Ping voters straight from their IDs; a mention needs no member lookup
+        pings_text = ", ".join(f"<@{user_id}>" for user_id in voters) if voters else "No voters to mention."
+        session_message = await interaction.channel.send(pings_text, embed=ssu_embed)
+
+        # Log session startup
+        log.info(f"Session startup initiated successfully with {len(voters)} voter(s).")
+
+        await self.db.execute("UPDATE session_votes SET closed = 1 WHERE message_id = ?", (interaction.message.id,))
+
+        # Delete the original session vote embed
+        await interaction.message.delete()
+
+        # Remove the pings after 5 minutes (persisted, so it still happens after a restart)
+        await self.scheduler.schedule(
+            "sessions.remove_pings",
+            PING_REMOVAL_DELAY,
+            {"channel_id": session_message.channel.id, "message_id": session_message.id}
+        )
+
+    async def remove_pings(self, payload):
+        # Overdue removals run right after a restart; the channel cache is filled once the bot is ready
+        await self.bot.wait_until_ready()
+        try:
+            channel = self.bot.get_channel(payload["channel_id"]) or await self.bot.fetch_channel(payload["channel_id"])
+            await channel.get_partial_message(payload["message_id"]).edit(content=None)  # Remove pings
+        except discord.NotFound:
+            return log.info(f"SSU message {payload['message_id']} is gone; no pings to remove.")
+        # Any other error propagates, so the scheduler retries the removal later
+        log.debug("Voter pings removed after 5 minutes.")
 
     @commands.command()
     async def ssd(self, ctx, *, reason):
@@ -137,7 +212,7 @@ class Sessions(commands.Cog):
         """
         try:
             # Log command execution
-            logging.info(f"SSD command invoked by {ctx.author} (ID: {ctx.author.id}) with reason: {reason}")
+            log.info(f"SSD command invoked by {ctx.author} (ID: {ctx.author.id}) with reason: {reason}")
 
             # Delete the !ssd command message
             await ctx.message.delete()
@@ -151,13 +226,25 @@ class Sessions(commands.Cog):
             await ctx.send(embed=embed)
 
             # Log successful SSD execution
-            logging.info("SSD message sent successfully.")
+            log.info("SSD message sent successfully.")
 
         except Exception as e:
             # Log any errors in the command
-            logging.error(f"Error in ssd command: {e}")
+            log.error(f"Error in ssd command: {e}")
             await ctx.send(f"⚠️ An error occurred while concluding the session: `{e}`")
 
+# Persistent vote button; one instance serves every open vote message
+class SessionVoteView(ui.View):
+    def __init__(self, cog, votes=0):
+        super().__init__(timeout=None)
+        self.cog = cog
+        self.vote_button.label = f"{votes}/{VOTE_THRESHOLD}"
+
+    @ui.button(label=f"0/{VOTE_THRESHOLD}", style=ButtonStyle.success, custom_id="sessions:vote")
+    @perf.track
+    async def vote_button(self, interaction: Interaction, button: ui.Button):
+        await self.cog.vote_callback(interaction)
+
 # Setup function for dynamic cog loading
 async def setup(bot):
     await bot.add_cog(Sessions(bot))
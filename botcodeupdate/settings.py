@@ -0,0 +1,84 @@
+import discord
+from discord.ext import commands
+import logging
+from guild_config import BOT_WIDE, SETTINGS, get_config, mention
+
+log = logging.getLogger(__name__)
+
+class Settings(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.config = get_config()
+
+    async def cog_load(self):
+        await self.config.load()
+
+    def can_configure(self, ctx, key=None):
+        """Server administrators manage their server's settings; bot-wide ones are owner-only."""
+        if self.config.is_owner(ctx.author):
+            return True
+        if key in BOT_WIDE:
+            return False
+        return ctx.guild is not None and ctx.author.guild_permissions.administrator
+
+    @commands.group(name="config", invoke_without_command=True)
+    async def config_group(self, ctx):
+        """
+        Show this server's settings. Usage: !config
+        Change one with !config set <setting> <@role/#channel/ID ...>, undo with !config reset <setting>.
+        """
+        if not self.can_configure(ctx):
+            return await ctx.send("You do not have permission to run this command.")
+        guild_id = ctx.guild.id if ctx.guild else 0
+        embed = discord.Embed(title="Server Settings", color=discord.Color.blue())
+        for key, (kind, _) in SETTINGS.items():
+            embed.add_field(
+                name=key,
+                value=f"{mention(kind, self.config.get(guild_id, key))}\n*{self.config.source(guild_id, key)}*",
+                inline=True
+            )
+        embed.set_footer(text="!config set <setting> <value> • !config reset <setting>")
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+    @config_group.command(name="set")
+    @commands.guild_only()
+    async def config_set(self, ctx, key: str, *, value: str):
+        """Set a setting for this server. Usage: !config set ticket_category <ID> or !config set pardon_roles @A @B"""
+        if not self.can_configure(ctx, key):
+            return await ctx.send("You do not have permission to run this command.")
+        try:
+            parsed = self.config.parse_value(key, value)
+        except ValueError as e:
+            return await ctx.send(str(e))
+        await self.config.set(ctx.guild.id, key, parsed)
+        log.info(f"{ctx.author} set {key} = {parsed} for guild {ctx.guild.id}.")
+        await ctx.send(
+            f"`{key}` is now {mention(SETTINGS[key][0], parsed)}.", allowed_mentions=discord.AllowedMentions.none()
+        )
+
+    @config_group.command(name="reset")
+    @commands.guild_only()
+    async def config_reset(self, ctx, key: str):
+        """Go back to the default for a setting. Usage: !config reset <setting>"""
+        if key not in SETTINGS:
+            return await ctx.send(f"Unknown setting `{key}`. Settings: {', '.join(SETTINGS)}")
+        if not self.can_configure(ctx, key):
+            return await ctx.send("You do not have permission to run this command.")
+        await self.config.reset(ctx.guild.id, key)
+        log.info(f"{ctx.author} reset {key} for guild {ctx.guild.id}.")
+        await ctx.send(
+            f"`{key}` is back to {mention(SETTINGS[key][0], self.config.get(ctx.guild.id, key))}.",
+            allowed_mentions=discord.AllowedMentions.none()
+        )
+
+    @config_group.command(name="reload")
+    async def config_reload(self, ctx):
+        """Re-read every setting from guild_config.db (after editing it by hand). Owner only."""
+        if not self.config.is_owner(ctx.author):
+            return await ctx.send("You do not have permission to run this command.")
+        await self.config.reload()
+        await ctx.send("Settings reloaded.")
+
+# Asynchronous setup function for dynamic cog loading
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Settings(bot))
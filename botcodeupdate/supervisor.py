@@ -0,0 +1,456 @@
+"""
+Runs the bot in a child process and controls it over a local IPC channel.
+
+    python supervisor.py run                 start the supervisor (and the bot) in the foreground
+    python supervisor.py status|metrics      ask a running supervisor
+    python supervisor.py start|stop|restart
+    python supervisor.py shutdown            stop the bot and the supervisor
+
+The bot process (bot_process.py) connects back to the supervisor's listener; so do
+controllers such as the commands above or a GUI using SupervisorClient. Every
+connection is authenticated with the key in supervisor.key, which is created
+(readable by this user only) on first start and only ever used on 127.0.0.1.
+
+A bot that crashes is restarted with exponential backoff (BACKOFF_BASE doubling
+up to BACKOFF_MAX); a run that lasted STABLE_AFTER seconds resets the backoff.
+A bot that exits with EXIT_FATAL (no token, login failure) is left stopped.
+
+While the bot is online a spare process is kept waiting with discord.py already
+imported, so a restart (including the one !update asks for) costs a login rather
+than a new interpreter. The supervisor itself never imports bot code, so an
+update never has to restart it.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+from bot_process import EXIT_FATAL, EXIT_OK, KEY_ENV, PORT_ENV
+
+log = logging.getLogger("supervisor")
+
+CONTROL_HOST = "127.0.0.1"
+CONTROL_PORT = 8765
+KEY_FILE = "supervisor.key"
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CHILD_SCRIPT = os.path.join(BOT_DIR, "bot_process.py")
+# Seconds a bot gets to log out after "stop" before it is terminated (and then killed)
+STOP_TIMEOUT = 15
+KILL_TIMEOUT = 5
+# Crash-loop backoff: 2s, 4s, 8s, ... up to 5 minutes; a run this long resets it
+BACKOFF_BASE = 2
+BACKOFF_MAX = 300
+STABLE_AFTER = 120
+# A child that has not finished importing discord.py by then is replaced
+PRELOAD_TIMEOUT = 60
+# The spare is started this long after the bot came online, so it does not compete with login
+SPARE_DELAY = 10
+MONITOR_INTERVAL = 0.25
+METRICS_TIMEOUT = 10
+
+
+def load_key(path=KEY_FILE, create=False):
+    """The shared secret for the IPC channel, created with owner-only permissions if missing."""
+    try:
+        with open(path) as f:
+            return bytes.fromhex(f.read().strip())
+    except FileNotFoundError:
+        if not create:
+            raise
+    key = secrets.token_bytes(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(key.hex())
+    return key
+
+
+def rss_mb(pid):
+    """Resident memory of a process in MB (Linux only; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+# --------------------------
+# Child Processes
+# --------------------------
+class Child:
+    """One bot_process.py process and its connection to the supervisor."""
+
+    def __init__(self, supervisor, port, key):
+        self.supervisor = supervisor
+        env = dict(os.environ, **{PORT_ENV: str(port), KEY_ENV: key.hex()})
+        self.script_mtime = os.path.getmtime(CHILD_SCRIPT)
+        # Own session, so Ctrl+C in the supervisor's terminal reaches only the supervisor, which stops the bot cleanly
+        self.proc = subprocess.Popen([sys.executable, CHILD_SCRIPT], env=env, start_new_session=True)
+        self.pid = self.proc.pid
+        self.spawned_at = time.monotonic()
+        self.started_at = None  # When "run" was sent
+        self.status = "Waiting"
+        self.stopping = False
+        self.conn = None
+        self.preloaded = threading.Event()
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._replies = {}
+
+    def attach(self, conn):
+        self.conn = conn
+        threading.Thread(target=self._read, name=f"child-{self.pid}", daemon=True).start()
+
+    def _read(self):
+        while True:
+            try:
+                message = self.conn.recv()
+            except (OSError, EOFError):
+                return
+            if "reply" in message:
+                waiter = self._replies.get(message["reply"])
+                if waiter:
+                    waiter[1].append(message["data"])
+                    waiter[0].set()
+            elif message.get("event") == "preloaded":
+                self.preloaded.set()
+            elif message.get("event") == "status":
+                self.status = message["status"]
+                self.supervisor.on_child_status(self)
+            elif message.get("event") == "restart":
+                log.info(f"Bot (pid {self.pid}) asked for a restart.")
+                threading.Thread(target=self.supervisor.restart, daemon=True).start()
+
+    def send(self, message):
+        with self._send_lock:
+            try:
+                self.conn.send(message)
+                return True
+            except (OSError, EOFError, AttributeError):
+                return False
+
+    def run(self):
+        self.started_at = time.monotonic()
+        self.status = "Starting"
+        self.send({"cmd": "run"})
+
+    def request(self, command, timeout=METRICS_TIMEOUT):
+        """Sends a command and waits for the child's reply; None if there is none in time."""
+        request_id = next(self._ids)
+        waiter = self._replies[request_id] = (threading.Event(), [])
+        try:
+            if self.send({"cmd": command, "id": request_id}) and waiter[0].wait(timeout):
+                return waiter[1][0]
+            return None
+        finally:
+            self._replies.pop(request_id, None)
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def stop(self):
+        """Asks the bot to log out, then terminates and finally kills it. Blocks until it has exited."""
+        self.stopping = True
+        if not self.alive():
+            return
+        steps = [(self.proc.terminate, KILL_TIMEOUT), (self.proc.kill, None)]
+        if self.started_at is not None:
+            # A process that never got "run" has no session to close
+            self.send({"cmd": "stop"})
+            steps.insert(0, (None, STOP_TIMEOUT))
+        for signal_process, timeout in steps:
+            if signal_process:
+                if self.started_at is not None:
+                    log.warning(f"Bot (pid {self.pid}) did not exit in time; sending {signal_process.__name__}.")
+                signal_process()
+            try:
+                self.proc.wait(timeout)
+                return
+            except subprocess.TimeoutExpired:
+                continue
+
+
+# --------------------------
+# Supervisor
+# --------------------------
+class Supervisor:
+    def __init__(self, host=CONTROL_HOST, port=CONTROL_PORT, key_file=KEY_FILE):
+        self.key = load_key(key_file, create=True)
+        self.listener = Listener((host, port), authkey=self.key)
+        self.port = self.listener.address[1]
+        self.lock = threading.RLock()
+        self.children = {}  # pid -> Child, until it has said hello
+        self.active = None
+        self.spare = None
+        self.wanted = False
+        self.fatal = False
+        self.crashes = 0
+        self.next_start_at = 0.0
+        self.restarts = 0
+        self.last_exit = None
+        self.started_at = time.monotonic()
+        self.online_at = None
+        self.running = True
+
+    # ---- Connections ----
+    def accept_loop(self):
+        while self.running:
+            try:
+                conn = self.listener.accept()
+                hello = conn.recv()
+            except Exception as e:
+                if self.running:
+                    log.warning(f"Rejected a connection: {e!r}")
+                continue
+            if hello.get("hello") == "child":
+                child = self.children.pop(hello.get("pid"), None)
+                if child is None:
+                    conn.close()
+                else:
+                    child.attach(conn)
+            elif hello.get("hello") == "control":
+                threading.Thread(target=self.serve_controller, args=(conn,), daemon=True).start()
+            else:
+                conn.close()
+
+    def serve_controller(self, conn):
+        while self.running:
+            try:
+                message = conn.recv()
+            except (OSError, EOFError):
+                break
+            try:
+                reply = self.command(message.get("cmd"))
+            except Exception as e:
+                log.exception(f"Control command {message!r} failed")
+                reply = {"ok": False, "error": str(e)}
+            try:
+                conn.send(reply)
+            except (OSError, EOFError):
+                break
+        conn.close()
+
+    def command(self, name):
+        handlers = {
+            "start": self.start,
+            "stop": self.stop,
+            "restart": self.restart,
+            "status": self.status,
+            "metrics": self.metrics,
+            "shutdown": self.shutdown,
+        }
+        if name not in handlers:
+            return {"ok": False, "error": f"Unknown command {name!r}. Commands: {', '.join(handlers)}"}
+        return handlers[name]()
+
+    # ---- Commands ----
+    def start(self):
+        with self.lock:
+            if self.wanted:
+                return {"ok": True, "note": "already running"}
+            self.wanted = True
+            self.fatal = False
+            self.crashes = 0
+            self.next_start_at = 0.0
+        return {"ok": True}
+
+    def stop(self):
+        with self.lock:
+            self.wanted = False
+            child = self.active
+        if child:
+            child.stop()
+        return {"ok": True}
+
+    def restart(self):
+        """Stops the bot; the monitor starts the spare (or a fresh process) as soon as it has exited."""
+        with self.lock:
+            self.wanted = True
+            self.fatal = False
+            self.crashes = 0
+            self.next_start_at = 0.0
+            child = self.active
+            self.restarts += 1
+        if child:
+            child.stop()
+        return {"ok": True}
+
+    def status(self):
+        with self.lock:
+            child = self.active
+            spare = self.spare
+            now = time.monotonic()
+            return {
+                "ok": True,
+                "status": child.status if child and child.alive() else "Offline",
+                "wanted": self.wanted,
+                "pid": child.pid if child else None,
+                "uptime_s": round(now - child.started_at, 1) if child and child.started_at else None,
+                "supervisor_uptime_s": round(now - self.started_at, 1),
+                "restarts": self.restarts,
+                "crashes": self.crashes,
+                "next_start_in_s": round(max(0.0, self.next_start_at - now), 1) if self.wanted and not child else None,
+                "last_exit": self.last_exit,
+                "fatal": self.fatal,
+                "spare_ready": bool(spare and spare.preloaded.is_set() and spare.alive()),
+            }
+
+    def metrics(self):
+        result = self.status()
+        child = self.active
+        if child and child.alive():
+            result["bot"] = child.request("metrics")
+            result["rss_mb"] = rss_mb(child.pid)
+        return result
+
+    def shutdown(self):
+        self.running = False
+        return {"ok": True}
+
+    # ---- Process management ----
+    def spawn(self):
+        child = Child(self, self.port, self.key)
+        self.children[child.pid] = child
+        return child
+
+    def on_child_status(self, child):
+        log.info(f"Bot (pid {child.pid}) is {child.status}.")
+        with self.lock:
+            if child is self.active and child.status == "Online":
+                self.online_at = time.monotonic()
+
+    def handle_exit(self, child):
+        code = child.proc.returncode
+        ran_for = time.monotonic() - (child.started_at or child.spawned_at)
+        self.active = None
+        self.online_at = None
+        self.last_exit = {"code": code, "ran_for_s": round(ran_for, 1), "at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        if child.stopping or code == EXIT_OK:
+            log.info(f"Bot (pid {child.pid}) stopped.")
+            if code == EXIT_OK and not child.stopping:
+                self.wanted = False
+        elif code == EXIT_FATAL:
+            log.error(f"Bot (pid {child.pid}) cannot start (exit code {code}); not restarting. Fix it and run start.")
+            self.wanted = False
+            self.fatal = True
+        else:
+            self.crashes = 1 if ran_for >= STABLE_AFTER else self.crashes + 1
+            delay = min(BACKOFF_MAX, BACKOFF_BASE ** self.crashes)
+            self.next_start_at = time.monotonic() + delay
+            log.error(f"Bot (pid {child.pid}) crashed with exit code {code} after {ran_for:.0f}s; restarting in {delay}s.")
+
+    def take_spare(self):
+        """The warm spare, if it is usable; otherwise a fresh process."""
+        spare, self.spare = self.spare, None
+        if spare and spare.alive() and spare.script_mtime == os.path.getmtime(CHILD_SCRIPT):
+            return spare
+        if spare:
+            threading.Thread(target=spare.stop, daemon=True).start()
+        return self.spawn()
+
+    def tick(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.active and not self.active.alive():
+                self.handle_exit(self.active)
+            if self.spare and not self.spare.alive():
+                self.spare = None
+
+            if self.active is None and self.wanted and now >= self.next_start_at:
+                self.active = self.take_spare()
+                log.info(f"Starting bot in process {self.active.pid}.")
+            child = self.active
+            if child and child.started_at is None and not child.stopping:
+                if child.preloaded.is_set():
+                    child.run()
+                elif now - child.spawned_at > PRELOAD_TIMEOUT:
+                    log.error(f"Bot process {child.pid} did not finish starting; replacing it.")
+                    threading.Thread(target=child.stop, daemon=True).start()
+                    self.active = None  # Started again on the next tick
+
+            if (
+                self.spare is None and self.wanted and self.online_at is not None
+                and now - self.online_at >= SPARE_DELAY
+            ):
+                self.spare = self.spawn()
+
+    def serve(self):
+        threading.Thread(target=self.accept_loop, name="supervisor-accept", daemon=True).start()
+        log.info(f"Supervisor listening on {CONTROL_HOST}:{self.port}.")
+        try:
+            while self.running:
+                self.tick()
+                time.sleep(MONITOR_INTERVAL)
+        finally:
+            self.running = False
+            with self.lock:
+                self.wanted = False
+                children = [child for child in (self.active, self.spare) if child]
+            for child in children:
+                child.stop()
+            self.listener.close()
+            log.info("Supervisor stopped.")
+
+
+# --------------------------
+# Controller Side (CLI, GUI)
+# --------------------------
+class SupervisorClient:
+    """Connection to a running supervisor: call("status"), call("restart"), ..."""
+
+    def __init__(self, host=CONTROL_HOST, port=CONTROL_PORT, key_file=KEY_FILE):
+        self.conn = Client((host, port), authkey=load_key(key_file))
+        self.conn.send({"hello": "control"})
+
+    def call(self, command):
+        self.conn.send({"cmd": command})
+        return self.conn.recv()
+
+    def close(self):
+        self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run and control the bot process")
+    parser.add_argument("command", choices=("run", "start", "stop", "restart", "status", "metrics", "shutdown"))
+    parser.add_argument("--port", type=int, default=CONTROL_PORT)
+    parser.add_argument("--stopped", action="store_true", help="With run: do not start the bot until asked")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        logging.basicConfig(level=logging.INFO, format="[supervisor] %(message)s")
+        supervisor = Supervisor(port=args.port)
+        signal.signal(signal.SIGTERM, lambda *_: supervisor.shutdown())
+        if not args.stopped:
+            supervisor.start()
+        try:
+            supervisor.serve()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    try:
+        client = SupervisorClient(port=args.port)
+    except (OSError, FileNotFoundError) as e:
+        print(f"No supervisor running on port {args.port}: {e}")
+        return 1
+    try:
+        reply = client.call(args.command)
+    finally:
+        client.close()
+    print(json.dumps(reply, indent=2))
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,55 +2,89 @@ import discord
 from discord.ext import commands
 from discord.ui import View, Button
 import logging
+import asyncio
+import weakref
+import perf
+from cleanup import purge_messages
+from datastore import Datastore
+from guild_config import get_config
+from message_registry import get_registry
+from outbound import BACKGROUND, get_outbound
 
-# Logging setup
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("tickets.log"),
-        logging.StreamHandler()
-    ]
-)
+log = logging.getLogger(__name__)
+
+# Channel name prefixes for each ticket type
+TICKET_PREFIXES = ("gen", "rep", "com")
 
 class TicketSystem(commands.Cog):
     def __init__(self, client):
         self.client = client
-        self.category_id = 1343649889220952064  # Ticket category
-        self.log_channel_id = 1343648011854545009  # Logging channel
-        self.support_channel_id = 1342668753183440927  # Channel to send embeds
-        self.general_role_id = 1342611034116198420  # Role for general tickets
-        self.report_roles = [1342610501305372794, 1342610409525608479]  # Roles for report/community tickets
+        # Ticket category, log and panel channels and the roles that see tickets are per-guild settings
+        self.config = get_config()
+        self.registry = get_registry()
+        self.index = TicketIndex()
+        self.panel_checked = False  # on_ready fires again on every gateway reconnect
+
+    async def cog_load(self):
+        """Registers the persistent views once so panel and close buttons survive restarts."""
+        # Fail the extension load if the ticket or panel tables could not be created
+        await self.index.ready()
+        await self.registry.ready()
+        await self.config.load()
+        self.client.add_view(self.panel_view())
+        self.client.add_view(CloseButton(self.config, self.index))
+        get_outbound().start()
+
+    async def cog_unload(self):
+        await self.index.db.close()
 
     @commands.Cog.listener()
     async def on_ready(self):
-        """Automatically initialize tickets when the bot restarts."""
-        logging.info("Bot has restarted. Automatically triggering ticket system...")
-        support_channel = self.client.get_channel(self.support_channel_id)
-        if support_channel:
-            # Simulate sending the !tickets command in the support channel
-            await self.initialize_tickets(support_channel)
+        """Make sure every guild's ticket panel exists when the bot starts (not on every reconnect)."""
+        if self.panel_checked:
+            return
+        self.panel_checked = True
+        categories = []
+        support_channels = []
+        for guild in self.client.guilds:
+            category = guild.get_channel(self.config.get(guild.id, "ticket_category"))
+            if category:
+                categories.append(category)
+            support_channel = guild.get_channel(self.config.get(guild.id, "ticket_support_channel"))
+            if support_channel:
+                support_channels.append(support_channel)
+        if categories:
+            await self.index.rebuild(categories)
+        for support_channel in support_channels:
+            log.info(f"Bot has restarted. Verifying ticket panel in {support_channel.guild.name}...")
+            try:
+                await self.ensure_panel(support_channel)
+            except Exception as e:
+                # One guild's missing permissions must not leave the other guilds without a panel
+                log.error(f"Could not verify the ticket panel in {support_channel.guild.name}: {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        """Keep the ticket index in sync when a ticket channel is deleted by hand."""
+        if self.index.owner_of(channel.id):
+            await self.index.remove(channel.id)
 
     @commands.command()
     async def tickets(self, ctx):
         """Command to manually initialize the ticket system."""
-        if ctx.channel.id != self.support_channel_id:
+        if ctx.guild is None or ctx.channel.id != self.config.get(ctx.guild.id, "ticket_support_channel"):
             await ctx.send("This command can only be used in the designated support channel.", delete_after=10)
             return
         await self.initialize_tickets(ctx.channel)
         await ctx.message.delete()  # Automatically delete the user's !tickets command message
 
-    async def initialize_tickets(self, channel):
-        """Deletes previous bot messages and sends the ticketing embeds."""
-        # Clear previous bot messages
-        async for message in channel.history(limit=100):
-            if message.author == self.client.user:
-                await message.delete()
+    def panel_view(self):
+        return TicketButtons(self.client, self.config, self.index)
 
+    def panel_embeds(self):
         # First Embed
         first_embed = discord.Embed(color=discord.Color.from_str("#2C2F33"))  # Darker grey
         first_embed.set_image(url="https://i.postimg.cc/4d5WpwnB/SUPPORT.webp")  # Updated image link
-        await channel.send(embed=first_embed)
 
         # Second Embed with enhanced text
         second_embed = discord.Embed(
@@ -64,42 +98,227 @@ class TicketSystem(commands.Cog):
             ),
             color=discord.Color.from_str("#23272A")  # Slightly darker grey
         )
-        view = TicketButtons(self.client, self.category_id, self.general_role_id, self.report_roles, self.log_channel_id)
-        await channel.send(embed=second_embed, view=view)
+        return [first_embed, second_embed]
+
+    async def ensure_panel(self, channel):
+        """Edits the stored panel message in place; posts a new one only if it is gone."""
+        message_id = await self.registry.get(channel.guild.id, channel.id, "tickets_panel")
+        if not message_id:
+            # First start with the registry: clear panels posted by older versions once
+            await self.initialize_tickets(channel)
+            return
+        try:
+            await channel.get_partial_message(message_id).edit(embeds=self.panel_embeds(), view=self.panel_view())
+            log.info(f"Ticket panel {message_id} is up to date.")
+        except discord.NotFound:
+            log.info(f"Stored ticket panel {message_id} no longer exists. Posting a new one.")
+            await self.post_panel(channel)
+
+    async def post_panel(self, channel):
+        message = await channel.send(embeds=self.panel_embeds(), view=self.panel_view())
+        await self.registry.set(channel.guild.id, channel.id, "tickets_panel", message.id)
+        return message
+
+    async def initialize_tickets(self, channel):
+        """Deletes previous bot messages and sends the ticketing embeds."""
+        # Clear previous bot messages
+        await purge_messages(channel, lambda message: message.author == self.client.user)
+        await self.post_panel(channel)
+
+# Index of open tickets
+class TicketIndex:
+    """
+    Maps (guild_id, user_id, ticket type) -> channel_id for every open ticket.
+    Lookups are plain dict hits; changes are written through to tickets.db and
+    each guild's part of the index can be rebuilt from its ticket category at startup.
+    """
+
+    def __init__(self, path="tickets.db"):
+        self.db = Datastore(path)
+        self.schema = self.db.submit(self._create_table)  # Awaited through ready()
+        self.channels = {}  # (guild_id, user_id, prefix) -> channel_id
+        self.owners = {}  # channel_id -> (guild_id, user_id, prefix)
+        self._locks = weakref.WeakValueDictionary()  # (guild_id, user_id) -> asyncio.Lock, dropped once unused
+
+    @staticmethod
+    def _create_table(conn):
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(open_tickets)")]
+        if columns and "guild_id" not in columns:
+            # Tables from before multi-guild support are unique per (user, type) only; the
+            # constraint cannot be altered in place, so copy the rows into the new layout.
+            # Their guild is unknown here and is filled in by rebuild() from the live channel.
+            conn.execute("ALTER TABLE open_tickets RENAME TO open_tickets_old")
+            columns = []
+        conn.execute(
+            '''CREATE TABLE IF NOT EXISTS open_tickets (
+                channel_id INTEGER PRIMARY KEY,
+                guild_id INTEGER,
+                user_id INTEGER,
+                prefix TEXT,
+                UNIQUE (guild_id, user_id, prefix)
+            )'''
+        )
+        if not columns:
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'open_tickets_old'").fetchone()
+            if exists:
+                conn.execute(
+                    "INSERT OR IGNORE INTO open_tickets (channel_id, user_id, prefix) "
+                    "SELECT channel_id, user_id, prefix FROM open_tickets_old"
+                )
+                conn.execute("DROP TABLE open_tickets_old")
+
+    async def ready(self):
+        """Waits for the table to exist; raises if creating or migrating it failed."""
+        await asyncio.wrap_future(self.schema)
+
+    def lock(self, guild_id, user_id):
+        """Per-user lock (within one guild) so two quick clicks cannot both create a channel."""
+        key = (guild_id, user_id)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    def get(self, guild_id, user_id, prefix):
+        return self.channels.get((guild_id, user_id, prefix))
+
+    def owner_of(self, channel_id):
+        entry = self.owners.get(channel_id)
+        return entry[1] if entry else None
+
+    async def add(self, guild_id, user_id, prefix, channel_id):
+        self._set(guild_id, user_id, prefix, channel_id)
+        await self.db.execute(
+            "INSERT OR REPLACE INTO open_tickets (channel_id, guild_id, user_id, prefix) VALUES (?, ?, ?, ?)",
+            (channel_id, guild_id, user_id, prefix)
+        )
+
+    async def remove(self, channel_id):
+        entry = self.owners.pop(channel_id, None)
+        if entry:
+            self.channels.pop(entry, None)
+        await self.db.execute("DELETE FROM open_tickets WHERE channel_id = ?", (channel_id,))
+
+    def _set(self, guild_id, user_id, prefix, channel_id):
+        self.channels[(guild_id, user_id, prefix)] = channel_id
+        self.owners[channel_id] = (guild_id, user_id, prefix)
+
+    async def rebuild(self, categories):
+        """
+        Reload the index from tickets.db, dropping channels that no longer exist and
+        adopting ticket channels in the categories (one per guild) that were never recorded.
+        Only the guilds whose category was passed in are checked; tickets of other guilds
+        (category not configured or guild unavailable) are kept as they are.
+        """
+        rows = await self.db.fetchall("SELECT channel_id, guild_id, user_id, prefix FROM open_tickets")
+        live = {channel.id: channel for category in categories for channel in category.text_channels}
+        checked = {category.guild.id for category in categories}
+        self.channels.clear()
+        self.owners.clear()
+        stale = []
+        recorded = []
+        for channel_id, guild_id, user_id, prefix in rows:
+            channel = live.get(channel_id)
+            if channel:
+                if guild_id is None:
+                    # Row from before multi-guild support: record the guild it lives in
+                    recorded.append((channel_id, channel.guild.id, user_id, prefix))
+                self._set(channel.guild.id, user_id, prefix, channel_id)
+            elif guild_id is None or guild_id in checked:
+                stale.append((channel_id,))
+            else:
+                self._set(guild_id, user_id, prefix, channel_id)
+
+        adopted = 0
+        for channel in live.values():
+            if channel.id in self.owners:
+                continue
+            entry = self.parse_ticket_channel(channel)
+            if entry:
+                self._set(channel.guild.id, *entry, channel.id)
+                recorded.append((channel.id, channel.guild.id, *entry))
+                adopted += 1
+
+        def sync(conn):
+            conn.executemany("DELETE FROM open_tickets WHERE channel_id = ?", stale)
+            conn.executemany(
+                "INSERT OR REPLACE INTO open_tickets (channel_id, guild_id, user_id, prefix) VALUES (?, ?, ?, ?)",
+                recorded
+            )
+
+        await self.db.run(sync)
+        log.info(f"Ticket index rebuilt: {len(self.owners)} open, {adopted} adopted, {len(stale)} stale.")
+
+    @staticmethod
+    def parse_ticket_channel(channel):
+        """Recover (user_id, prefix) from a ticket channel's topic or its member overwrite."""
+        if channel.topic and channel.topic.startswith("ticket:"):
+            try:
+                _, user_id, prefix = channel.topic.split(":", 2)
+                return int(user_id), prefix
+            except ValueError:
+                pass
+        prefix = channel.name.split("-", 1)[0]
+        if prefix not in TICKET_PREFIXES:
+            return None
+        for target in channel.overwrites:
+            if not isinstance(target, discord.Role):
+                return target.id, prefix
+        return None
 
 # Ticket Buttons
 class TicketButtons(View):
-    def __init__(self, client, category_id, general_role_id, report_roles, log_channel_id):
+    def __init__(self, client, config, index):
         super().__init__(timeout=None)
         self.client = client
-        self.category_id = category_id
-        self.general_role_id = general_role_id
-        self.report_roles = report_roles
-        self.log_channel_id = log_channel_id
+        self.config = config
+        self.index = index
 
-    @discord.ui.button(label="General Support", style=discord.ButtonStyle.green, emoji="🛠")
+    @discord.ui.button(label="General Support", style=discord.ButtonStyle.green, emoji="🛠", custom_id="tickets:general")
+    @perf.track
     async def general_button(self, interaction: discord.Interaction, button: Button):
-        await self.create_ticket(interaction, "gen", [interaction.user.id, self.general_role_id], "#1C6E19")  # Darker green
+        roles = [self.config.get(interaction.guild.id, "ticket_general_role")]
+        await self.create_ticket(interaction, "gen", roles, "#1C6E19")  # Darker green
 
-    @discord.ui.button(label="Report Issue", style=discord.ButtonStyle.red, emoji="⚠")
+    @discord.ui.button(label="Report Issue", style=discord.ButtonStyle.red, emoji="⚠", custom_id="tickets:report")
+    @perf.track
     async def report_button(self, interaction: discord.Interaction, button: Button):
-        await self.create_ticket(interaction, "rep", [interaction.user.id, *self.report_roles], "#7A0101")  # Darker red
+        roles = self.config.get(interaction.guild.id, "ticket_report_roles")
+        await self.create_ticket(interaction, "rep", roles, "#7A0101")  # Darker red
 
-    @discord.ui.button(label="Community & Purchases", style=discord.ButtonStyle.gray, emoji="💰")
+    @discord.ui.button(label="Community & Purchases", style=discord.ButtonStyle.gray, emoji="💰", custom_id="tickets:community")
+    @perf.track
     async def community_button(self, interaction: discord.Interaction, button: Button):
-        await self.create_ticket(interaction, "com", [interaction.user.id, *self.report_roles], "#846A29")  # Dark tan
+        roles = self.config.get(interaction.guild.id, "ticket_report_roles")
+        await self.create_ticket(interaction, "com", roles, "#846A29")  # Dark tan
 
     async def create_ticket(self, interaction, prefix, allowed_roles, embed_color):
         """Creates a ticket channel with appropriate permissions."""
+        # Acknowledge first: creating the channel is rate-limited per guild and can take far
+        # longer than the 3 seconds Discord allows before the click shows as failed
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            async with self.index.lock(interaction.guild.id, interaction.user.id):
+                await self._create_ticket(interaction, prefix, allowed_roles, embed_color)
+        except Exception as e:
+            log.error(f"Could not create a {prefix} ticket for {interaction.user}: {e}")
+            await interaction.followup.send("Sorry, the ticket could not be created. Please try again.", ephemeral=True)
+
+    async def _create_ticket(self, interaction, prefix, allowed_roles, embed_color):
         guild = interaction.guild
-        category = discord.utils.get(guild.categories, id=self.category_id)
+        category = guild.get_channel(self.config.get(guild.id, "ticket_category"))
+
+        # One open ticket per user and ticket type
+        existing_id = self.index.get(guild.id, interaction.user.id, prefix)
+        if existing_id:
+            if guild.get_channel(existing_id):
+                await interaction.followup.send("You already have an open ticket.", ephemeral=True)
+                return
+            await self.index.remove(existing_id)
 
         # Channel name with prefix and user name
         channel_name = f"{prefix}-{interaction.user.name[:4]}"
-        existing_channel = discord.utils.get(guild.channels, name=channel_name)
-        if existing_channel:
-            await interaction.response.send_message("You already have an open ticket.", ephemeral=True)
-            return
 
         # Permissions setup
         overwrites = {
@@ -112,8 +331,14 @@ class TicketButtons(View):
                 overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
 
         # Create the channel
-        ticket_channel = await guild.create_text_channel(name=channel_name, category=category, overwrites=overwrites)
-        await interaction.response.send_message(f"Ticket created: {ticket_channel.mention}", ephemeral=True)
+        ticket_channel = await guild.create_text_channel(
+            name=channel_name,
+            category=category,
+            overwrites=overwrites,
+            topic=f"ticket:{interaction.user.id}:{prefix}"  # Lets the index be rebuilt after a restart
+        )
+        await self.index.add(guild.id, interaction.user.id, prefix, ticket_channel.id)
+        await interaction.followup.send(f"Ticket created: {ticket_channel.mention}", ephemeral=True)
 
         # Notify in the ticket channel
         embed = discord.Embed(
@@ -124,35 +349,37 @@ class TicketButtons(View):
         await ticket_channel.send(content=f"{interaction.user.mention} @here", embed=embed)
 
         # Add a close button to the ticket
-        await ticket_channel.send(view=CloseButton(ticket_channel, interaction.user.id, self.log_channel_id))
+        await ticket_channel.send(view=CloseButton(self.config, self.index))
 
         # Log the ticket creation
-        log_channel = guild.get_channel(self.log_channel_id)
+        log_channel = guild.get_channel(self.config.get(guild.id, "ticket_log_channel"))
         if log_channel:
-            await log_channel.send(f"Ticket `{channel_name}` opened by {interaction.user.mention}.")
+            get_outbound().send_message(BACKGROUND, log_channel, f"Ticket `{channel_name}` opened by {interaction.user.mention}.")
 
-# Close Button
+# Close Button (persistent: works for every ticket channel, before and after restarts)
 class CloseButton(View):
-    def __init__(self, ticket_channel, user_id, log_channel_id):
+    def __init__(self, config, index):
         super().__init__(timeout=None)
-        self.ticket_channel = ticket_channel
-        self.user_id = user_id
-        self.log_channel_id = log_channel_id
+        self.config = config
+        self.index = index
 
-    @discord.ui.button(label="Close Ticket", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="Close Ticket", style=discord.ButtonStyle.red, custom_id="tickets:close")
+    @perf.track
     async def close_button(self, interaction: discord.Interaction, button: Button):
-        if interaction.user.id != self.user_id:
+        ticket_channel = interaction.channel
+        if self.index.owner_of(ticket_channel.id) != interaction.user.id:
             await interaction.response.send_message("You do not have permission to close this ticket.", ephemeral=True)
             return
 
         # Log ticket closure
         guild = interaction.guild
-        log_channel = guild.get_channel(self.log_channel_id)
+        log_channel = guild.get_channel(self.config.get(guild.id, "ticket_log_channel"))
         if log_channel:
-            await log_channel.send(f"Ticket `{self.ticket_channel.name}` closed by {interaction.user.mention}.")
+            get_outbound().send_message(BACKGROUND, log_channel, f"Ticket `{ticket_channel.name}` closed by {interaction.user.mention}.")
 
         # Delete the ticket channel
-        await self.ticket_channel.delete()
+        await self.index.remove(ticket_channel.id)
+        await ticket_channel.delete()
 
 # Setup function for adding the cog
 async def setup(client):
@@ -0,0 +1,220 @@
+"""
+Manifest-based updater.
+
+A release publishes manifest.json next to the bot files:
+
+    {"version": "1.0.5", "files": {"bot_main.py": "<sha256>", "cogs/x.py": "<sha256>", ...}}
+
+The updater compares those hashes with the local files, downloads only the
+files that differ (in parallel, over one pooled HTTP session), verifies every
+download against the manifest, stages the result and then swaps the files into
+place. Both http(s):// and file:// base URLs are supported so the whole flow can
+be exercised against a local directory.
+
+Build a manifest for a release with:
+    python updater.py build-manifest <folder> --version <version>
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MANIFEST_NAME = "manifest.json"
+# Local files that must never be part of a manifest or be overwritten
+EXCLUDED_FILES = {"token.txt", "supervisor.key", MANIFEST_NAME}
+EXCLUDED_DIRS = {"__pycache__"}
+EXCLUDED_SUFFIXES = (".db", ".db-wal", ".db-shm", ".log", ".pyc", ".gz")
+DOWNLOAD_WORKERS = 8
+
+
+class UpdateError(Exception):
+    pass
+
+
+class FileAdapter(requests.adapters.BaseAdapter):
+    """Minimal requests transport for file:// URLs (used for local test mirrors)."""
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        path = urllib.request.url2pathname(urllib.parse.urlparse(request.url).path)
+        try:
+            with open(path, "rb") as f:
+                response._content = f.read()
+            response.status_code = 200
+        except FileNotFoundError:
+            response._content = b""
+            response.status_code = 404
+        response.reason = "OK" if response.status_code == 200 else "Not Found"
+        return response
+
+    def close(self):
+        pass
+
+
+def make_session(workers=DOWNLOAD_WORKERS):
+    """One pooled session shared by every download of an update."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.mount("file://", FileAdapter())
+    return session
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_release_files(folder):
+    """Yields the relative paths (with forward slashes) of files that belong in a release."""
+    for root, dirs, files in os.walk(folder):
+        # Also skips the updater's own .update_* staging and backup folders
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRS and not d.startswith(".update_"))
+        for name in sorted(files):
+            if name in EXCLUDED_FILES or name.endswith(EXCLUDED_SUFFIXES):
+                continue
+            yield os.path.relpath(os.path.join(root, name), folder).replace(os.sep, "/")
+
+
+def build_manifest(folder, version):
+    files = {path: sha256_file(os.path.join(folder, path)) for path in iter_release_files(folder)}
+    return {"version": version, "files": files}
+
+
+def fetch_manifest(session, base_url):
+    """Returns the remote manifest, or None if the release does not publish one."""
+    response = session.get(f"{base_url}/{MANIFEST_NAME}", timeout=30)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+def changed_files(manifest, folder):
+    """Paths whose local copy is missing or has a different hash than the manifest."""
+    changed = []
+    for path, expected in manifest["files"].items():
+        if path.startswith("/") or ".." in path.split("/"):
+            raise UpdateError(f"Refusing unsafe manifest path: {path}")
+        local_path = os.path.join(folder, *path.split("/"))
+        if not os.path.exists(local_path) or sha256_file(local_path) != expected:
+            changed.append(path)
+    return changed
+
+
+def download_files(session, base_url, manifest, paths, staging_dir, workers=DOWNLOAD_WORKERS):
+    """Downloads paths into staging_dir in parallel and verifies each one against the manifest."""
+
+    def download(path):
+        response = session.get(f"{base_url}/{urllib.parse.quote(path)}", timeout=30)
+        response.raise_for_status()
+        digest = hashlib.sha256(response.content).hexdigest()
+        if digest != manifest["files"][path]:
+            raise UpdateError(f"Hash mismatch for {path}: expected {manifest['files'][path]}, got {digest}")
+        destination = os.path.join(staging_dir, *path.split("/"))
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        with open(destination, "wb") as f:
+            f.write(response.content)
+        return path
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        # list() re-raises the first download error
+        list(pool.map(download, paths))
+
+
+def apply_staged(staging_dir, folder, paths):
+    """
+    Moves staged files over the live ones. Replaced files are backed up first and
+    restored if any move fails, so the folder is never left half-updated.
+    """
+    backup_dir = os.path.join(folder, ".update_backup")
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    applied = []
+    try:
+        for path in paths:
+            live = os.path.join(folder, *path.split("/"))
+            if os.path.exists(live):
+                backup = os.path.join(backup_dir, *path.split("/"))
+                os.makedirs(os.path.dirname(backup), exist_ok=True)
+                shutil.copy2(live, backup)
+            os.makedirs(os.path.dirname(live), exist_ok=True)
+            os.replace(os.path.join(staging_dir, *path.split("/")), live)
+            applied.append(path)
+    except Exception:
+        for path in applied:
+            backup = os.path.join(backup_dir, *path.split("/"))
+            live = os.path.join(folder, *path.split("/"))
+            if os.path.exists(backup):
+                os.replace(backup, live)
+            else:
+                os.remove(live)
+        raise
+    finally:
+        shutil.rmtree(backup_dir, ignore_errors=True)
+
+
+def update_folder(base_url, folder, session=None, workers=DOWNLOAD_WORKERS):
+    """
+    Brings folder in line with the manifest published at base_url.
+    Returns a dict with the manifest version, the changed paths and the elapsed seconds,
+    or None if base_url has no manifest.
+    """
+    started = time.perf_counter()
+    session = session or make_session(workers)
+    manifest = fetch_manifest(session, base_url)
+    if manifest is None:
+        return None
+    paths = changed_files(manifest, folder)
+    if paths:
+        staging_dir = tempfile.mkdtemp(prefix=".update_staging_", dir=folder)
+        try:
+            download_files(session, base_url, manifest, paths, staging_dir, workers)
+            apply_staged(staging_dir, folder, paths)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    return {"version": manifest.get("version"), "changed": paths, "elapsed": time.perf_counter() - started}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manifest-based bot updater")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build-manifest", help=f"Write {MANIFEST_NAME} for a release folder")
+    build.add_argument("folder")
+    build.add_argument("--version", required=True)
+    apply = sub.add_parser("apply", help="Update a folder from a base URL (http(s):// or file://)")
+    apply.add_argument("base_url")
+    apply.add_argument("folder")
+    args = parser.parse_args(argv)
+
+    if args.command == "build-manifest":
+        manifest = build_manifest(args.folder, args.version)
+        with open(os.path.join(args.folder, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        print(f"Wrote {MANIFEST_NAME} with {len(manifest['files'])} file(s).")
+    else:
+        result = update_folder(args.base_url.rstrip("/"), args.folder)
+        if result is None:
+            print("No manifest found at that URL.")
+            return 1
+        print(f"Updated to {result['version']}: {len(result['changed'])} file(s) in {result['elapsed']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
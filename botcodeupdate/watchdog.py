@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+# Seconds between heartbeats; each one is a single call_soon_threadsafe on the loop
+HEARTBEAT_INTERVAL = 0.25
+# Lag at which the loop counts as stalled and its stack is logged
+STALL_THRESHOLD = 0.5
+# Upper bounds (ms) of the lag histogram buckets; the last bucket is open-ended
+LAG_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Frames from files in this folder are reported as the blocking call rather than library internals
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class LoopWatchdog:
+    """
+    Thread that measures event-loop lag with a heartbeat.
+
+    Every HEARTBEAT_INTERVAL the thread schedules a callback on the loop and measures
+    how long the loop takes to run it. If the loop has not answered within
+    STALL_THRESHOLD, the loop thread's current stack is captured (sys._current_frames)
+    and logged with the innermost bot frame named as the blocking call, while the stall
+    is still in progress. Lags go into a histogram for the diagnostics output.
+    """
+
+    def __init__(self, interval=HEARTBEAT_INTERVAL, threshold=STALL_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.beats = 0
+        self.max_lag = 0.0
+        self.stalls = deque(maxlen=20)  # (wall time, lag seconds, blocking frame)
+        self._loop = None
+        self._loop_thread_id = None
+        self._answered = threading.Event()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Starts watching the running loop; call it from the loop thread (re-targets after a restart)."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _beat(self):
+        self._answered.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            loop = self._loop
+            if loop is None or loop.is_closed():
+                continue
+            self._answered.clear()
+            sent = time.monotonic()
+            try:
+                loop.call_soon_threadsafe(self._beat)
+            except RuntimeError:
+                continue  # Loop closed between the check and the call
+            stall = None
+            if not self._answered.wait(self.threshold):
+                stall = self._capture()
+                log.warning(
+                    f"Event loop blocked for over {self.threshold * 1000:.0f}ms in {stall[0]}\n"
+                    f"Loop thread stack:\n{stall[1]}"
+                )
+                while not self._answered.wait(1.0):
+                    if self._stop.is_set() or loop.is_closed():
+                        return
+            self._record(time.monotonic() - sent, stall)
+
+    def _capture(self):
+        """Returns (blocking frame description, formatted stack) for the loop thread."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return "an unknown frame", ""
+        stack = traceback.extract_stack(frame)
+        culprit = next((f for f in reversed(stack) if f.filename.startswith(BOT_DIR)), stack[-1])
+        where = f"{os.path.basename(culprit.filename)}:{culprit.lineno} ({culprit.name}: {culprit.line})"
+        return where, "".join(traceback.format_list(stack)).rstrip()
+
+    def _record(self, lag, stall):
+        self.beats += 1
+        self.max_lag = max(self.max_lag, lag)
+        lag_ms = lag * 1000
+        index = next((i for i, bound in enumerate(LAG_BUCKETS_MS) if lag_ms <= bound), len(LAG_BUCKETS_MS))
+        self.buckets[index] += 1
+        if stall is not None:
+            self.stalls.append((time.time(), lag, stall[0]))
+            log.warning(f"Event loop stall in {stall[0]} lasted at least {lag_ms:.0f}ms.")
+
+    def snapshot(self):
+        labels = [f"<={bound}ms" for bound in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]}ms"]
+        return {
+            "beats": self.beats,
+            "max_lag_ms": self.max_lag * 1000,
+            "histogram": dict(zip(labels, self.buckets)),
+            "stalls": [
+                {"at": at, "lag_ms": lag * 1000, "where": where} for at, lag, where in self.stalls
+            ],
+        }
+
+
+_watchdog = None
+
+
+def get_watchdog():
+    global _watchdog
+    if _watchdog is None:
+        _watchdog = LoopWatchdog()
+    return _watchdog